@@ -1 +1,6 @@
 """LangChain autocomplete backend package."""
+
+import time
+
+# Taken before any submodule loads, so app.main can report the package's import time.
+IMPORT_STARTED = time.perf_counter()
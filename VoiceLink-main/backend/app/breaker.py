@@ -0,0 +1,124 @@
+"""Per-model circuit breakers for the Gemini fallback chain."""
+
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+@dataclass(frozen=True)
+class BreakerPolicy:
+    """Trip after ``failure_threshold`` consecutive failures; retry after ``reset_seconds``.
+
+    ``timeout_seconds`` bounds each upstream call so a hung model counts as a
+    failure instead of stalling the request.
+    """
+
+    failure_threshold: int = 3
+    reset_seconds: float = 30.0
+    timeout_seconds: float | None = 20.0
+
+
+class CircuitBreaker:
+    """Closed → open after repeated failures → half-open trial → closed again on success."""
+
+    def __init__(self, name: str, policy: BreakerPolicy) -> None:
+        self.name = name
+        self._policy = policy
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self.trips = 0
+        self.skipped = 0
+        self.last_error = ""
+
+    @property
+    def state(self) -> str:
+        return self._state
+
+    def allow(self) -> bool:
+        """Whether a request may be sent to this model right now."""
+        with self._lock:
+            if self._state == CLOSED:
+                return True
+            if self._state == OPEN and time.monotonic() - self._opened_at >= self._policy.reset_seconds:
+                self._state = HALF_OPEN
+                self._trial_in_flight = False
+            if self._state == HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            self.skipped += 1
+            return False
+
+    def probe_due(self) -> bool:
+        """Claim the half-open trial slot for a background probe if the cool-down has elapsed."""
+        with self._lock:
+            if self._state == OPEN and time.monotonic() - self._opened_at >= self._policy.reset_seconds:
+                self._state = HALF_OPEN
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._state = CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self, exc: BaseException) -> None:
+        with self._lock:
+            self._failures += 1
+            self.last_error = type(exc).__name__
+            self._trial_in_flight = False
+            if self._state == HALF_OPEN or self._failures >= self._policy.failure_threshold:
+                if self._state != OPEN:
+                    self.trips += 1
+                self._state = OPEN
+                self._opened_at = time.monotonic()
+
+    def release(self) -> None:
+        """Give back a half-open trial slot whose call was cancelled without an outcome."""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def snapshot(self) -> dict[str, object]:
+        with self._lock:
+            retry_in = 0.0
+            if self._state == OPEN:
+                retry_in = max(0.0, self._policy.reset_seconds - (time.monotonic() - self._opened_at))
+            return {
+                "state": self._state,
+                "consecutive_failures": self._failures,
+                "trips": self.trips,
+                "skipped": self.skipped,
+                "last_error": self.last_error,
+                "retry_in_seconds": round(retry_in, 1),
+            }
+
+
+class BreakerBoard:
+    """Breakers keyed by model name, shared by every chain that uses the same clients."""
+
+    def __init__(self, policy: BreakerPolicy | None = None) -> None:
+        self.policy = policy or BreakerPolicy()
+        self._breakers: dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> CircuitBreaker:
+        with self._lock:
+            breaker = self._breakers.get(name)
+            if breaker is None:
+                breaker = self._breakers[name] = CircuitBreaker(name, self.policy)
+            return breaker
+
+    def snapshot(self) -> dict[str, dict[str, object]]:
+        with self._lock:
+            breakers = list(self._breakers.values())
+        return {breaker.name: breaker.snapshot() for breaker in breakers}
@@ -2,6 +2,7 @@
 
 from functools import lru_cache
 from pathlib import Path
+from typing import Literal
 
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -14,12 +15,171 @@ class Settings(BaseSettings):
         validation_alias="GEMINI_MODEL",
         description="Preferred Gemini model short name (e.g. 'gemini-2.5-pro').",
     )
+    gemini_temperature: float = Field(
+        0.3,
+        ge=0.0,
+        le=2.0,
+        validation_alias="GEMINI_TEMPERATURE",
+    )
     suggestions_count: int = Field(
         5,
         ge=1,
         le=10,
         validation_alias="SUGGESTIONS_COUNT",
     )
+    suggestion_max_children: int | None = Field(
+        None,
+        ge=1,
+        validation_alias="SUGGESTION_MAX_CHILDREN",
+        description="Keep at most this many follow-up words per node; unset keeps all.",
+    )
+    structured_output: bool = Field(
+        False,
+        validation_alias="GEMINI_STRUCTURED_OUTPUT",
+        description="Send the payload schema as Gemini's native response schema instead of prompt instructions.",
+    )
+    tree_cache_enabled: bool = Field(
+        True,
+        validation_alias="TREE_CACHE_ENABLED",
+        description="Answer word picks from the last suggestion tree of the session.",
+    )
+    tree_cache_sessions: int = Field(1024, ge=1, validation_alias="TREE_CACHE_SESSIONS")
+    tree_cache_ttl_seconds: float = Field(300.0, gt=0, validation_alias="TREE_CACHE_TTL_SECONDS")
+    response_cache_enabled: bool = Field(True, validation_alias="RESPONSE_CACHE_ENABLED")
+    response_cache_size: int = Field(512, ge=1, validation_alias="RESPONSE_CACHE_SIZE")
+    response_cache_ttl_seconds: float = Field(120.0, gt=0, validation_alias="RESPONSE_CACHE_TTL_SECONDS")
+    response_cache_stale_seconds: float = Field(
+        600.0,
+        ge=0,
+        validation_alias="RESPONSE_CACHE_STALE_SECONDS",
+        description="Window after the TTL during which stale entries are served while revalidating.",
+    )
+    response_cache_serve_stale_on_rate_limit: bool = Field(
+        True,
+        validation_alias="RESPONSE_CACHE_SERVE_STALE_ON_RATE_LIMIT",
+    )
+    split_generation: bool = Field(
+        False,
+        validation_alias="SPLIT_GENERATION",
+        description="Generate the word tree and the sentences with two concurrent Gemini calls.",
+    )
+    split_retries: int = Field(1, ge=0, le=3, validation_alias="SPLIT_RETRIES")
+    hedge_enabled: bool = Field(
+        False,
+        validation_alias="HEDGE_ENABLED",
+        description="Fire the next fallback model when the current one is slower than its hedge delay.",
+    )
+    hedge_delay_ms: int | None = Field(
+        None,
+        ge=0,
+        validation_alias="HEDGE_DELAY_MS",
+        description="Fixed hedge delay; when unset the model's rolling p90 latency is used.",
+    )
+    hedge_max_ratio: float = Field(0.2, ge=0.0, le=1.0, validation_alias="HEDGE_MAX_RATIO")
+    breaker_enabled: bool = Field(True, validation_alias="BREAKER_ENABLED")
+    breaker_failure_threshold: int = Field(3, ge=1, validation_alias="BREAKER_FAILURE_THRESHOLD")
+    breaker_reset_seconds: float = Field(30.0, gt=0, validation_alias="BREAKER_RESET_SECONDS")
+    breaker_timeout_seconds: float | None = Field(
+        20.0,
+        gt=0,
+        validation_alias="BREAKER_TIMEOUT_SECONDS",
+        description="Per-call upstream timeout; a timeout counts as a breaker failure.",
+    )
+    breaker_probe_interval_seconds: float = Field(15.0, gt=0, validation_alias="BREAKER_PROBE_INTERVAL_SECONDS")
+    rate_limit_enabled: bool = Field(True, validation_alias="RATE_LIMIT_ENABLED")
+    rate_limit_rpm: int | None = Field(
+        None,
+        ge=1,
+        validation_alias="RATE_LIMIT_RPM",
+        description="Gemini requests per minute allowed by the project quota; unset leaves the limiter off.",
+    )
+    rate_limit_tpm: int | None = Field(
+        None,
+        ge=1,
+        validation_alias="RATE_LIMIT_TPM",
+        description="Gemini tokens per minute (estimated); unset disables the token bucket.",
+    )
+    rate_limit_queue_size: int = Field(32, ge=0, validation_alias="RATE_LIMIT_QUEUE_SIZE")
+    rate_limit_max_wait_seconds: float = Field(10.0, ge=0, validation_alias="RATE_LIMIT_MAX_WAIT_SECONDS")
+    singleflight_enabled: bool = Field(
+        True,
+        validation_alias="SINGLEFLIGHT_ENABLED",
+        description="Share one upstream call between identical concurrent requests.",
+    )
+    prefetch_enabled: bool = Field(
+        False,
+        validation_alias="PREFETCH_ENABLED",
+        description="Prefetch suggestions for the top root words (spends extra quota).",
+    )
+    prefetch_top_k: int = Field(2, ge=1, le=10, validation_alias="PREFETCH_TOP_K")
+    prefetch_session_budget: int = Field(10, ge=0, validation_alias="PREFETCH_SESSION_BUDGET")
+    context_window_enabled: bool = Field(
+        True,
+        validation_alias="CONTEXT_WINDOW_ENABLED",
+        description="Trim long conversations to a token budget with a rolling summary.",
+    )
+    context_keep_turns: int = Field(8, ge=1, validation_alias="CONTEXT_KEEP_TURNS")
+    context_token_budget: int = Field(800, ge=50, validation_alias="CONTEXT_TOKEN_BUDGET")
+    context_summary_token_budget: int = Field(200, ge=0, validation_alias="CONTEXT_SUMMARY_TOKEN_BUDGET")
+    session_max_count: int = Field(1024, ge=1, validation_alias="SESSION_MAX_COUNT")
+    session_max_turns: int = Field(200, ge=1, validation_alias="SESSION_MAX_TURNS")
+    session_max_chars: int = Field(20_000, ge=1, validation_alias="SESSION_MAX_CHARS")
+    session_ttl_seconds: float = Field(3600.0, gt=0, validation_alias="SESSION_TTL_SECONDS")
+    local_model_enabled: bool = Field(
+        True,
+        validation_alias="LOCAL_MODEL_ENABLED",
+        description="Local n-gram next-word model used for instant, merged or fallback suggestions.",
+    )
+    local_model_mode: Literal["fallback", "merge"] = Field("fallback", validation_alias="LOCAL_MODEL_MODE")
+    local_model_merge_slots: int = Field(1, ge=0, le=10, validation_alias="LOCAL_MODEL_MERGE_SLOTS")
+    local_model_order: int = Field(3, ge=2, le=5, validation_alias="LOCAL_MODEL_ORDER")
+    local_model_fallback: bool = Field(
+        False,
+        validation_alias="LOCAL_MODEL_FALLBACK",
+        description="Serve the local tree when Gemini fails (never for local rate limits or a zero quota).",
+    )
+    local_model_learn: bool = Field(
+        False,
+        validation_alias="LOCAL_MODEL_LEARN",
+        description="Train the shared local model on replies sent to /users/{user_id}/replies.",
+    )
+    local_model_path: str | None = Field(
+        None,
+        validation_alias="LOCAL_MODEL_PATH",
+        description="Where the trained model is loaded from and saved on shutdown (gzipped JSON).",
+    )
+    personal_vocab_enabled: bool = Field(
+        True,
+        validation_alias="PERSONAL_VOCAB_ENABLED",
+        description="Re-rank suggestions with each user's own reply vocabulary (needs user_id).",
+    )
+    personal_vocab_dir: str | None = Field(None, validation_alias="PERSONAL_VOCAB_DIR")
+    personal_vocab_users: int = Field(256, ge=1, validation_alias="PERSONAL_VOCAB_USERS")
+    personal_vocab_inject: int = Field(1, ge=0, le=5, validation_alias="PERSONAL_VOCAB_INJECT")
+    personal_vocab_min_count: int = Field(2, ge=1, validation_alias="PERSONAL_VOCAB_MIN_COUNT")
+    batch_max_concurrency: int = Field(4, ge=1, le=32, validation_alias="BATCH_MAX_CONCURRENCY")
+    model_discovery_cache_path: str | None = Field(
+        str(Path(__file__).resolve().parent.parent / ".cache" / "gemini_models.json"),
+        validation_alias="MODEL_DISCOVERY_CACHE_PATH",
+        description="File the discovered model lists are kept in across restarts; empty keeps them in memory only.",
+    )
+    model_discovery_ttl_seconds: float = Field(3600.0, gt=0, validation_alias="MODEL_DISCOVERY_TTL_SECONDS")
+    warmup_enabled: bool = Field(
+        True,
+        validation_alias="WARMUP_ENABLED",
+        description="Import the Gemini SDKs, discover models and build the chains in the background at startup.",
+    )
+    warmup_retry_max_seconds: float = Field(
+        60.0,
+        gt=0,
+        validation_alias="WARMUP_RETRY_MAX_SECONDS",
+        description="Longest pause between warm-up attempts; failed attempts back off exponentially up to it.",
+    )
+    warmup_ping: bool = Field(
+        False,
+        validation_alias="WARMUP_PING",
+        description="Also send one tiny request per model during warm-up to open connections (spends quota).",
+    )
 
     model_config = SettingsConfigDict(
         env_file=str(Path(__file__).resolve().parent.parent / ".env"),
@@ -0,0 +1,199 @@
+"""Token-budgeted conversation windowing with a cached rolling summary."""
+
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from collections.abc import Sequence
+from dataclasses import dataclass, field
+
+from .text import fingerprint
+
+SUMMARY_HEADER = "Summary of earlier conversation:"
+RECENT_HEADER = "Recent turns:"
+# Marks summary state that counts absolute turn numbers of a server-held session.
+_INDEXED = "indexed"
+
+
+def approx_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token), matching the rate limiter."""
+    return (len(text) + 3) // 4
+
+
+def summarize_turn(turn: str, *, max_words: int = 12) -> str:
+    """Compress one ``role: text`` line to its speaker and opening words."""
+    role, sep, text = turn.partition(":")
+    if not sep:
+        role, text = "", turn
+    words = text.split()
+    short = " ".join(words[:max_words]) + ("…" if len(words) > max_words else "")
+    return f"{role.strip()}: {short}" if role.strip() else short
+
+
+@dataclass
+class WindowedConversation:
+    text: str
+    tokens_before: int
+    tokens_after: int
+    summarized_turns: int = 0
+
+
+@dataclass
+class _SummaryState:
+    folded: int = 0
+    fingerprint: str = ""
+    lines: list[str] = field(default_factory=list)
+
+
+class ConversationWindow:
+    """Keep the last turns verbatim and fold older turns into a per-session summary.
+
+    A conversation within ``token_budget`` is sent unchanged, however many turns it has.
+
+    The summary is extractive (speaker plus opening words of each folded turn)
+    so it costs no extra model call. It is cached per session together with a
+    fingerprint of the turns it covers, so a growing transcript only summarizes
+    the newly folded turns.
+    """
+
+    def __init__(
+        self,
+        *,
+        keep_turns: int = 8,
+        token_budget: int = 800,
+        summary_token_budget: int = 200,
+        max_sessions: int = 1024,
+    ) -> None:
+        self._keep_turns = keep_turns
+        self._budget = token_budget
+        self._summary_budget = summary_token_budget
+        self._max_sessions = max_sessions
+        self._summaries: OrderedDict[str, _SummaryState] = OrderedDict()
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.trimmed = 0
+        self.summary_reuses = 0
+        self.tokens_before = 0
+        self.tokens_after = 0
+
+    def prepare(self, session_key: str, conversation: str) -> WindowedConversation:
+        before = approx_tokens(conversation)
+        turns = [line.strip() for line in conversation.splitlines() if line.strip()]
+        self.requests += 1
+        if before <= self._budget:
+            return self._untouched(conversation, before)
+        recent = self._recent(turns)
+        older = turns[: len(turns) - len(recent)]
+        return self._assemble(before, self._summary(session_key, older), recent, len(older))
+
+    def prepare_turns(
+        self, session_key: str, turns: Sequence[str], *, first_index: int, chars: int
+    ) -> WindowedConversation:
+        """Window a server-held transcript while reading only its newest turns.
+
+        ``turns`` only grows at the end and loses turns at the front;
+        ``first_index`` counts those dropped turns and ``chars`` is the length
+        of all lines. The summary then tracks absolute turn numbers instead of
+        fingerprinting the older turns, so a request costs O(new turns).
+        """
+        count = len(turns)
+        before = (chars + max(0, count - 1) + 3) // 4  # approx_tokens of the joined lines
+        self.requests += 1
+        if before <= self._budget:
+            return self._untouched("\n".join(turns), before)
+        recent = self._recent(turns)
+        folded_until = first_index + count - len(recent)
+        summary = self._summary_since(session_key, turns, first_index, folded_until)
+        return self._assemble(before, summary, recent, count - len(recent))
+
+    def _untouched(self, conversation: str, tokens: int) -> WindowedConversation:
+        self.tokens_before += tokens
+        self.tokens_after += tokens
+        return WindowedConversation(conversation, tokens, tokens)
+
+    def _recent(self, turns: Sequence[str]) -> list[str]:
+        """The last turns that fit the recent budget, reading no further back than ``keep_turns``."""
+        recent_budget = max(1, self._budget - self._summary_budget)
+        count = len(turns)
+        tail = [turns[index].strip() for index in range(count - min(self._keep_turns, count), count)]
+        keep = len(tail)
+        while keep > 1 and approx_tokens("\n".join(tail[-keep:])) > recent_budget:
+            keep -= 1
+        recent = tail[-keep:]
+        if approx_tokens(recent[-1]) > recent_budget:
+            # A single oversized turn: keep its most recent part.
+            recent[-1] = "…" + recent[-1][-recent_budget * 4 :]
+        return recent
+
+    def _assemble(self, before: int, summary: list[str], recent: list[str], folded: int) -> WindowedConversation:
+        sections = []
+        if summary:
+            sections += [SUMMARY_HEADER, *summary]
+        sections += [RECENT_HEADER, *recent]
+        text = "\n".join(sections)
+        after = approx_tokens(text)
+        self.trimmed += 1
+        self.tokens_before += before
+        self.tokens_after += after
+        return WindowedConversation(text, before, after, summarized_turns=folded)
+
+    def _state(self, session_key: str) -> _SummaryState:
+        state = self._summaries.get(session_key)
+        if state is None:
+            state = self._summaries[session_key] = _SummaryState()
+        self._summaries.move_to_end(session_key)
+        while len(self._summaries) > self._max_sessions:
+            self._summaries.popitem(last=False)
+        return state
+
+    def _roll(self, lines: list[str]) -> list[str]:
+        # Rolling: drop the oldest summary lines once the summary outgrows its budget.
+        while len(lines) > 1 and approx_tokens("\n".join(lines)) > self._summary_budget:
+            lines.pop(0)
+        return lines
+
+    def _summary(self, session_key: str, older: list[str]) -> list[str]:
+        if not older:
+            return []
+        with self._lock:
+            state = self._state(session_key)
+            if state.folded <= len(older) and state.fingerprint == fingerprint("\n".join(older[: state.folded])):
+                if state.folded:
+                    self.summary_reuses += 1
+                new_lines = [summarize_turn(turn) for turn in older[state.folded :]]
+                lines = state.lines + new_lines
+            else:
+                lines = [summarize_turn(turn) for turn in older]
+            state.folded = len(older)
+            state.fingerprint = fingerprint("\n".join(older))
+            state.lines = self._roll(lines)
+            return list(state.lines)
+
+    def _summary_since(
+        self, session_key: str, turns: Sequence[str], first_index: int, folded_until: int
+    ) -> list[str]:
+        if folded_until <= first_index:
+            return []
+        with self._lock:
+            state = self._state(session_key)
+            if state.fingerprint == _INDEXED and state.folded <= folded_until:
+                if state.folded:
+                    self.summary_reuses += 1
+                start, lines = max(state.folded, first_index), list(state.lines)
+            else:
+                start, lines = first_index, []
+            lines += [summarize_turn(turns[index - first_index].strip()) for index in range(start, folded_until)]
+            state.folded = folded_until
+            state.fingerprint = _INDEXED
+            state.lines = self._roll(lines)
+            return list(state.lines)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "requests": self.requests,
+            "trimmed": self.trimmed,
+            "summary_reuses": self.summary_reuses,
+            "prompt_tokens_before": self.tokens_before,
+            "prompt_tokens_after": self.tokens_after,
+            "sessions": len(self._summaries),
+        }
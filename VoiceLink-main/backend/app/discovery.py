@@ -0,0 +1,180 @@
+"""Cached, single-flight discovery of the Gemini models an API key can use."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import threading
+import time
+from pathlib import Path
+from typing import Callable
+
+from .singleflight import SingleFlight
+from .text import fingerprint
+
+logger = logging.getLogger(__name__)
+
+_FORMAT_VERSION = 1
+
+
+class ModelDiscovery:
+    """Per-key model lists with a TTL, persisted to ``cache_path`` when set.
+
+    A fresh list is returned straight from memory. A stale one is returned too,
+    while one background thread refreshes it. Only a key with no list at all
+    waits for the network, and concurrent callers for that key share a single
+    listing. A failed listing never replaces the last good list; it is retried
+    after ``retry_seconds``.
+    """
+
+    def __init__(
+        self,
+        lister: Callable[[str], list[str]],
+        *,
+        cache_path: str | Path | None = None,
+        ttl_seconds: float = 3600.0,
+        retry_seconds: float = 30.0,
+    ) -> None:
+        self._lister = lister
+        self._ttl = ttl_seconds
+        self._retry = retry_seconds
+        self._path: Path | None = None
+        self._entries: dict[str, tuple[list[str], float]] = {}
+        self._failed_at: dict[str, float] = {}
+        self._refreshing: set[str] = set()
+        self._key_locks: dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self._flights = SingleFlight()
+        self.hits = 0
+        self.stale_served = 0
+        self.listings = 0
+        self.failures = 0
+        self.configure(cache_path=cache_path, ttl_seconds=ttl_seconds)
+
+    def configure(self, *, cache_path: str | Path | None = None, ttl_seconds: float | None = None) -> None:
+        """Point the cache at a file (loading what it holds) and/or change the TTL."""
+        if ttl_seconds is not None:
+            self._ttl = ttl_seconds
+        self._path = Path(cache_path) if cache_path else None
+        if self._path is not None:
+            loaded = self._load()
+            with self._lock:
+                for key, entry in loaded.items():
+                    if key not in self._entries or self._entries[key][1] < entry[1]:
+                        self._entries[key] = entry
+
+    def get(self, api_key: str) -> list[str]:
+        """Model names for ``api_key``; blocks only when nothing is cached for it yet."""
+        key = fingerprint(api_key)
+        entry = self._entries.get(key)
+        if entry is not None:
+            models, fetched_at = entry
+            if time.time() - fetched_at < self._ttl:
+                self.hits += 1
+            else:
+                self.stale_served += 1
+                self._refresh_in_background(key, api_key)
+            return models
+        with self._key_lock(key):
+            entry = self._entries.get(key)
+            if entry is not None:
+                # Another caller listed the models while this one waited.
+                self.hits += 1
+                return entry[0]
+            if not self._retry_due(key):
+                return []
+            models = self._fetch(key, api_key)
+        return models if models is not None else []
+
+    async def aget(self, api_key: str) -> list[str]:
+        """Async ``get``: cached lists return inline, concurrent cold lookups share one thread."""
+        entry = self._entries.get(fingerprint(api_key))
+        if entry is not None and time.time() - entry[1] < self._ttl:
+            self.hits += 1
+            return entry[0]
+        return await self._flights.do(fingerprint(api_key), lambda: asyncio.to_thread(self.get, api_key))
+
+    def _key_lock(self, key: str) -> threading.Lock:
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def _retry_due(self, key: str) -> bool:
+        failed_at = self._failed_at.get(key)
+        return failed_at is None or time.monotonic() - failed_at >= self._retry
+
+    def _fetch(self, key: str, api_key: str) -> list[str] | None:
+        self.listings += 1
+        try:
+            models = list(self._lister(api_key))
+        except Exception as exc:  # noqa: BLE001 - keep the last good list
+            self.failures += 1
+            self._failed_at[key] = time.monotonic()
+            logger.warning("Gemini model discovery failed: %s", exc)
+            return None
+        self._failed_at.pop(key, None)
+        with self._lock:
+            self._entries[key] = (models, time.time())
+        self._save()
+        logger.info("Gemini models discovered (%d): %s", len(models), ", ".join(models) or "<none>")
+        return models
+
+    def _refresh_in_background(self, key: str, api_key: str) -> None:
+        with self._lock:
+            if key in self._refreshing or not self._retry_due(key):
+                return
+            self._refreshing.add(key)
+
+        def refresh() -> None:
+            try:
+                with self._key_lock(key):
+                    self._fetch(key, api_key)
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=refresh, name="model-discovery-refresh", daemon=True).start()
+
+    def _load(self) -> dict[str, tuple[list[str], float]]:
+        if self._path is None or not self._path.is_file():
+            return {}
+        try:
+            document = json.loads(self._path.read_text(encoding="utf-8"))
+            if document.get("v") != _FORMAT_VERSION:
+                raise ValueError(f"unsupported version {document.get('v')!r}")
+            return {
+                key: ([str(name) for name in entry["models"]], float(entry["fetched_at"]))
+                for key, entry in document["keys"].items()
+            }
+        except (OSError, ValueError, KeyError, TypeError, AttributeError) as exc:
+            logger.warning("Ignoring unreadable model discovery cache at %s: %s", self._path, exc)
+            return {}
+
+    def _save(self) -> None:
+        if self._path is None:
+            return
+        with self._lock:
+            document = {
+                "v": _FORMAT_VERSION,
+                "keys": {
+                    key: {"models": models, "fetched_at": fetched_at}
+                    for key, (models, fetched_at) in self._entries.items()
+                },
+            }
+        try:
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self._path.with_suffix(self._path.suffix + ".tmp")
+            tmp.write_text(json.dumps(document, separators=(",", ":")), encoding="utf-8")
+            tmp.replace(self._path)
+        except OSError:
+            logger.warning("Could not save the model discovery cache", exc_info=True)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "keys": len(self._entries),
+            "hits": self.hits,
+            "stale_served": self.stale_served,
+            "listings": self.listings,
+            "failures": self.failures,
+        }
+
@@ -0,0 +1,54 @@
+"""Hedging policy and latency bookkeeping for the Gemini fallback chain."""
+
+from __future__ import annotations
+
+from collections import deque
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class HedgePolicy:
+    """When to fire the same request at the next candidate model.
+
+    ``delay_seconds`` fixes the hedge delay. When it is ``None`` the delay is
+    the rolling ``percentile`` of the model's recent latencies, falling back to
+    ``initial_delay_seconds`` until ``min_samples`` have been observed.
+    ``max_hedge_ratio`` caps hedges as a fraction of requests to protect quota.
+    """
+
+    delay_seconds: float | None = None
+    percentile: float = 0.9
+    initial_delay_seconds: float = 2.0
+    min_delay_seconds: float = 0.2
+    min_samples: int = 5
+    window: int = 50
+    max_hedge_ratio: float = 0.2
+
+
+class LatencyWindow:
+    """Rolling window of successful call latencies for one model."""
+
+    def __init__(self, size: int) -> None:
+        self._samples: deque[float] = deque(maxlen=size)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def add(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def percentile(self, fraction: float) -> float | None:
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, max(0, int(round(fraction * (len(ordered) - 1)))))
+        return ordered[index]
+
+
+def hedge_delay(policy: HedgePolicy, window: LatencyWindow) -> float:
+    """Seconds to wait on a model before hedging to the next candidate."""
+    if policy.delay_seconds is not None:
+        return policy.delay_seconds
+    if len(window) < policy.min_samples:
+        return policy.initial_delay_seconds
+    return max(policy.min_delay_seconds, window.percentile(policy.percentile) or 0.0)
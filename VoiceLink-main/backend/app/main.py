@@ -1,24 +1,235 @@
 """FastAPI entrypoint for the autocomplete backend."""
 
+import time
 from contextlib import asynccontextmanager
 import json
 from json import JSONDecodeError
 
-from fastapi import Body, Depends, FastAPI, HTTPException, status
+from fastapi import Depends, FastAPI, HTTPException, Request, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 
+from . import IMPORT_STARTED
 from .config import Settings, get_settings
-from .schemas import SuggestionRequest, SuggestionResponse
+from .rate_limit import RateLimitExceeded, retry_delay_from_error
+from .prompts import MODEL_DISCOVERY
+from .registry import ServiceRegistry
+from .schemas import (
+    BatchItemError,
+    ReplyRequest,
+    SessionCreateRequest,
+    SessionInfo,
+    SessionSuggestionRequest,
+    SessionTurnsRequest,
+    SuggestionBatchItem,
+    SuggestionBatchRequest,
+    SuggestionBatchResponse,
+    SuggestionRequest,
+    SuggestionResponse,
+)
 from .service import AutocompleteService, SuggestionError
+from .sessions import ConversationSession, SessionNotFound, SessionStore
+from .startup import StartupState, warm_up
+from .streaming import format_sse
+from .wire import compact_response, negotiate
 from pydantic import ValidationError
 from google.api_core.exceptions import ResourceExhausted, GoogleAPIError  # ensure present
-import re  # new
 import asyncio
+import logging
+import math
+
+
+def _parse_suggestion_request(body: bytes) -> SuggestionRequest:
+    """Validate the raw body exactly once, unwrapping clients that send the JSON as a string."""
+    if body.lstrip()[:1] == b'"':
+        try:
+            body = json.loads(body)
+        except JSONDecodeError:
+            body = ""
+    try:
+        return SuggestionRequest.model_validate_json(body)
+    except ValidationError as exc:
+        if isinstance(body, str) and any(error["type"] == "json_invalid" for error in exc.errors()):
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="Body is a string but not valid JSON.",
+            ) from exc
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=exc.errors(include_url=False, include_context=False),
+        ) from exc
+
+
+# The handlers read the raw body themselves; document it like a normal JSON body.
+_SUGGESTION_BODY_DOC = {
+    "requestBody": {
+        "required": True,
+        "content": {"application/json": {"schema": {"$ref": "#/components/schemas/SuggestionRequest"}}},
+    }
+}
+
+
+def _json_response(result: dict) -> Response:
+    """Serialize already-validated models once, in pydantic-core, without re-validation."""
+    body = SuggestionResponse.model_construct(
+        suggestions=result["suggestions"],
+        sentences=result["sentences"],
+    ).model_dump_json()
+    return Response(content=body, media_type="application/json")
+
+
+logger = logging.getLogger(__name__)
+
+# Heavy SDKs are deferred (see ``prompts``), so this is the cost of everything imported eagerly.
+IMPORT_SECONDS = round(time.perf_counter() - IMPORT_STARTED, 4)
+
+
+async def _predict_or_raise(
+    service: AutocompleteService,
+    *,
+    question: str,
+    partial_answer: str,
+    conversation: str,
+    suggestions_count: int | None,
+    session_id: str | None,
+    instant: bool = False,
+    user_id: str | None = None,
+    session: ConversationSession | None = None,
+) -> dict:
+    """Run one prediction, retrying upstream rate limits and mapping errors to HTTP."""
+    # Retry config (could later move to settings)
+    MAX_RATE_LIMIT_RETRIES = 2
+    INITIAL_BACKOFF_SECONDS = 1.0
+    attempt = 0
+    while True:
+        try:
+            return await service.apredict_next_words(
+                question=question,
+                partial_answer=partial_answer,
+                conversation=conversation,
+                suggestions_count=suggestions_count,
+                session_id=session_id,
+                instant=instant,
+                user_id=user_id,
+                session=session,
+            )
+        except RateLimitExceeded as exc:
+            # Shed locally before reaching Gemini: answer fast instead of queueing.
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many suggestion requests. Retry later.",
+                headers={"Retry-After": str(math.ceil(exc.retry_after))},
+            ) from exc
+        except ResourceExhausted as exc:
+            text = str(exc)
+            retry_after = retry_delay_from_error(exc)
+            attempt += 1
+            quota_zero = "limit: 0" in text.lower()
+            if quota_zero:
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Gemini quota is zero for this model. Enable billing or allocate quota.",
+                ) from exc
+            if attempt > MAX_RATE_LIMIT_RETRIES:
+                headers = {}
+                if retry_after:
+                    # round up seconds
+                    headers["Retry-After"] = str(int(retry_after) + 1)
+                raise HTTPException(
+                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                    detail="Upstream rate limit exceeded. Retry later.",
+                    headers=headers,
+                ) from exc
+            if service.admission is None:
+                backoff = INITIAL_BACKOFF_SECONDS * (2 ** (attempt - 1))
+                await asyncio.sleep(backoff)
+            # Otherwise the service already set a global cooldown on the shared
+            # admission controller, so the retry waits there with everyone else.
+        except GoogleAPIError as exc:
+            raise HTTPException(
+                status_code=status.HTTP_502_BAD_GATEWAY,
+                detail="Upstream Gemini error.",
+            ) from exc
+        except SuggestionError as exc:
+            raise HTTPException(
+                status_code=status.HTTP_502_BAD_GATEWAY,
+                detail=str(exc),
+            ) from exc
+
+
+def _learn_user_turns(service: AutocompleteService, user_id: str, turns) -> None:
+    for turn in turns:
+        if turn.role == "user":
+            service.learn_reply(user_id, turn.text)
+
+
+def _batch_error(exc: Exception) -> BatchItemError:
+    """Map a failed batch item to the status a single ``/suggest`` call would return."""
+    if isinstance(exc, ResourceExhausted):
+        if "limit: 0" in str(exc).lower():
+            return BatchItemError(
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Gemini quota is zero for this model. Enable billing or allocate quota.",
+            )
+        return BatchItemError(status=status.HTTP_429_TOO_MANY_REQUESTS, detail="Rate limit exceeded. Retry later.")
+    if isinstance(exc, GoogleAPIError):
+        return BatchItemError(status=status.HTTP_502_BAD_GATEWAY, detail="Upstream Gemini error.")
+    if isinstance(exc, SuggestionError):
+        return BatchItemError(status=status.HTTP_502_BAD_GATEWAY, detail=str(exc))
+    logger.exception("Batch item failed", exc_info=exc)
+    return BatchItemError(status=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Internal error.")
+
+
+async def _probe_breakers_forever(registry: ServiceRegistry, interval: float) -> None:
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await registry.probe_breakers()
+        except Exception:  # noqa: BLE001 - keep probing on the next tick
+            logger.warning("Circuit breaker probe failed", exc_info=True)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):  # pragma: no cover - simple resource hook
-    yield
+    app.state.registry = ServiceRegistry()
+    app.state.startup = StartupState(import_seconds=IMPORT_SECONDS)
+    tasks = []
+    try:
+        settings = get_settings()
+    except ValidationError:
+        settings = None
+        app.state.startup.phase = "failed"
+        app.state.startup.error = "Server configuration invalid. Please set required environment variables."
+    interval = settings.breaker_probe_interval_seconds if settings is not None else 15.0
+    if settings is not None:
+        # Loads the lists saved by the previous run, so warm-up skips the listing while they are fresh.
+        MODEL_DISCOVERY.configure(
+            cache_path=settings.model_discovery_cache_path,
+            ttl_seconds=settings.model_discovery_ttl_seconds,
+        )
+    tasks.append(asyncio.create_task(_probe_breakers_forever(app.state.registry, interval)))
+    if settings is not None:
+        if settings.warmup_enabled:
+            # Runs in the background so the server accepts connections (and /health) immediately.
+            tasks.append(
+                asyncio.create_task(
+                    warm_up(
+                        app.state.registry,
+                        settings,
+                        app.state.startup,
+                        ping=settings.warmup_ping,
+                        max_retry_seconds=settings.warmup_retry_max_seconds,
+                    )
+                )
+            )
+        else:
+            app.state.startup.phase = "skipped"
+    try:
+        yield
+    finally:
+        for task in tasks:
+            task.cancel()
+        app.state.registry.clear()
 
 
 def create_app() -> FastAPI:
@@ -40,86 +251,256 @@ def create_app() -> FastAPI:
                 detail="Server configuration invalid. Please set required environment variables.",
             ) from exc
 
-    def provide_service(settings: Settings = Depends(provide_settings)) -> AutocompleteService:
-        return AutocompleteService(settings=settings)
+    def provide_registry(request: Request) -> ServiceRegistry:
+        registry = getattr(request.app.state, "registry", None)
+        if registry is None:
+            # Lifespan did not run (e.g. app mounted without it); keep one registry per app.
+            registry = request.app.state.registry = ServiceRegistry()
+        return registry
+
+    def provide_sessions(request: Request, settings: Settings = Depends(provide_settings)) -> SessionStore:
+        sessions = getattr(request.app.state, "sessions", None)
+        if sessions is None:
+            sessions = request.app.state.sessions = SessionStore(
+                max_sessions=settings.session_max_count,
+                max_turns=settings.session_max_turns,
+                max_chars=settings.session_max_chars,
+                ttl_seconds=settings.session_ttl_seconds,
+            )
+        return sessions
+
+    def _session_or_404(sessions: SessionStore, session_id: str, turns=None) -> ConversationSession:
+        try:
+            if turns is None:
+                return sessions.get(session_id)
+            return sessions.append(session_id, turns)
+        except SessionNotFound as exc:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Unknown or expired session. Create a new one.",
+            ) from exc
+
+    def _respond(request: Request, result: dict) -> Response:
+        """Nested JSON by default; the flat compact format when the client asks for it."""
+        startup = getattr(request.app.state, "startup", None)
+        if startup is not None:
+            startup.record_first_suggestion()
+        media_type = negotiate(request.headers.get("accept"))
+        if media_type is not None:
+            return compact_response(result, media_type, request.headers.get("accept-encoding"))
+        return _json_response(result)
+
+    def provide_service(
+        settings: Settings = Depends(provide_settings),
+        registry: ServiceRegistry = Depends(provide_registry),
+    ) -> AutocompleteService:
+        return registry.get(settings)
 
     @application.get("/health", tags=["system"])
     async def health() -> dict[str, str]:
         return {"status": "ok"}
 
-    @application.post("/suggest", response_model=SuggestionResponse, tags=["suggestions"])
+    @application.get("/ready", tags=["system"])
+    async def ready(request: Request) -> JSONResponse:
+        """`200` once the chains are warm, warm-up is off or a suggestion was served; `503` with progress until then."""
+        startup = getattr(request.app.state, "startup", None)
+        if startup is None:
+            # Lifespan did not run, so nothing is warming; requests build the chains lazily.
+            return JSONResponse({"ready": True, "phase": "lazy", "import_seconds": IMPORT_SECONDS})
+        snapshot = startup.snapshot()
+        return JSONResponse(
+            snapshot,
+            status_code=status.HTTP_200_OK if snapshot["ready"] else status.HTTP_503_SERVICE_UNAVAILABLE,
+        )
+
+    @application.get("/metrics", tags=["system"])
+    async def metrics(request: Request, registry: ServiceRegistry = Depends(provide_registry)) -> dict:
+        metrics = {
+            "registry": registry.stats(),
+            "services": registry.service_stats(),
+            "model_discovery": MODEL_DISCOVERY.stats(),
+        }
+        startup = getattr(request.app.state, "startup", None)
+        if startup is not None:
+            metrics["startup"] = startup.snapshot()
+        sessions = getattr(request.app.state, "sessions", None)
+        if sessions is not None:
+            metrics["sessions"] = sessions.stats()
+        return metrics
+
+    @application.get("/models/health", tags=["system"])
+    async def models_health(registry: ServiceRegistry = Depends(provide_registry)) -> dict:
+        return {"breakers": registry.breaker_states()}
+
+    @application.post(
+        "/suggest",
+        response_model=SuggestionResponse,
+        tags=["suggestions"],
+        openapi_extra=_SUGGESTION_BODY_DOC,
+    )
     async def suggest(
-        payload: SuggestionRequest | dict | str = Body(...),
+        request: Request,
         service: AutocompleteService = Depends(provide_service),
-    ) -> SuggestionResponse:
-        # Accept accidental stringified JSON
-        if isinstance(payload, str):
-            try:
-                payload = json.loads(payload)
-            except JSONDecodeError:
-                raise HTTPException(
-                    status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
-                    detail="Body is a string but not valid JSON.",
+    ) -> Response:
+        payload = _parse_suggestion_request(await request.body())
+        result = await _predict_or_raise(
+            service,
+            question=payload.question,
+            partial_answer=payload.partial_answer,
+            conversation=payload.conversation,
+            suggestions_count=payload.suggestions_count,
+            session_id=payload.session_id,
+            instant=payload.instant,
+            user_id=payload.user_id,
+        )
+        return _respond(request, result)
+
+    @application.post("/suggest/batch", response_model=SuggestionBatchResponse, tags=["suggestions"])
+    async def suggest_batch(
+        payload: SuggestionBatchRequest,
+        settings: Settings = Depends(provide_settings),
+        service: AutocompleteService = Depends(provide_service),
+    ) -> SuggestionBatchResponse:
+        """Answer every item independently; one failing item does not fail the batch."""
+        outcomes = await service.apredict_many(
+            [
+                {
+                    "question": item.question,
+                    "partial_answer": item.partial_answer,
+                    "conversation": item.conversation,
+                    "suggestions_count": item.suggestions_count,
+                    "session_id": item.session_id,
+                    "instant": item.instant,
+                    "user_id": item.user_id,
+                }
+                for item in payload.items
+            ],
+            max_concurrency=payload.max_concurrency or getattr(settings, "batch_max_concurrency", 4),
+        )
+        results = []
+        for index, outcome in enumerate(outcomes):
+            if isinstance(outcome, Exception):
+                results.append(SuggestionBatchItem(index=index, error=_batch_error(outcome)))
+            else:
+                results.append(
+                    SuggestionBatchItem(
+                        index=index,
+                        result=SuggestionResponse(suggestions=outcome["suggestions"], sentences=outcome["sentences"]),
+                    )
                 )
-        if isinstance(payload, dict):
-            try:
-                payload = SuggestionRequest(**payload)
-            except ValidationError as exc:
-                raise HTTPException(
-                    status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
-                    detail=exc.errors(),
-                ) from exc
+        return SuggestionBatchResponse(results=results)
 
-        # Retry config (could later move to settings)
-        MAX_RATE_LIMIT_RETRIES = 2
-        INITIAL_BACKOFF_SECONDS = 1.0
-        attempt = 0
-        while True:
+    @application.post("/sessions", response_model=SessionInfo, status_code=status.HTTP_201_CREATED, tags=["sessions"])
+    async def create_session(
+        payload: SessionCreateRequest | None = None,
+        sessions: SessionStore = Depends(provide_sessions),
+        service: AutocompleteService = Depends(provide_service),
+    ) -> SessionInfo:
+        if payload is None:
+            payload = SessionCreateRequest()
+        turns = [(turn.role, turn.text) for turn in payload.turns]
+        session = sessions.create(turns, user_id=payload.user_id)
+        if payload.user_id:
+            _learn_user_turns(service, payload.user_id, payload.turns)
+        return SessionInfo(session_id=session.session_id, turns=len(session.turns))
+
+    @application.post("/sessions/{session_id}/turns", response_model=SessionInfo, tags=["sessions"])
+    async def append_turns(
+        session_id: str,
+        payload: SessionTurnsRequest,
+        sessions: SessionStore = Depends(provide_sessions),
+        service: AutocompleteService = Depends(provide_service),
+    ) -> SessionInfo:
+        session = _session_or_404(sessions, session_id, [(turn.role, turn.text) for turn in payload.turns])
+        if session.user_id:
+            _learn_user_turns(service, session.user_id, payload.turns)
+        return SessionInfo(session_id=session.session_id, turns=len(session.turns))
+
+    @application.post("/users/{user_id}/replies", status_code=status.HTTP_204_NO_CONTENT, tags=["suggestions"])
+    async def learn_reply(
+        user_id: str,
+        payload: ReplyRequest,
+        service: AutocompleteService = Depends(provide_service),
+    ) -> None:
+        """Record a reply the user sent so their own words rank first next time."""
+        service.learn_reply(user_id, payload.text)
+
+    @application.delete("/sessions/{session_id}", status_code=status.HTTP_204_NO_CONTENT, tags=["sessions"])
+    async def delete_session(session_id: str, sessions: SessionStore = Depends(provide_sessions)) -> None:
+        try:
+            sessions.delete(session_id)
+        except SessionNotFound as exc:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Unknown session.") from exc
+
+    @application.post("/sessions/{session_id}/suggest", response_model=SuggestionResponse, tags=["sessions"])
+    async def suggest_for_session(
+        request: Request,
+        session_id: str,
+        payload: SessionSuggestionRequest,
+        sessions: SessionStore = Depends(provide_sessions),
+        service: AutocompleteService = Depends(provide_service),
+    ) -> Response:
+        session = _session_or_404(sessions, session_id)
+        question = payload.question or session.last_turn("guest")
+        if not question:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="No question given and the session has no guest turn yet.",
+            )
+        result = await _predict_or_raise(
+            service,
+            question=question,
+            partial_answer=payload.partial_answer,
+            conversation="",
+            suggestions_count=payload.suggestions_count,
+            session_id=session_id,
+            instant=payload.instant,
+            user_id=session.user_id,
+            session=session,
+        )
+        return _respond(request, result)
+
+    @application.post("/suggest/stream", tags=["suggestions"], openapi_extra=_SUGGESTION_BODY_DOC)
+    async def suggest_stream(
+        request: Request,
+        service: AutocompleteService = Depends(provide_service),
+    ) -> StreamingResponse:
+        """Server-Sent Events: `root`, `branch`, `sentences`, then `done` (or `error`)."""
+        payload = _parse_suggestion_request(await request.body())
+
+        async def events():
             try:
-                result = await service.apredict_next_words(
+                async for event, data in service.astream_next_words(
                     question=payload.question,
                     partial_answer=payload.partial_answer,
                     conversation=payload.conversation,
                     suggestions_count=payload.suggestions_count,
+                    session_id=payload.session_id,
+                ):
+                    yield format_sse(event, data)
+            except RateLimitExceeded as exc:
+                yield format_sse(
+                    "error",
+                    {
+                        "status": status.HTTP_429_TOO_MANY_REQUESTS,
+                        "detail": "Too many suggestion requests. Retry later.",
+                        "retry_after": math.ceil(exc.retry_after),
+                    },
                 )
-                break
-            except ResourceExhausted as exc:
-                text = str(exc)
-                # Extract retry delay if present
-                m = re.search(r"retry in ([0-9]+(?:\.[0-9]+)?)s", text.lower())
-                retry_after = m.group(1) if m else None
-                attempt += 1
-                quota_zero = "limit: 0" in text.lower()
-                if quota_zero:
-                    raise HTTPException(
-                        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-                        detail="Gemini quota is zero for this model. Enable billing or allocate quota.",
-                    ) from exc
-                if attempt > MAX_RATE_LIMIT_RETRIES:
-                    headers = {}
-                    if retry_after:
-                        # round up seconds
-                        headers["Retry-After"] = str(int(float(retry_after)) + 1)
-                    raise HTTPException(
-                        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-                        detail="Upstream rate limit exceeded. Retry later.",
-                        headers=headers,
-                    ) from exc
-                backoff = INITIAL_BACKOFF_SECONDS * (2 ** (attempt - 1))
-                await asyncio.sleep(backoff)
-            except GoogleAPIError as exc:
-                raise HTTPException(
-                    status_code=status.HTTP_502_BAD_GATEWAY,
-                    detail="Upstream Gemini error.",
-                ) from exc
+            except ResourceExhausted:
+                yield format_sse(
+                    "error",
+                    {"status": status.HTTP_429_TOO_MANY_REQUESTS, "detail": "Upstream rate limit exceeded. Retry later."},
+                )
+            except GoogleAPIError:
+                yield format_sse("error", {"status": status.HTTP_502_BAD_GATEWAY, "detail": "Upstream Gemini error."})
             except SuggestionError as exc:
-                raise HTTPException(
-                    status_code=status.HTTP_502_BAD_GATEWAY,
-                    detail=str(exc),
-                ) from exc
-        return SuggestionResponse(
-            suggestions=result["suggestions"],
-            sentences=result["sentences"],
+                yield format_sse("error", {"status": status.HTTP_502_BAD_GATEWAY, "detail": str(exc)})
+
+        return StreamingResponse(
+            events(),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
         )
 
     return application
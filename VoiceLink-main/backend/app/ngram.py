@@ -0,0 +1,167 @@
+"""Local n-gram next-word model that answers without a network round trip."""
+
+from __future__ import annotations
+
+import gzip
+import heapq
+import json
+import logging
+import re
+import threading
+from pathlib import Path
+
+from .prompts import SuggestionBranch
+
+logger = logging.getLogger(__name__)
+
+SEED_CORPUS_PATH = Path(__file__).resolve().parent / "data" / "seed_corpus.txt"
+
+_FORMAT_VERSION = 1
+_START = "<s>"
+_TOKEN = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+_SENTENCE_BREAK = re.compile(r"[.!?\n]+")
+
+
+def tokenize(text: str) -> list[str]:
+    return _TOKEN.findall(text.casefold())
+
+
+def _display(word: str) -> str:
+    return "I" if word == "i" else word
+
+
+class NGramModel:
+    """Backoff n-gram counts keyed by context tuple, trained incrementally.
+
+    ``predict`` tries the longest known context first and backs off to shorter
+    ones until it has enough candidates, so a lookup touches at most ``order``
+    small count tables. Plain word frequencies (cached between trainings) are
+    used only when no context matched.
+    """
+
+    def __init__(self, *, order: int = 3) -> None:
+        if order < 2:
+            raise ValueError("order must be at least 2")
+        self.order = order
+        self._next: dict[tuple[str, ...], dict[str, int]] = {}
+        self._unigram_top: list[str] | None = None
+        self._lock = threading.Lock()
+        self.trained_tokens = 0
+        self.lookups = 0
+
+    def train(self, text: str) -> None:
+        """Add every sentence in ``text`` to the counts."""
+        with self._lock:
+            for sentence in _SENTENCE_BREAK.split(text):
+                tokens = tokenize(sentence)
+                if not tokens:
+                    continue
+                history = [_START, *tokens]
+                for index in range(1, len(history)):
+                    word = history[index]
+                    for size in range(0, min(self.order - 1, index) + 1):
+                        context = tuple(history[index - size : index])
+                        counts = self._next.setdefault(context, {})
+                        counts[word] = counts.get(word, 0) + 1
+                self.trained_tokens += len(tokens)
+            self._unigram_top = None
+
+    def predict(self, words: list[str], k: int) -> list[str]:
+        """Most likely next words after ``words``, best first."""
+        history = [_START, *words]
+        picked: list[str] = []
+        seen: set[str] = set()
+        for size in range(min(self.order - 1, len(history)), -1, -1):
+            if size == 0:
+                if picked:
+                    # Bare frequent words only stand in when no context matched at all.
+                    break
+                candidates = self._unigrams(k)
+            else:
+                counts = self._next.get(tuple(history[-size:]))
+                if not counts:
+                    continue
+                candidates = heapq.nlargest(k, counts, key=counts.__getitem__)
+            for word in candidates:
+                if word not in seen:
+                    seen.add(word)
+                    picked.append(word)
+                    if len(picked) >= k:
+                        return picked
+        return picked
+
+    def _unigrams(self, k: int) -> list[str]:
+        top = self._unigram_top
+        if top is None or len(top) < k:
+            counts = self._next.get((), {})
+            top = self._unigram_top = heapq.nlargest(max(k, 10), counts, key=counts.__getitem__)
+        return top[:k]
+
+    def suggest(self, partial_answer: str, *, count: int = 5, width: int = 3, depth: int = 3) -> list[SuggestionBranch]:
+        """Build a suggestion tree continuing ``partial_answer``."""
+        self.lookups += 1
+        return self._tree(tokenize(partial_answer), count, width, depth)
+
+    def _tree(self, words: list[str], limit: int, width: int, depth: int) -> list[SuggestionBranch]:
+        branches = []
+        for word in self.predict(words, limit):
+            children = self._tree([*words, word], width, width, depth - 1) if depth > 1 else []
+            branches.append(SuggestionBranch(word=_display(word), next=children))
+        return branches
+
+    def to_bytes(self) -> bytes:
+        """Gzipped JSON with an interned vocabulary and integer-encoded contexts."""
+        with self._lock:
+            vocab: dict[str, int] = {}
+
+            def intern(word: str) -> int:
+                return vocab.setdefault(word, len(vocab))
+
+            rows = []
+            for context, counts in self._next.items():
+                row = [len(context), *(intern(word) for word in context)]
+                for word, count in counts.items():
+                    row.extend((intern(word), count))
+                rows.append(row)
+            document = {"v": _FORMAT_VERSION, "order": self.order, "vocab": list(vocab), "rows": rows}
+        return gzip.compress(json.dumps(document, separators=(",", ":")).encode("utf-8"))
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "NGramModel":
+        document = json.loads(gzip.decompress(data))
+        if document.get("v") != _FORMAT_VERSION:
+            raise ValueError(f"Unsupported n-gram format version {document.get('v')!r}")
+        vocab = document["vocab"]
+        model = cls(order=document["order"])
+        for row in document["rows"]:
+            size = row[0]
+            context = tuple(vocab[index] for index in row[1 : 1 + size])
+            pairs = row[1 + size :]
+            model._next[context] = {vocab[pairs[i]]: pairs[i + 1] for i in range(0, len(pairs), 2)}
+        return model
+
+    def save(self, path: str | Path) -> None:
+        target = Path(path)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp = target.with_suffix(target.suffix + ".tmp")
+        tmp.write_bytes(self.to_bytes())
+        tmp.replace(target)
+
+    @classmethod
+    def load(cls, path: str | Path | None = None, *, order: int = 3) -> "NGramModel":
+        """Load a saved model, or train a fresh one on the bundled seed corpus."""
+        if path is not None and Path(path).is_file():
+            try:
+                return cls.from_bytes(Path(path).read_bytes())
+            except (OSError, ValueError, KeyError) as exc:
+                logger.warning("Ignoring unreadable n-gram model at %s: %s", path, exc)
+        model = cls(order=order)
+        model.train(SEED_CORPUS_PATH.read_text(encoding="utf-8"))
+        return model
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "contexts": len(self._next),
+            "trained_tokens": self.trained_tokens,
+            "lookups": self.lookups,
+        }
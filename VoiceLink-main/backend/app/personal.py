@@ -0,0 +1,266 @@
+"""Per-user vocabulary tries that re-rank and extend suggestion trees."""
+
+from __future__ import annotations
+
+import asyncio
+import gzip
+import json
+import logging
+import re
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+from .prompts import SuggestionBranch
+from .text import fingerprint
+
+logger = logging.getLogger(__name__)
+
+_START = "<s>"
+_TOKEN = re.compile(r"[^\W_]+(?:'[^\W_]+)?")
+_SENTENCE_BREAK = re.compile(r"[.!?\n]+")
+
+
+class _Node:
+    __slots__ = ("count", "children")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.children: dict[str, _Node] = {}
+
+
+class VocabularyTrie:
+    """Counts of the word sequences one user has sent, up to ``depth`` words long.
+
+    Every window of a reply (plus a start-of-reply marker) is inserted, so the
+    children of a path are the words that user typed after it. ``next_counts``
+    walks at most ``depth`` nodes per suffix it tries.
+    """
+
+    def __init__(self, *, depth: int = 4, max_nodes: int = 50_000) -> None:
+        self.depth = depth
+        self.max_nodes = max_nodes
+        self.nodes = 0
+        self.replies = 0
+        self._root = _Node()
+        # Surface form for words whose casing matters (names, "I").
+        self.display: dict[str, str] = {}
+
+    def learn(self, text: str) -> None:
+        for sentence in _SENTENCE_BREAK.split(text):
+            surface = _TOKEN.findall(sentence)
+            for token in surface:
+                if token != token.casefold():
+                    self.display[token.casefold()] = token
+            words = [_START, *(token.casefold() for token in surface)]
+            if len(words) == 1:
+                continue
+            for start in range(len(words)):
+                node = self._root
+                for word in words[start : start + self.depth]:
+                    child = node.children.get(word)
+                    if child is None:
+                        if self.nodes >= self.max_nodes:
+                            break
+                        child = node.children[word] = _Node()
+                        self.nodes += 1
+                    child.count += 1
+                    node = child
+        self.replies += 1
+
+    def next_counts(self, words: list[str]) -> dict[str, int]:
+        """Next-word counts after the longest suffix of ``words`` the user has typed."""
+        history = [_START, *words]
+        for start in range(max(0, len(history) - self.depth + 1), len(history)):
+            node = self._root
+            for word in history[start:]:
+                node = node.children.get(word)
+                if node is None:
+                    break
+            if node is not None and node.children:
+                return {word: child.count for word, child in node.children.items()}
+        return {}
+
+    def to_json(self) -> list:
+        """Nested ``[count, {word: node}]`` lists; compact once gzipped."""
+
+        def encode(node: _Node) -> list:
+            return [node.count, {word: encode(child) for word, child in node.children.items()}]
+
+        return [self.depth, self.replies, encode(self._root), self.display]
+
+    @classmethod
+    def from_json(cls, data: list, *, max_nodes: int = 50_000) -> "VocabularyTrie":
+        depth, replies, root, display = data
+        trie = cls(depth=depth, max_nodes=max_nodes)
+        trie.replies = replies
+        trie.display = display
+        stack = [(trie._root, root)]
+        while stack:
+            node, (count, children) = stack.pop()
+            node.count = count
+            for word, encoded in children.items():
+                child = node.children[word] = _Node()
+                trie.nodes += 1
+                stack.append((child, encoded))
+        return trie
+
+
+def _tokenize(text: str) -> list[str]:
+    return _TOKEN.findall(text.casefold())
+
+
+class PersonalVocabulary:
+    """LRU of per-user tries, loaded from and saved to ``directory`` when set."""
+
+    def __init__(
+        self,
+        *,
+        directory: str | Path | None = None,
+        max_users: int = 256,
+        inject: int = 1,
+        min_count: int = 2,
+    ) -> None:
+        self._directory = Path(directory) if directory else None
+        self._max_users = max_users
+        self._inject = inject
+        self._min_count = min_count
+        self._tries: OrderedDict[str, VocabularyTrie] = OrderedDict()
+        self._dirty: set[str] = set()
+        self._lock = threading.Lock()
+        self.personalized = 0
+        self.injected = 0
+
+    def learn(self, user_id: str, text: str) -> None:
+        """Record a reply the user actually sent."""
+        with self._lock:
+            self._trie(user_id).learn(text)
+            self._dirty.add(user_id)
+
+    def personalize(
+        self,
+        user_id: str,
+        partial_answer: str,
+        branches: list[SuggestionBranch],
+        limit: int,
+    ) -> list[SuggestionBranch]:
+        """Return a re-ranked copy of ``branches``; the input tree is not modified.
+
+        Only tries already in memory are used, so an unknown id neither creates
+        an entry nor evicts anyone; :meth:`aload` brings a saved trie in first.
+        """
+        with self._lock:
+            trie = self._tries.get(user_id)
+            if trie is None or not trie.replies:
+                return branches
+            self._tries.move_to_end(user_id)
+            self.personalized += 1
+            return self._rerank(trie, _tokenize(partial_answer), branches, limit)
+
+    def _rerank(
+        self,
+        trie: VocabularyTrie,
+        words: list[str],
+        branches: list[SuggestionBranch],
+        limit: int,
+    ) -> list[SuggestionBranch]:
+        counts = trie.next_counts(words)
+        order = sorted(
+            range(len(branches)),
+            key=lambda index: -counts.get(branches[index].word.casefold(), 0),
+        )
+        ranked = []
+        for index in order:
+            branch = branches[index]
+            children = branch.next
+            if children:
+                children = self._rerank(trie, [*words, branch.word.casefold()], children, len(children))
+            ranked.append(SuggestionBranch(word=branch.word, next=children))
+
+        present = {branch.word.casefold() for branch in branches}
+        extra = [
+            word
+            for word, count in sorted(counts.items(), key=lambda item: -item[1])
+            if count >= self._min_count and word not in present
+        ][: self._inject]
+        if extra:
+            self.injected += len(extra)
+            keep = max(min(len(ranked), limit - len(extra)), 0)
+            ranked = ranked[:keep] + [SuggestionBranch(word=trie.display.get(word, word)) for word in extra]
+            ranked.sort(key=lambda branch: -counts.get(branch.word.casefold(), 0))
+        return ranked[:limit]
+
+    async def aload(self, user_id: str) -> None:
+        """Load ``user_id``'s saved trie off the event loop; ids without a file add nothing."""
+        if self._directory is not None and user_id not in self._tries:
+            await asyncio.to_thread(self._load_saved, user_id)
+
+    def _load_saved(self, user_id: str) -> None:
+        trie = self._load(user_id)
+        if trie is None:
+            return
+        with self._lock:
+            if user_id in self._tries:
+                return
+            self._tries[user_id] = trie
+            evicted = self._evict()
+        for evicted_id, old in evicted:
+            self._save(evicted_id, old)
+
+    def _evict(self) -> list[tuple[str, VocabularyTrie]]:
+        evicted = []
+        while len(self._tries) > self._max_users:
+            evicted.append(self._tries.popitem(last=False))
+        return evicted
+
+    def _trie(self, user_id: str) -> VocabularyTrie:
+        trie = self._tries.get(user_id)
+        if trie is None:
+            trie = self._load(user_id) or VocabularyTrie()
+            self._tries[user_id] = trie
+            for evicted, old in self._evict():
+                self._save(evicted, old)
+        self._tries.move_to_end(user_id)
+        return trie
+
+    def _path(self, user_id: str) -> Path | None:
+        if self._directory is None:
+            return None
+        return self._directory / f"{fingerprint(user_id)}.json.gz"
+
+    def _load(self, user_id: str) -> VocabularyTrie | None:
+        path = self._path(user_id)
+        if path is None or not path.is_file():
+            return None
+        try:
+            return VocabularyTrie.from_json(json.loads(gzip.decompress(path.read_bytes())))
+        except (OSError, ValueError, TypeError) as exc:
+            logger.warning("Ignoring unreadable vocabulary for %s: %s", user_id, exc)
+            return None
+
+    def _save(self, user_id: str, trie: VocabularyTrie) -> None:
+        path = self._path(user_id)
+        if path is None or user_id not in self._dirty:
+            return
+        self._dirty.discard(user_id)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(".tmp")
+            tmp.write_bytes(gzip.compress(json.dumps(trie.to_json(), separators=(",", ":")).encode("utf-8")))
+            tmp.replace(path)
+        except OSError:
+            logger.warning("Could not save vocabulary for %s", user_id, exc_info=True)
+
+    def flush(self) -> None:
+        """Write every changed trie to disk."""
+        with self._lock:
+            for user_id, trie in self._tries.items():
+                self._save(user_id, trie)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "users": len(self._tries),
+            "nodes": sum(trie.nodes for trie in self._tries.values()),
+            "personalized": self.personalized,
+            "injected": self.injected,
+        }
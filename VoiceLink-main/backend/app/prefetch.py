@@ -0,0 +1,113 @@
+"""Speculative prefetch of the next suggestion level for likely word picks."""
+
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable
+
+from .text import normalize_text
+
+logger = logging.getLogger(__name__)
+
+# Set inside prefetch tasks so the admission controller never queues them behind users.
+LOW_PRIORITY: contextvars.ContextVar[bool] = contextvars.ContextVar("voicelink_low_priority", default=False)
+
+
+@dataclass
+class _SessionPrefetch:
+    question: str
+    used: int = 0
+    tasks: dict[str, asyncio.Task] = field(default_factory=dict)
+
+
+class Prefetcher:
+    """Fetch ``partial_answer + word`` for the top root words in the background.
+
+    Each session may start at most ``session_budget`` prefetches per question.
+    When the next request arrives, prefetches for every other continuation are
+    cancelled; the one matching the pick is left running so the request can
+    join it.
+    """
+
+    def __init__(self, *, top_k: int = 2, session_budget: int = 10, max_sessions: int = 1024) -> None:
+        self._top_k = top_k
+        self._budget = session_budget
+        self._max_sessions = max_sessions
+        self._sessions: OrderedDict[str, _SessionPrefetch] = OrderedDict()
+        self.scheduled = 0
+        self.completed = 0
+        self.cancelled = 0
+        self.failed = 0
+        self.skipped_budget = 0
+
+    def on_request(self, session_key: str, question: str, partial_answer: str) -> None:
+        """Cancel prefetches the user did not pick."""
+        session = self._sessions.get(session_key)
+        if session is None:
+            return
+        keep = normalize_text(partial_answer) if session.question == normalize_text(question) else None
+        for target, task in list(session.tasks.items()):
+            if target != keep:
+                if not task.done():
+                    task.cancel()
+                    self.cancelled += 1
+                del session.tasks[target]
+
+    def schedule(
+        self,
+        session_key: str,
+        *,
+        question: str,
+        partial_answer: str,
+        words: list[str],
+        fetch: Callable[[str], Awaitable[object]],
+    ) -> None:
+        question_key = normalize_text(question)
+        session = self._sessions.get(session_key)
+        if session is None or session.question != question_key:
+            session = _SessionPrefetch(question=question_key)
+            self._sessions[session_key] = session
+        self._sessions.move_to_end(session_key)
+        while len(self._sessions) > self._max_sessions:
+            _, evicted = self._sessions.popitem(last=False)
+            for task in evicted.tasks.values():
+                task.cancel()
+
+        for word in words[: self._top_k]:
+            target = f"{partial_answer.strip()} {word}".strip()
+            target_key = normalize_text(target)
+            if target_key in session.tasks:
+                continue
+            if session.used >= self._budget:
+                self.skipped_budget += 1
+                continue
+            session.used += 1
+            self.scheduled += 1
+            task = asyncio.get_running_loop().create_task(self._run(fetch, target))
+            session.tasks[target_key] = task
+
+    async def _run(self, fetch: Callable[[str], Awaitable[object]], target: str) -> None:
+        LOW_PRIORITY.set(True)
+        try:
+            await fetch(target)
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:  # noqa: BLE001 - prefetch is best effort
+            self.failed += 1
+            logger.debug("Prefetch for %r skipped: %s", target, exc)
+        else:
+            self.completed += 1
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "sessions": len(self._sessions),
+            "scheduled": self.scheduled,
+            "completed": self.completed,
+            "cancelled": self.cancelled,
+            "failed": self.failed,
+            "skipped_budget": self.skipped_budget,
+        }
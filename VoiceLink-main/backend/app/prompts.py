@@ -8,26 +8,63 @@ Env:
 
 from __future__ import annotations
 
-from langchain_core.output_parsers import PydanticOutputParser
+from langchain_core.output_parsers import BaseOutputParser, PydanticOutputParser
 from langchain_core.prompts import ChatPromptTemplate
-from pydantic import BaseModel, Field
-try:
-    from langchain_google_genai import ChatGoogleGenerativeAI
-except ImportError as exc:
-    raise RuntimeError(
-        "Missing dependency 'langchain-google-genai'. Install with:\n"
-        "  pip install langchain-google-genai google-generativeai"
-    ) from exc
-from google.api_core.exceptions import NotFound  # new import
+from langchain_core.runnables import RunnableBinding, RunnableSequence
+from pydantic import BaseModel, Field, ValidationError
+
+from .breaker import BreakerBoard, CircuitBreaker
+from .discovery import ModelDiscovery
+from .hedging import HedgePolicy, LatencyWindow, hedge_delay
+from .rate_limit import AdmissionController, estimate_tokens
+from google.api_core.exceptions import (  # new import
+    DeadlineExceeded,
+    GoogleAPIError,
+    NotFound,
+    ResourceExhausted,
+    ServiceUnavailable,
+)
+from langchain_core.exceptions import OutputParserException
+from typing import TYPE_CHECKING, AsyncIterator, NamedTuple
+import asyncio
+import contextlib
 import threading  # new
+import time
 import logging  # new
-try:
-    import google.generativeai as genai  # new
-except ImportError as exc:  # pragma: no cover
-    raise RuntimeError(
-        "Missing dependency 'google-generativeai'. Install with:\n"
-        "  pip install google-generativeai"
-    ) from exc
+
+if TYPE_CHECKING:
+    from langchain_core.language_models import BaseChatModel
+    from langchain_google_genai import ChatGoogleGenerativeAI
+
+
+# The Gemini SDKs take over a second to import, so they load on first use
+# (or during the lifespan warm-up) instead of when this module is imported.
+def _genai():
+    try:
+        import google.generativeai as genai
+    except ImportError as exc:  # pragma: no cover
+        raise RuntimeError(
+            "Missing dependency 'google-generativeai'. Install with:\n"
+            "  pip install google-generativeai"
+        ) from exc
+    return genai
+
+
+def _chat_model_class() -> type[ChatGoogleGenerativeAI]:
+    try:
+        from langchain_google_genai import ChatGoogleGenerativeAI
+    except ImportError as exc:
+        raise RuntimeError(
+            "Missing dependency 'langchain-google-genai'. Install with:\n"
+            "  pip install langchain-google-genai google-generativeai"
+        ) from exc
+    return ChatGoogleGenerativeAI
+
+
+def import_gemini_sdks() -> None:
+    """Load the deferred Gemini SDK imports now."""
+    _genai()
+    _chat_model_class()
 
 
 class SuggestionBranch(BaseModel):
@@ -73,113 +110,538 @@ class SuggestionPayload(BaseModel):
 SuggestionBranch.model_rebuild()
 
 
+class WordTreePayload(BaseModel):
+    """Word-tree half of the payload when words and sentences are generated separately."""
+
+    suggestions: list[SuggestionBranch] = Field(
+        ...,
+        description="Nested tree of candidate words with follow-up options for the next 3-4 turns.",
+    )
+
+
+class SentencesPayload(BaseModel):
+    """Sentence half of the payload when words and sentences are generated separately."""
+
+    sentences: list[SentenceSuggestion] = Field(
+        ...,
+        description="Three complete sentence suggestions labelled smart, funny, and casual.",
+    )
+
+
 SUGGESTION_PARSER = PydanticOutputParser(pydantic_object=SuggestionPayload)
+WORD_TREE_PARSER = PydanticOutputParser(pydantic_object=WordTreePayload)
+SENTENCES_PARSER = PydanticOutputParser(pydantic_object=SentencesPayload)
 
-PROMPT_TEMPLATE = ChatPromptTemplate.from_messages(
-    [
-        (
-            "system",
-            "You help a user craft a spoken reply by building both concise next-word suggestions and a few complete sentences. "
-            "You are always given the running conversation with speaker labels plus the partial reply the user has already spoken. "
-            "Respond only with JSON matching this schema:\n{format_instructions}\nGuidelines:\n"
-            "Word suggestions:\n"
-            "- Provide exactly {suggestions_count} root-level word options ordered from most to least likely.\n"
-            "- Every `word` must be a single conversational token in lowercase unless a proper noun or acronym is required.\n"
-            "- For each root word, populate `next` with 2-3 follow-up words and continue expanding each branch until it reaches a depth of at least 3 levels (root + 2) and at most 4.\n"
-            "- Ensure each follow-up word is contextually coherent given the previous selections and the incoming sentence.\n"
-            "- Do not repeat the same word within the same branch. Trim whitespace and omit punctuation or fillers.\n"
-            "Sentence suggestions:\n"
-            "- Produce exactly three complete sentences in the `sentences` array.\n"
-            "- Use the styles `smart`, `funny`, and `casual` once each.\n"
-            "- Each sentence should be natural, succinct (max ~20 words), and aligned with the specified style while staying relevant to the conversation.\n"
-            "- Sentences must not repeat verbatim what appears in the word suggestions.\n",
-        ),
-        (
-            "human",
-            "Conversation so far (may be empty):\n{conversation}\n"
-            "Incoming sentence from another person: {question}\n"
-            "User's reply so far: {partial_answer}\n"
-            "Produce the JSON with both the nested word suggestions and the three styled full-sentence options.",
-        ),
-    ]
-).partial(format_instructions=SUGGESTION_PARSER.get_format_instructions())
+_WORD_GUIDELINES = (
+    "Word suggestions:\n"
+    "- Provide exactly {suggestions_count} root-level word options ordered from most to least likely.\n"
+    "- Every `word` must be a single conversational token in lowercase unless a proper noun or acronym is required.\n"
+    "- For each root word, populate `next` with 2-3 follow-up words and continue expanding each branch until it reaches a depth of at least 3 levels (root + 2) and at most 4.\n"
+    "- Ensure each follow-up word is contextually coherent given the previous selections and the incoming sentence.\n"
+    "- Do not repeat the same word within the same branch. Trim whitespace and omit punctuation or fillers.\n"
+)
+_SENTENCE_GUIDELINES = (
+    "Sentence suggestions:\n"
+    "- Produce exactly three complete sentences in the `sentences` array.\n"
+    "- Use the styles `smart`, `funny`, and `casual` once each.\n"
+    "- Each sentence should be natural, succinct (max ~20 words), and aligned with the specified style while staying relevant to the conversation.\n"
+)
+_CONTEXT_MESSAGE = (
+    "Conversation so far (may be empty):\n{conversation}\n"
+    "Incoming sentence from another person: {question}\n"
+    "User's reply so far: {partial_answer}\n"
+)
+
+_COMBINED_INTRO = (
+    "You help a user craft a spoken reply by building both concise next-word suggestions and a few complete sentences. "
+)
+_WORDS_INTRO = "You help a user craft a spoken reply by building concise next-word suggestions. "
+_SENTENCES_INTRO = "You help a user craft a spoken reply by writing a few complete sentences. "
+_INPUTS_NOTE = (
+    "You are always given the running conversation with speaker labels plus the partial reply the user has already spoken. "
+)
+_COMBINED_GUIDELINES = (
+    _WORD_GUIDELINES
+    + _SENTENCE_GUIDELINES
+    + "- Sentences must not repeat verbatim what appears in the word suggestions.\n"
+)
+_COMBINED_REQUEST = "Produce the JSON with both the nested word suggestions and the three styled full-sentence options."
+_WORDS_REQUEST = "Produce the JSON with the nested word suggestions."
+_SENTENCES_REQUEST = "Produce the JSON with the three styled full-sentence options."
+
+
+def _template(intro: str, guidelines: str, request: str, parser: PydanticOutputParser | None) -> ChatPromptTemplate:
+    """Build a prompt; with a parser its format instructions are embedded, without one Gemini enforces the schema."""
+    schema = "Respond only with JSON matching this schema:\n{format_instructions}\n" if parser is not None else ""
+    template = ChatPromptTemplate.from_messages(
+        [
+            ("system", intro + _INPUTS_NOTE + schema + "Guidelines:\n" + guidelines),
+            ("human", _CONTEXT_MESSAGE + request),
+        ]
+    )
+    if parser is not None:
+        template = template.partial(format_instructions=parser.get_format_instructions())
+    return template
+
+
+PROMPT_TEMPLATE = _template(_COMBINED_INTRO, _COMBINED_GUIDELINES, _COMBINED_REQUEST, SUGGESTION_PARSER)
+WORDS_PROMPT_TEMPLATE = _template(_WORDS_INTRO, _WORD_GUIDELINES, _WORDS_REQUEST, WORD_TREE_PARSER)
+SENTENCES_PROMPT_TEMPLATE = _template(_SENTENCES_INTRO, _SENTENCE_GUIDELINES, _SENTENCES_REQUEST, SENTENCES_PARSER)
+
+# Native structured output: the response schema travels in the generation config instead.
+STRUCTURED_PROMPT_TEMPLATE = _template(_COMBINED_INTRO, _COMBINED_GUIDELINES, _COMBINED_REQUEST, None)
+STRUCTURED_WORDS_PROMPT_TEMPLATE = _template(_WORDS_INTRO, _WORD_GUIDELINES, _WORDS_REQUEST, None)
+STRUCTURED_SENTENCES_PROMPT_TEMPLATE = _template(_SENTENCES_INTRO, _SENTENCE_GUIDELINES, _SENTENCES_REQUEST, None)
+
+
+def _tree_schema(depth: int) -> dict:
+    """Word tree as plain nested arrays; Gemini response schemas cannot use recursive refs."""
+    properties: dict[str, dict] = {"word": {"type": "string"}}
+    if depth > 1:
+        properties["next"] = _tree_schema(depth - 1)
+    return {"type": "array", "items": {"type": "object", "properties": properties, "required": ["word"]}}
+
+
+_SENTENCES_SCHEMA = {
+    "type": "array",
+    "items": {
+        "type": "object",
+        "properties": {"style": {"type": "string", "enum": ["smart", "funny", "casual"]}, "text": {"type": "string"}},
+        "required": ["style", "text"],
+    },
+}
+SUGGESTION_SCHEMA = {
+    "type": "object",
+    "properties": {"suggestions": _tree_schema(4), "sentences": _SENTENCES_SCHEMA},
+    "required": ["suggestions", "sentences"],
+}
+WORD_TREE_SCHEMA = {
+    "type": "object",
+    "properties": {"suggestions": _tree_schema(4)},
+    "required": ["suggestions"],
+}
+SENTENCES_SCHEMA = {
+    "type": "object",
+    "properties": {"sentences": _SENTENCES_SCHEMA},
+    "required": ["sentences"],
+}
+
+
+class StructuredPayloadParser(BaseOutputParser):
+    """Validate Gemini's schema-constrained JSON straight into the payload model.
+
+    The response is already bare JSON, so there is no fence stripping or
+    partial-JSON repair; Pydantic parses and validates in one pass.
+    """
+
+    pydantic_object: type[BaseModel]
+
+    def parse(self, text: str) -> BaseModel:
+        try:
+            return self.pydantic_object.model_validate_json(text)
+        except ValidationError as exc:
+            raise OutputParserException(f"Invalid structured output: {exc}", llm_output=text) from exc
+
+    @property
+    def _type(self) -> str:
+        return "structured_payload"
 
 
 logger = logging.getLogger(__name__)  # new
 
-# Cache discovered models per API key (avoid listing every request)
-_MODEL_CACHE: dict[str, list[str]] = {}
-_MODEL_CACHE_LOCK = threading.Lock()
+def _list_models(api_key: str) -> list[str]:
+    """Model short names supporting generateContent for this key (a blocking network call)."""
+    genai = _genai()
+    genai.configure(api_key=api_key)
+    names: list[str] = []
+    for m in genai.list_models():
+        methods = getattr(m, "supported_generation_methods", []) or []
+        if "generateContent" in methods:
+            # m.name like 'models/gemini-1.5-flash'; take final segment
+            names.append(m.name.split("/")[-1])
+    return names
+
+
+# Discovered models per API key, shared by every chain builder (see ``discovery``).
+MODEL_DISCOVERY = ModelDiscovery(_list_models)
+
 
 def _discover_models(api_key: str) -> list[str]:
     """Return model short names supporting generateContent for this key."""
-    with _MODEL_CACHE_LOCK:
-        if api_key in _MODEL_CACHE:
-            return _MODEL_CACHE[api_key]
-    try:
-        genai.configure(api_key=api_key)
-        models = genai.list_models()
-        names: list[str] = []
-        for m in models:
-            methods = getattr(m, "supported_generation_methods", []) or []
-            if "generateContent" in methods:
-                # m.name like 'models/gemini-1.5-flash'; take final segment
-                names.append(m.name.split("/")[-1])
-    except Exception:  # pragma: no cover - defensive
-        names = []
-    with _MODEL_CACHE_LOCK:
-        _MODEL_CACHE[api_key] = names
-    logger.info("Gemini models discovered (%d): %s", len(names), ", ".join(names) or "<none>")
-    return names
+    return MODEL_DISCOVERY.get(api_key)
 
 
 # Fallback wrapper to try multiple Gemini model variants
+def _chat_model(step) -> BaseChatModel | None:
+    """The chat model behind a chain step, looking through ``.bind(...)`` wrappers."""
+    from langchain_core.language_models import BaseChatModel
+
+    if isinstance(step, RunnableBinding):
+        step = step.bound
+    return step if isinstance(step, BaseChatModel) else None
+
+
+def _chain_model_name(chain) -> str:
+    for step in getattr(chain, "steps", []):
+        model = _chat_model(step)
+        if model is not None:
+            return str(getattr(model, "model", "?")).split("/")[-1]
+    return getattr(getattr(chain, "bound", None), "kwargs", {}).get("model", "?")
+
+
 class _FallbackSuggestionChain:
-    def __init__(self, chains):
+    def __init__(
+        self,
+        chains,
+        *,
+        hedge: HedgePolicy | None = None,
+        breakers: BreakerBoard | None = None,
+        admission: AdmissionController | None = None,
+    ):
         self._chains = chains
+        self._hedge = hedge
+        self._breakers = breakers
+        # Hedges are extra upstream calls, so they need their own admission.
+        self._admission = admission
+        self._names = [_chain_model_name(chain) for chain in chains]
+        self._latency = {name: LatencyWindow(hedge.window if hedge else 50) for name in self._names}
+        self._hedge_lock = threading.Lock()
+        self.requests = 0
+        self.hedges = 0
+        self.hedges_denied = 0
+        self.wins = {name: 0 for name in self._names}
+
+    @property
+    def chains(self):
+        return list(self._chains)
+
+    def _breaker(self, idx: int) -> CircuitBreaker | None:
+        return self._breakers.get(self._names[idx]) if self._breakers is not None else None
+
+    def _allowed(self, idx: int) -> bool:
+        breaker = self._breaker(idx)
+        return breaker is None or breaker.allow()
 
     def _iterate(self):
+        # Models whose circuit is open are skipped without paying their error latency.
         for idx, c in enumerate(self._chains):
-            yield idx, c
+            if self._allowed(idx):
+                yield idx, c
+
+    def _no_model_error(self, tried: list[str], last_exc: BaseException | None) -> Exception:
+        if not tried:
+            return ServiceUnavailable(
+                "All Gemini candidate models are temporarily unavailable (circuit open): "
+                + ", ".join(self._names)
+            )
+        return RuntimeError(
+            f"No Gemini model succeeded. Tried: {', '.join(tried)}. "
+            "Verify your GOOGLE_API_KEY has access (see AI Studio) or adjust model names."
+        )
+
+    def _record(self, idx: int, exc: BaseException | None) -> None:
+        breaker = self._breaker(idx)
+        if breaker is None:
+            return
+        if exc is None:
+            breaker.record_success()
+        elif isinstance(exc, ResourceExhausted):
+            # Quota errors say nothing about the model's health; the admission
+            # controller handles them, so only hand back a half-open trial slot.
+            breaker.release()
+        else:
+            breaker.record_failure(exc)
+
+    @contextlib.contextmanager
+    def _tracked(self, idx: int):
+        """Record the outcome of one call on its breaker, whatever it raises.
+
+        Any exception counts as a failure (transport and client errors are not
+        always ``GoogleAPIError``). A call that ends without an outcome, e.g.
+        cancelled, gives back its half-open trial slot, so the slot is never
+        left claimed.
+        """
+        settled = False
+        try:
+            yield
+            settled = True
+            self._record(idx, None)
+        except Exception as exc:
+            settled = True
+            self._record(idx, exc)
+            raise
+        finally:
+            if not settled:
+                breaker = self._breaker(idx)
+                if breaker is not None:
+                    breaker.release()
+
+    async def _acall(self, idx: int, chain, inputs):
+        """Invoke one candidate, enforcing the breaker timeout and recording the outcome."""
+        timeout = self._breakers.policy.timeout_seconds if self._breakers is not None else None
+        with self._tracked(idx):
+            if timeout is None:
+                return await chain.ainvoke(inputs)
+            try:
+                return await asyncio.wait_for(chain.ainvoke(inputs), timeout)
+            except asyncio.TimeoutError as exc:
+                raise DeadlineExceeded(f"{self._names[idx]} did not answer within {timeout:g}s") from exc
 
     def invoke(self, inputs):
         last_exc = None
         tried = []
-        for _, chain in self._iterate():
-            tried.append(getattr(getattr(chain, "bound", None), "kwargs", {}).get("model", "?"))
+        for idx, chain in self._iterate():
+            tried.append(self._names[idx])
             try:
-                return chain.invoke(inputs)
+                with self._tracked(idx):
+                    return chain.invoke(inputs)
             except NotFound as exc:
                 last_exc = exc
                 continue
-        raise RuntimeError(
-            f"No Gemini model succeeded. Tried: {', '.join(tried)}. "
-            "Verify your GOOGLE_API_KEY has access (see AI Studio) or adjust model names."
-        ) from last_exc
+        raise self._no_model_error(tried, last_exc) from last_exc
 
     async def ainvoke(self, inputs):
+        if self._hedge is not None:
+            return await self._ainvoke_hedged(inputs)
         last_exc = None
         tried = []
-        for _, chain in self._iterate():
-            tried.append(getattr(getattr(chain, "bound", None), "kwargs", {}).get("model", "?"))
+        for idx, chain in self._iterate():
+            tried.append(self._names[idx])
             try:
-                return await chain.ainvoke(inputs)
+                return await self._acall(idx, chain, inputs)
             except NotFound as exc:
                 last_exc = exc
                 continue
-        raise RuntimeError(
-            f"No Gemini model succeeded. Tried: {', '.join(tried)}. "
-            "Verify your GOOGLE_API_KEY has access (see AI Studio) or adjust model names."
-        ) from last_exc
+        raise self._no_model_error(tried, last_exc) from last_exc
 
+    def _hedge_budget_left(self) -> bool:
+        with self._hedge_lock:
+            return self.hedges + 1 <= self._hedge.max_hedge_ratio * self.requests
 
-def build_suggestion_chain(
-    *,
-    google_api_key: str,
-    model_name: str | None = None,
-    temperature: float = 0.3,
-):
-    """Create a fresh runnable chain (prompt -> Gemini -> parser) with dynamic model fallback."""
+    def _admit_hedge(self, idx: int, inputs) -> bool:
+        """Take a rate limiter slot for a hedge, giving back the breaker trial if denied."""
+        if self._admission is None or self._admission.try_acquire(estimate_tokens(inputs)):
+            return True
+        breaker = self._breaker(idx)
+        if breaker is not None:
+            breaker.release()
+        with self._hedge_lock:
+            self.hedges_denied += 1
+        return False
+
+    async def _ainvoke_hedged(self, inputs):
+        """Fire the next candidate if the current one is slower than its hedge delay.
+
+        The first valid parse wins and every other in-flight attempt is cancelled.
+        ``NotFound`` moves on to the next candidate immediately, as in the
+        sequential path; other errors only surface once no attempt is left.
+        A hedge is an extra upstream call, so it also needs an admission slot.
+        """
+        with self._hedge_lock:
+            self.requests += 1
+        total = len(self._chains)
+        pending: dict[asyncio.Task, tuple[str, float]] = {}
+        next_index = 0
+        last_exc: BaseException | None = None
+        tried: list[str] = []
+
+        def launch(hedge: bool = False) -> bool:
+            nonlocal next_index
+            while next_index < total:
+                idx = next_index
+                if not self._allowed(idx):
+                    next_index += 1
+                    continue
+                if hedge and not self._admit_hedge(idx, inputs):
+                    return False
+                next_index += 1
+                if hedge:
+                    with self._hedge_lock:
+                        self.hedges += 1
+                name = self._names[idx]
+                tried.append(name)
+                task = asyncio.ensure_future(self._acall(idx, self._chains[idx], inputs))
+                pending[task] = (name, time.monotonic())
+                return True
+            return False
+
+        try:
+            while pending or next_index < total:
+                if not pending:
+                    if not launch():
+                        break
+                    continue
+                timeout = None
+                if next_index < total:
+                    newest_name, newest_start = max(pending.values(), key=lambda item: item[1])
+                    delay = hedge_delay(self._hedge, self._latency[newest_name])
+                    timeout = max(0.0, newest_start + delay - time.monotonic())
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    if not (self._hedge_budget_left() and launch(hedge=True)):
+                        done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    else:
+                        logger.info("Hedged to %s after %.2fs", tried[-1], timeout or 0.0)
+                for task in done:
+                    name, started = pending.pop(task)
+                    try:
+                        result = task.result()
+                    except NotFound as exc:
+                        last_exc = exc
+                        continue
+                    except (OutputParserException, GoogleAPIError) as exc:
+                        if pending or next_index < total:
+                            last_exc = exc
+                            continue
+                        raise
+                    self._latency[name].add(time.monotonic() - started)
+                    with self._hedge_lock:
+                        self.wins[name] += 1
+                    return result
+        finally:
+            for task in pending:
+                task.cancel()
+        if last_exc is not None and not isinstance(last_exc, NotFound):
+            raise last_exc
+        raise self._no_model_error(tried, last_exc) from last_exc
+
+    def stats(self) -> dict[str, object]:
+        """Hedge rate, wins and observed p90 latency per candidate model."""
+        with self._hedge_lock:
+            requests, hedges, denied, wins = self.requests, self.hedges, self.hedges_denied, dict(self.wins)
+        return {
+            "models": list(self._names),
+            "hedging": self._hedge is not None,
+            "requests": requests,
+            "hedges": hedges,
+            "hedge_rate": hedges / requests if requests else 0.0,
+            "hedges_denied": denied,
+            "wins": wins,
+            "p90_ms": {
+                name: round(p90 * 1000, 1)
+                for name, window in self._latency.items()
+                if (p90 := window.percentile(0.9)) is not None
+            },
+        }
+
+    async def astream_text(self, inputs) -> AsyncIterator[str]:
+        last_exc = None
+        tried = []
+        for idx, chain in self._iterate():
+            tried.append(self._names[idx])
+            started = False
+            try:
+                with self._tracked(idx):
+                    async for text in _astream_chain_text(chain, inputs):
+                        started = True
+                        yield text
+            except NotFound as exc:
+                if started:
+                    raise
+                last_exc = exc
+                continue
+            return
+        raise self._no_model_error(tried, last_exc) from last_exc
+
+    async def probe_open_models(self, *, timeout: float = 10.0) -> None:
+        """Send a tiny request to each open model whose cool-down elapsed, closing it on success."""
+        for idx, chain in enumerate(self._chains):
+            breaker = self._breaker(idx)
+            if breaker is None or not breaker.probe_due():
+                continue
+            client = next((m for m in map(_chat_model, getattr(chain, "steps", [])) if m is not None), chain)
+            try:
+                await asyncio.wait_for(client.ainvoke("ping"), timeout)
+            except Exception as exc:  # noqa: BLE001 - any failure keeps the circuit open
+                breaker.record_failure(exc)
+                logger.info("Probe for %s failed: %s", self._names[idx], exc)
+            else:
+                breaker.record_success()
+                logger.info("Probe for %s succeeded; circuit closed", self._names[idx])
+
+
+def _message_text(chunk) -> str:
+    content = getattr(chunk, "content", chunk)
+    if isinstance(content, str):
+        return content
+    parts: list[str] = []
+    for part in content or []:
+        if isinstance(part, str):
+            parts.append(part)
+        elif isinstance(part, dict) and part.get("type") == "text":
+            parts.append(part.get("text", ""))
+    return "".join(parts)
+
+
+async def _astream_chain_text(chain, inputs) -> AsyncIterator[str]:
+    steps = list(chain.steps)
+    if isinstance(steps[-1], BaseOutputParser):
+        steps = steps[:-1]
+    runnable = RunnableSequence(*steps) if len(steps) > 1 else steps[0]
+    async for chunk in runnable.astream(inputs):
+        text = _message_text(chunk)
+        if text:
+            yield text
+
+
+async def astream_suggestion_text(chain, inputs) -> AsyncIterator[str]:
+    """Stream the raw model text of a suggestion chain, skipping its output parser."""
+    if hasattr(chain, "astream_text"):
+        async for text in chain.astream_text(inputs):
+            yield text
+        return
+    async for text in _astream_chain_text(chain, inputs):
+        yield text
+
+
+def chain_clients(chain) -> list[BaseChatModel]:
+    """Return the chat model clients backing a chain built by ``build_suggestion_chain``."""
+    chains = chain.chains if isinstance(chain, _FallbackSuggestionChain) else [chain]
+    clients: list[BaseChatModel] = []
+    for c in chains:
+        clients.extend(m for m in map(_chat_model, getattr(c, "steps", [])) if m is not None)
+    return clients
+
+
+_WARMUP_INPUTS = {"conversation": "", "question": "How are you?", "partial_answer": "", "suggestions_count": 3}
+_WARMUP_REPLY = '{"suggestions": [{"word": "good", "next": []}], "sentences": [{"style": "casual", "text": "Good."}]}'
+
+
+def warm_chain(chain) -> int:
+    """Render each prompt and run each parser once, offline, so the first request skips that setup.
+
+    Returns how many chains were warmed; failures are logged and never raised.
+    """
+    chains = chain.chains if isinstance(chain, _FallbackSuggestionChain) else [chain]
+    warmed = 0
+    for c in chains:
+        steps = getattr(c, "steps", [])
+        if len(steps) < 2:
+            continue
+        try:
+            steps[0].invoke(_WARMUP_INPUTS)
+            steps[-1].parse(_WARMUP_REPLY)
+        except Exception:  # noqa: BLE001 - warm-up is best effort
+            logger.debug("Warm-up of %s failed", _chain_model_name(c), exc_info=True)
+            continue
+        warmed += 1
+    return warmed
+
+
+async def ping_clients(clients: list[BaseChatModel], *, timeout: float = 10.0) -> int:
+    """Send one tiny request per chat client to open its connection; returns how many answered."""
+    answered = 0
+    for client in clients:
+        try:
+            await asyncio.wait_for(client.ainvoke("ping"), timeout)
+        except Exception as exc:  # noqa: BLE001 - the breaker and fallbacks handle real traffic
+            logger.info("Warm-up ping for %s failed: %s", getattr(client, "model", "?"), exc)
+        else:
+            answered += 1
+    return answered
+
+
+def _candidate_models(google_api_key: str, model_name: str | None) -> list[str]:
     if model_name:
         available = _discover_models(google_api_key)
         if model_name not in available:
@@ -206,12 +668,114 @@ def build_suggestion_chain(
                 "Enable models in Google AI Studio."
             )
     logger.info("Gemini candidate models to try (in order): %s", ", ".join(candidates))
-    chains = []
-    for m in candidates:
-        model = ChatGoogleGenerativeAI(
+    return candidates
+
+
+def _build_models(
+    google_api_key: str,
+    model_name: str | None,
+    temperature: float,
+) -> list[ChatGoogleGenerativeAI]:
+    ChatGoogleGenerativeAI = _chat_model_class()
+    return [
+        ChatGoogleGenerativeAI(
             model=m,
             temperature=temperature,
             google_api_key=google_api_key,
         )
-        chains.append(PROMPT_TEMPLATE | model | SUGGESTION_PARSER)
-    return chains[0] if len(chains) == 1 else _FallbackSuggestionChain(chains)
+        for m in _candidate_models(google_api_key, model_name)
+    ]
+
+
+def _compose(
+    models,
+    prompt,
+    parser,
+    hedge: HedgePolicy | None = None,
+    breakers: BreakerBoard | None = None,
+    schema: dict | None = None,
+    admission: AdmissionController | None = None,
+):
+    if schema is not None:
+        models = [model.bind(response_mime_type="application/json", response_json_schema=schema) for model in models]
+    chains = [prompt | model | parser for model in models]
+    if len(chains) == 1:
+        # A lone model has nothing to fall back to, so a breaker would only turn
+        # a few slow or unparsable answers into a hard outage.
+        return chains[0]
+    return _FallbackSuggestionChain(chains, hedge=hedge, breakers=breakers, admission=admission)
+
+
+def build_suggestion_chain(
+    *,
+    google_api_key: str,
+    model_name: str | None = None,
+    temperature: float = 0.3,
+    hedge: HedgePolicy | None = None,
+    breakers: BreakerBoard | None = None,
+    structured: bool = False,
+    admission: AdmissionController | None = None,
+):
+    """Create a fresh runnable chain (prompt -> Gemini -> parser) with dynamic model fallback.
+
+    With ``structured`` the schema goes to Gemini as a native response schema
+    instead of format instructions in the prompt.
+    """
+    models = _build_models(google_api_key, model_name, temperature)
+    if structured:
+        return _compose(
+            models,
+            STRUCTURED_PROMPT_TEMPLATE,
+            StructuredPayloadParser(pydantic_object=SuggestionPayload),
+            hedge,
+            breakers,
+            schema=SUGGESTION_SCHEMA,
+            admission=admission,
+        )
+    return _compose(models, PROMPT_TEMPLATE, SUGGESTION_PARSER, hedge, breakers, admission=admission)
+
+
+class SplitChains(NamedTuple):
+    """Separate word-tree and sentence chains sharing the same Gemini clients."""
+
+    words: object
+    sentences: object
+
+
+def build_split_chains(
+    *,
+    google_api_key: str,
+    model_name: str | None = None,
+    temperature: float = 0.3,
+    hedge: HedgePolicy | None = None,
+    breakers: BreakerBoard | None = None,
+    structured: bool = False,
+    admission: AdmissionController | None = None,
+) -> SplitChains:
+    """Create the two smaller chains used when words and sentences are generated concurrently."""
+    models = _build_models(google_api_key, model_name, temperature)
+    if structured:
+        return SplitChains(
+            words=_compose(
+                models,
+                STRUCTURED_WORDS_PROMPT_TEMPLATE,
+                StructuredPayloadParser(pydantic_object=WordTreePayload),
+                hedge,
+                breakers,
+                schema=WORD_TREE_SCHEMA,
+                admission=admission,
+            ),
+            sentences=_compose(
+                models,
+                STRUCTURED_SENTENCES_PROMPT_TEMPLATE,
+                StructuredPayloadParser(pydantic_object=SentencesPayload),
+                hedge,
+                breakers,
+                schema=SENTENCES_SCHEMA,
+                admission=admission,
+            ),
+        )
+    return SplitChains(
+        words=_compose(models, WORDS_PROMPT_TEMPLATE, WORD_TREE_PARSER, hedge, breakers, admission=admission),
+        sentences=_compose(models, SENTENCES_PROMPT_TEMPLATE, SENTENCES_PARSER, hedge, breakers, admission=admission),
+    )
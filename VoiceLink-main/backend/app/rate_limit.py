@@ -0,0 +1,161 @@
+"""Client-side admission control matched to the Gemini RPM/TPM quota."""
+
+from __future__ import annotations
+
+import asyncio
+import re
+import time
+
+from google.api_core.exceptions import ResourceExhausted
+
+_RETRY_IN_PATTERN = re.compile(r"retry in ([0-9]+(?:\.[0-9]+)?)s")
+_RETRY_DELAY_PATTERN = re.compile(r"retry_delay\s*\{\s*seconds:\s*([0-9]+)")
+
+
+class RateLimitExceeded(ResourceExhausted):
+    """Raised locally when a request is shed before reaching Gemini.
+
+    Subclasses ``ResourceExhausted`` so callers that already handle upstream
+    quota errors (stale cache fallback, HTTP 429 mapping) treat both alike.
+    """
+
+    def __init__(self, message: str, *, retry_after: float) -> None:
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def retry_delay_from_error(exc: BaseException) -> float | None:
+    """Extract the retry delay Gemini reports in a quota error, if any."""
+    text = str(exc).lower()
+    match = _RETRY_IN_PATTERN.search(text) or _RETRY_DELAY_PATTERN.search(text)
+    return float(match.group(1)) if match else None
+
+
+def estimate_tokens(inputs: dict[str, object], *, overhead: int = 900) -> int:
+    """Rough token estimate (~4 characters per token) plus prompt/output overhead."""
+    return overhead + sum(len(str(value)) for value in inputs.values()) // 4
+
+
+class TokenBucket:
+    """Classic token bucket refilled continuously at ``capacity`` per minute."""
+
+    def __init__(self, per_minute: float) -> None:
+        self.capacity = float(per_minute)
+        self._rate = per_minute / 60.0
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self._rate)
+        self._updated = now
+
+    def wait_for(self, amount: float) -> float:
+        """Seconds until ``amount`` tokens are available (0 when available now)."""
+        self._refill()
+        amount = min(amount, self.capacity)
+        if self._tokens >= amount:
+            return 0.0
+        return (amount - self._tokens) / self._rate
+
+    def take(self, amount: float) -> None:
+        self._refill()
+        self._tokens -= min(amount, self.capacity)
+
+
+class AdmissionController:
+    """Shared RPM/TPM limiter with a bounded FIFO wait queue and a global cooldown.
+
+    Requests wait in arrival order until both buckets have capacity. When the
+    queue already holds ``max_queue`` waiters, or the expected wait exceeds
+    ``max_wait_seconds``, the request is shed immediately with
+    :class:`RateLimitExceeded`. :meth:`cooldown` (fed from upstream retry
+    delays) pauses admission for everyone, queued or retrying.
+    """
+
+    def __init__(
+        self,
+        *,
+        rpm: int,
+        tpm: int | None = None,
+        max_queue: int = 32,
+        max_wait_seconds: float = 10.0,
+    ) -> None:
+        self._requests = TokenBucket(rpm)
+        self._tokens = TokenBucket(tpm) if tpm else None
+        self._max_queue = max_queue
+        self._max_wait = max_wait_seconds
+        self._cooldown_until = 0.0
+        self._lock: asyncio.Lock | None = None
+        self._waiting = 0
+        self.admitted = 0
+        self.shed = 0
+        self.deferred = 0
+        self.cooldowns = 0
+
+    def _wait_needed(self, tokens: int) -> float:
+        wait = max(0.0, self._cooldown_until - time.monotonic(), self._requests.wait_for(1))
+        if self._tokens is not None:
+            wait = max(wait, self._tokens.wait_for(tokens))
+        return wait
+
+    async def acquire(self, tokens: int = 0) -> None:
+        if self._waiting >= self._max_queue:
+            self.shed += 1
+            raise RateLimitExceeded("Admission queue is full.", retry_after=max(1.0, self._wait_needed(tokens)))
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        self._waiting += 1
+        deadline = time.monotonic() + self._max_wait
+        try:
+            async with self._lock:
+                while True:
+                    wait = self._wait_needed(tokens)
+                    if wait <= 0:
+                        self._requests.take(1)
+                        if self._tokens is not None:
+                            self._tokens.take(tokens)
+                        self.admitted += 1
+                        return
+                    if time.monotonic() + wait > deadline:
+                        self.shed += 1
+                        raise RateLimitExceeded("Local rate limit reached.", retry_after=wait)
+                    await asyncio.sleep(wait)
+        finally:
+            self._waiting -= 1
+
+    def has_capacity(self, tokens: int = 0) -> bool:
+        """Whether :meth:`try_acquire` would admit right now; takes nothing."""
+        return not self._waiting and self._wait_needed(tokens) <= 0
+
+    def defer(self) -> None:
+        """Count low-priority work turned away without calling :meth:`try_acquire`."""
+        self.deferred += 1
+
+    def try_acquire(self, tokens: int = 0) -> bool:
+        """Admit only if capacity is free right now and nobody is queued (low-priority work)."""
+        if not self.has_capacity(tokens):
+            self.defer()
+            return False
+        self._requests.take(1)
+        if self._tokens is not None:
+            self._tokens.take(tokens)
+        self.admitted += 1
+        return True
+
+    def cooldown(self, seconds: float) -> None:
+        """Pause admission for ``seconds`` (never shortens an existing cooldown)."""
+        until = time.monotonic() + seconds
+        if until > self._cooldown_until:
+            self._cooldown_until = until
+            self.cooldowns += 1
+
+    def stats(self) -> dict[str, float]:
+        return {
+            "admitted": self.admitted,
+            "shed": self.shed,
+            "deferred_low_priority": self.deferred,
+            "queued": self._waiting,
+            "cooldowns": self.cooldowns,
+            "cooldown_remaining_seconds": round(max(0.0, self._cooldown_until - time.monotonic()), 2),
+        }
@@ -0,0 +1,218 @@
+"""Process-wide registry of warm autocomplete services."""
+
+from __future__ import annotations
+
+import logging
+import threading
+from typing import Callable
+
+from .breaker import BreakerBoard, BreakerPolicy
+from .config import Settings
+from .context import ConversationWindow
+from .hedging import HedgePolicy
+from .ngram import NGramModel
+from .personal import PersonalVocabulary
+from .prefetch import Prefetcher
+from .prompts import build_split_chains, build_suggestion_chain, chain_clients
+from .rate_limit import AdmissionController
+from .response_cache import ResponseCache
+from .service import AutocompleteService
+from .singleflight import SingleFlight
+from .tree_cache import SuggestionTreeCache
+
+logger = logging.getLogger(__name__)
+
+RegistryKey = tuple[str, str, float]
+
+
+class ServiceRegistry:
+    """Build each Gemini chain once and hand out the shared service on every request.
+
+    Services are keyed by ``(api key, model, temperature)``. The underlying
+    ``ChatGoogleGenerativeAI`` clients keep their transport open, so reusing the
+    chain reuses the warm connections instead of opening new ones per request.
+    """
+
+    def __init__(
+        self,
+        *,
+        chain_factory: Callable[..., object] = build_suggestion_chain,
+        split_factory: Callable[..., object] = build_split_chains,
+    ) -> None:
+        self._chain_factory = chain_factory
+        self._split_factory = split_factory
+        self._services: dict[RegistryKey, AutocompleteService] = {}
+        self._breakers: dict[RegistryKey, BreakerBoard] = {}
+        self._local_model: NGramModel | None = None
+        self._local_model_path: str | None = None
+        self._vocabulary: PersonalVocabulary | None = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key_for(settings: Settings) -> RegistryKey:
+        return (
+            settings.google_api_key,
+            settings.gemini_model or "",
+            float(getattr(settings, "gemini_temperature", 0.3)),
+        )
+
+    def get(self, settings: Settings) -> AutocompleteService:
+        """Return the shared service for ``settings``, building it on first use."""
+        key = self.key_for(settings)
+        service = self._services.get(key)
+        if service is not None:
+            return service
+        with self._lock:
+            service = self._services.get(key)
+            if service is None:
+                api_key, model_name, temperature = key
+                chain_kwargs = {
+                    "google_api_key": api_key,
+                    "model_name": model_name or None,
+                    "temperature": temperature,
+                }
+                if getattr(settings, "structured_output", False):
+                    chain_kwargs["structured"] = True
+                hedge = self._hedge_policy(settings)
+                if hedge is not None:
+                    chain_kwargs["hedge"] = hedge
+                if getattr(settings, "breaker_enabled", False):
+                    board = BreakerBoard(
+                        BreakerPolicy(
+                            failure_threshold=settings.breaker_failure_threshold,
+                            reset_seconds=settings.breaker_reset_seconds,
+                            timeout_seconds=settings.breaker_timeout_seconds,
+                        )
+                    )
+                    chain_kwargs["breakers"] = self._breakers[key] = board
+                options = self._service_options(settings)
+                if hedge is not None and "admission" in options:
+                    chain_kwargs["admission"] = options["admission"]
+                if getattr(settings, "split_generation", False):
+                    options["split_chains"] = self._split_factory(**chain_kwargs)
+                    options["split_retries"] = settings.split_retries
+                else:
+                    options["chain"] = self._chain_factory(**chain_kwargs)
+                service = AutocompleteService(settings=settings, **options)
+                self._services[key] = service
+        return service
+
+    @staticmethod
+    def _hedge_policy(settings: Settings) -> HedgePolicy | None:
+        if not getattr(settings, "hedge_enabled", False):
+            return None
+        delay_ms = settings.hedge_delay_ms
+        return HedgePolicy(
+            delay_seconds=delay_ms / 1000 if delay_ms is not None else None,
+            max_hedge_ratio=settings.hedge_max_ratio,
+        )
+
+    def _service_options(self, settings: Settings) -> dict[str, object]:
+        """Translate settings into the optional layers wired around the chain."""
+        options: dict[str, object] = {}
+        if getattr(settings, "local_model_enabled", False):
+            if self._local_model is None:
+                # One model for every service, so every opted-in reply trains the same counts.
+                self._local_model_path = settings.local_model_path
+                self._local_model = NGramModel.load(settings.local_model_path, order=settings.local_model_order)
+            options["local_model"] = self._local_model
+            options["local_mode"] = settings.local_model_mode
+            options["local_merge_slots"] = settings.local_model_merge_slots
+            options["local_fallback"] = settings.local_model_fallback
+            options["local_learn"] = settings.local_model_learn
+        if getattr(settings, "personal_vocab_enabled", False):
+            if self._vocabulary is None:
+                self._vocabulary = PersonalVocabulary(
+                    directory=settings.personal_vocab_dir,
+                    max_users=settings.personal_vocab_users,
+                    inject=settings.personal_vocab_inject,
+                    min_count=settings.personal_vocab_min_count,
+                )
+            options["vocabulary"] = self._vocabulary
+        if getattr(settings, "context_window_enabled", False):
+            options["context_window"] = ConversationWindow(
+                keep_turns=settings.context_keep_turns,
+                token_budget=settings.context_token_budget,
+                summary_token_budget=settings.context_summary_token_budget,
+            )
+        if getattr(settings, "tree_cache_enabled", False):
+            options["tree_cache"] = SuggestionTreeCache(
+                max_sessions=settings.tree_cache_sessions,
+                ttl_seconds=settings.tree_cache_ttl_seconds,
+            )
+        if getattr(settings, "rate_limit_enabled", False) and getattr(settings, "rate_limit_rpm", None):
+            # Quotas differ per project and tier, so never guess one.
+            options["admission"] = AdmissionController(
+                rpm=settings.rate_limit_rpm,
+                tpm=settings.rate_limit_tpm,
+                max_queue=settings.rate_limit_queue_size,
+                max_wait_seconds=settings.rate_limit_max_wait_seconds,
+            )
+        if getattr(settings, "singleflight_enabled", False):
+            options["singleflight"] = SingleFlight()
+        if getattr(settings, "response_cache_enabled", False):
+            options["response_cache"] = ResponseCache(
+                max_entries=settings.response_cache_size,
+                ttl_seconds=settings.response_cache_ttl_seconds,
+                stale_seconds=settings.response_cache_stale_seconds,
+                serve_stale_on_rate_limit=settings.response_cache_serve_stale_on_rate_limit,
+            )
+        if getattr(settings, "prefetch_enabled", False):
+            options["prefetcher"] = Prefetcher(
+                top_k=settings.prefetch_top_k,
+                session_budget=settings.prefetch_session_budget,
+            )
+        return options
+
+    def stats(self) -> dict[str, int]:
+        """Report how many services, chains and chat clients are currently live."""
+        with self._lock:
+            services = list(self._services.values())
+        chains = 0
+        clients: set[int] = set()
+        for service in services:
+            for chain in service.chains:
+                chain_list = getattr(chain, "chains", None)
+                chains += len(chain_list) if chain_list is not None else 1
+                # Split chains share their clients, so count distinct instances.
+                clients.update(id(client) for client in chain_clients(chain))
+        return {"services": len(services), "chains": chains, "clients": len(clients)}
+
+    def service_stats(self) -> dict[str, dict]:
+        """Per-service counters keyed by ``model@temperature`` (API keys are never exposed)."""
+        with self._lock:
+            items = list(self._services.items())
+        return {f"{model or 'auto'}@{temperature}": service.stats() for (_, model, temperature), service in items}
+
+    def breaker_states(self) -> dict[str, dict]:
+        """Circuit state of every candidate model, per service."""
+        with self._lock:
+            boards = list(self._breakers.items())
+        return {f"{model or 'auto'}@{temperature}": board.snapshot() for (_, model, temperature), board in boards}
+
+    async def probe_breakers(self) -> None:
+        """Probe open models of every live service so recovered models rejoin the rotation."""
+        with self._lock:
+            services = list(self._services.values())
+        for service in services:
+            for chain in service.chains:
+                probe = getattr(chain, "probe_open_models", None)
+                if probe is not None:
+                    await probe()
+
+    def save_local_model(self) -> None:
+        """Persist the shared n-gram model, if one is loaded and a path is configured."""
+        if self._local_model is not None and self._local_model_path:
+            try:
+                self._local_model.save(self._local_model_path)
+            except OSError:
+                logger.warning("Could not save the local n-gram model", exc_info=True)
+
+    def clear(self) -> None:
+        """Drop every cached service so their clients can be released."""
+        self.save_local_model()
+        if self._vocabulary is not None:
+            self._vocabulary.flush()
+        with self._lock:
+            self._services.clear()
+            self._breakers.clear()
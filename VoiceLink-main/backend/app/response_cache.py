@@ -0,0 +1,172 @@
+"""Bounded LRU + TTL cache for sanitized suggestion responses."""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Literal
+
+from .prompts import SentenceSuggestion, SuggestionBranch
+from .text import fingerprint, normalize_text
+
+CacheKey = tuple[str, str, str, int, str]
+CacheState = Literal["fresh", "stale"]
+
+_NODE_OVERHEAD_BYTES = 64
+
+
+def make_cache_key(
+    *,
+    question: str,
+    partial_answer: str,
+    conversation: str,
+    suggestions_count: int,
+    model: str,
+) -> CacheKey:
+    conversation_hash = fingerprint(normalize_text(conversation))
+    return (
+        normalize_text(question),
+        normalize_text(partial_answer),
+        conversation_hash,
+        suggestions_count,
+        model,
+    )
+
+
+def _estimate_branch_bytes(branches: list[SuggestionBranch]) -> int:
+    total = 0
+    stack = list(branches)
+    while stack:
+        node = stack.pop()
+        total += _NODE_OVERHEAD_BYTES + len(node.word)
+        stack.extend(node.next)
+    return total
+
+
+def _estimate_bytes(value: dict[str, list]) -> int:
+    sentences: list[SentenceSuggestion] = value.get("sentences", [])
+    return _estimate_branch_bytes(value.get("suggestions", [])) + sum(
+        _NODE_OVERHEAD_BYTES + len(s.style) + len(s.text) for s in sentences
+    )
+
+
+@dataclass
+class _CacheEntry:
+    value: dict[str, list]
+    stored_at: float
+    size: int
+
+
+class ResponseCache:
+    """In-memory response cache with stale-while-revalidate semantics.
+
+    Entries younger than ``ttl_seconds`` are fresh. Entries up to
+    ``ttl_seconds + stale_seconds`` old are served as stale while the caller
+    revalidates in the background. Older entries are only kept around (until
+    evicted by LRU) as a fallback while upstream is rate limited, if
+    ``serve_stale_on_rate_limit`` is enabled.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_entries: int = 512,
+        ttl_seconds: float = 120.0,
+        stale_seconds: float = 600.0,
+        serve_stale_on_rate_limit: bool = True,
+    ) -> None:
+        self._max_entries = max_entries
+        self._ttl = ttl_seconds
+        self._stale = stale_seconds
+        self._serve_stale_on_rate_limit = serve_stale_on_rate_limit
+        self._entries: OrderedDict[CacheKey, _CacheEntry] = OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.rate_limit_fallbacks = 0
+
+    def get(self, key: CacheKey) -> tuple[dict[str, list] | None, CacheState | None]:
+        """Return ``(value, state)``; ``(None, None)`` on a miss."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None, None
+            age = now - entry.stored_at
+            if age <= self._ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return _copy(entry.value), "fresh"
+            if age <= self._ttl + self._stale:
+                self._entries.move_to_end(key)
+                self.stale_hits += 1
+                return _copy(entry.value), "stale"
+            if not self._serve_stale_on_rate_limit:
+                self._drop(key)
+                self.expirations += 1
+            self.misses += 1
+            return None, None
+
+    def peek(self, key: CacheKey) -> CacheState | None:
+        """State of ``key`` without counting a lookup or touching the LRU order."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            age = time.monotonic() - entry.stored_at
+            if age <= self._ttl:
+                return "fresh"
+            return "stale" if age <= self._ttl + self._stale else None
+
+    def get_rate_limit_fallback(self, key: CacheKey) -> dict[str, list] | None:
+        """Return any remembered value, however old, while upstream is exhausted."""
+        if not self._serve_stale_on_rate_limit:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self.rate_limit_fallbacks += 1
+            return _copy(entry.value)
+
+    def put(self, key: CacheKey, value: dict[str, list]) -> None:
+        size = _estimate_bytes(value)
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = _CacheEntry(value=_copy(value), stored_at=time.monotonic(), size=size)
+            self._bytes += size
+            while len(self._entries) > self._max_entries:
+                oldest = next(iter(self._entries))
+                self._drop(oldest)
+                self.evictions += 1
+
+    def _drop(self, key: CacheKey) -> None:
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+
+    def stats(self) -> dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.stale_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "hit_ratio": (self.hits + self.stale_hits) / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "rate_limit_fallbacks": self.rate_limit_fallbacks,
+                "approx_bytes": self._bytes,
+            }
+
+
+def _copy(value: dict[str, list]) -> dict[str, list]:
+    return {"suggestions": list(value["suggestions"]), "sentences": list(value["sentences"])}
@@ -1,6 +1,6 @@
 """API request/response models."""
 
-from typing import Annotated
+from typing import Annotated, Literal
 
 from pydantic import BaseModel, Field
 
@@ -17,6 +17,18 @@ class SuggestionRequest(BaseModel):
         Field(default="", description="Entire conversation context formatted as `role: text` lines."),
     ]
     suggestions_count: Annotated[int, Field(ge=1, le=10, default=None)]
+    session_id: Annotated[
+        str | None,
+        Field(default=None, max_length=128, description="Opaque client session used to reuse the last suggestion tree."),
+    ]
+    instant: Annotated[
+        bool,
+        Field(default=False, description="Answer from the local n-gram model now; Gemini fills the cache in the background."),
+    ]
+    user_id: Annotated[
+        str | None,
+        Field(default=None, max_length=128, description="Re-rank suggestions with this user's own vocabulary."),
+    ]
 
 
 class SuggestionResponse(BaseModel):
@@ -24,3 +36,78 @@ class SuggestionResponse(BaseModel):
 
     suggestions: list[SuggestionBranch]
     sentences: list[SentenceSuggestion]
+
+
+class ConversationTurn(BaseModel):
+    """One transcript line appended to a server-side session."""
+
+    role: Literal["guest", "user"]
+    text: Annotated[str, Field(min_length=1, max_length=4000)]
+
+
+class SessionCreateRequest(BaseModel):
+    """Optional opening turns for a new session."""
+
+    turns: Annotated[list[ConversationTurn], Field(default_factory=list, max_length=200)]
+    user_id: Annotated[
+        str | None,
+        Field(default=None, max_length=128, description="User whose sent turns train their personal vocabulary."),
+    ]
+
+
+class SessionTurnsRequest(BaseModel):
+    """New turns since the last update; only the delta is sent."""
+
+    turns: Annotated[list[ConversationTurn], Field(min_length=1, max_length=200)]
+
+
+class SessionInfo(BaseModel):
+    """Identifier and current size of a server-side session."""
+
+    session_id: str
+    turns: int
+
+
+class SessionSuggestionRequest(BaseModel):
+    """Suggestion request that reuses the transcript stored for a session."""
+
+    question: Annotated[
+        str | None,
+        Field(default=None, min_length=1, description="Defaults to the session's latest guest turn."),
+    ]
+    partial_answer: Annotated[str, Field(default="")]
+    suggestions_count: Annotated[int, Field(ge=1, le=10, default=None)]
+    instant: Annotated[bool, Field(default=False)]
+
+
+class ReplyRequest(BaseModel):
+    """A reply the user actually sent, used to learn their vocabulary."""
+
+    text: Annotated[str, Field(min_length=1, max_length=4000)]
+
+
+class SuggestionBatchRequest(BaseModel):
+    """Several suggestion requests answered in one round trip."""
+
+    items: Annotated[list[SuggestionRequest], Field(min_length=1, max_length=50)]
+    max_concurrency: Annotated[
+        int | None,
+        Field(default=None, ge=1, le=32, description="Defaults to BATCH_MAX_CONCURRENCY."),
+    ]
+
+
+class BatchItemError(BaseModel):
+    status: int
+    detail: str
+
+
+class SuggestionBatchItem(BaseModel):
+    """Either the suggestions for one item or the error it failed with."""
+
+    index: int
+    result: SuggestionResponse | None = None
+    error: BatchItemError | None = None
+
+
+class SuggestionBatchResponse(BaseModel):
+    results: list[SuggestionBatchItem]
@@ -2,12 +2,40 @@
 
 from __future__ import annotations
 
-from typing import Iterable
+import asyncio
+import logging
+import sys
+from typing import AsyncIterator, Iterable
 
+from google.api_core.exceptions import GoogleAPIError, ResourceExhausted
 from langchain_core.exceptions import OutputParserException
+from pydantic import TypeAdapter, ValidationError
 
 from .config import Settings, get_settings
-from .prompts import SentenceSuggestion, SuggestionBranch, build_suggestion_chain
+from .context import ConversationWindow
+from .ngram import NGramModel
+from .personal import PersonalVocabulary
+from .prefetch import LOW_PRIORITY, Prefetcher
+from .prompts import (
+    SUGGESTION_PARSER,
+    WORD_TREE_PARSER,
+    SentenceSuggestion,
+    SplitChains,
+    SuggestionBranch,
+    SuggestionPayload,
+    astream_suggestion_text,
+    build_suggestion_chain,
+)
+from .rate_limit import AdmissionController, RateLimitExceeded, estimate_tokens, retry_delay_from_error
+from .response_cache import CacheKey, ResponseCache, make_cache_key
+from .sessions import ConversationSession
+from .singleflight import SingleFlight
+from .streaming import ParsedPiece, SuggestionStreamParser
+from .tree_cache import SuggestionTreeCache
+
+logger = logging.getLogger(__name__)
+
+_TREE_ADAPTER = TypeAdapter(list[SuggestionBranch])
 
 
 class SuggestionError(RuntimeError):
@@ -22,17 +50,76 @@ class AutocompleteService:
         settings: Settings | None = None,
         *,
         chain=None,
+        tree_cache: SuggestionTreeCache | None = None,
+        response_cache: ResponseCache | None = None,
+        split_chains: SplitChains | None = None,
+        split_retries: int = 1,
+        admission: AdmissionController | None = None,
+        default_cooldown_seconds: float = 1.0,
+        singleflight: SingleFlight | None = None,
+        prefetcher: Prefetcher | None = None,
+        context_window: ConversationWindow | None = None,
+        local_model: NGramModel | None = None,
+        local_mode: str = "fallback",
+        local_merge_slots: int = 1,
+        local_fallback: bool = False,
+        local_learn: bool = False,
+        vocabulary: PersonalVocabulary | None = None,
     ) -> None:
         self.settings = settings or get_settings()
+        self._split = split_chains
+        self._admission = admission
+        self._singleflight = singleflight
+        self._prefetcher = prefetcher
+        self._context_window = context_window
+        self._local_model = local_model
+        self._local_mode = local_mode
+        self._local_merge_slots = local_merge_slots
+        self._local_fallback = local_fallback
+        self._local_learn = local_learn
+        self._vocabulary = vocabulary
+        self._max_children = getattr(self.settings, "suggestion_max_children", None)
+        self.local_served = 0
+        self.local_fallbacks = 0
+        self._default_cooldown = default_cooldown_seconds
+        self._split_retries = split_retries
+        self.split_sentence_failures = 0
+        self._tree_cache = tree_cache
+        self._response_cache = response_cache
+        self._background: set[asyncio.Task] = set()
+        self._refreshing: set[object] = set()
         if chain is not None:
             self._chain = chain
+        elif split_chains is not None:
+            # Words and sentences come from two smaller chains; no combined chain needed.
+            self._chain = None
         else:
             # Build chain lazily with explicit API key
             self._chain = build_suggestion_chain(
                 google_api_key=self.settings.google_api_key,
                 model_name=self.settings.gemini_model,
+                temperature=getattr(self.settings, "gemini_temperature", 0.3),
+                structured=getattr(self.settings, "structured_output", False),
             )
 
+    @property
+    def chain(self):
+        """Runnable chain (or fallback wrapper) used for upstream calls."""
+        return self._chain
+
+    @property
+    def admission(self) -> AdmissionController | None:
+        """Shared rate limiter in front of the chain, if configured."""
+        return self._admission
+
+    @property
+    def chains(self) -> list:
+        """Every chain this service calls upstream (combined and/or split halves)."""
+        chains = [self._chain] if self._chain is not None else []
+        if self._split is not None:
+            chains.extend(self._split)
+        return chains
+
     def predict_next_words(
         self,
         *,
@@ -43,23 +130,19 @@ class AutocompleteService:
     ) -> dict[str, list]:
         """Predict the next-word suggestion tree synchronously."""
         count = suggestions_count or self.settings.suggestions_count
-        conversation_context = conversation.strip() or "(none)"
+        conversation = self._window_conversation(SuggestionTreeCache.session_key(None, question), conversation)
+        inputs = self._chain_inputs(question, partial_answer, conversation, count)
         try:
-            payload = self._chain.invoke(
-                {
-                    "question": question.strip(),
-                    "partial_answer": partial_answer.strip(),
-                    "conversation": conversation_context,
-                    "suggestions_count": count,
-                }
-            )
+            if self._split is not None:
+                payload = SuggestionPayload(
+                    suggestions=self._split.words.invoke(inputs).suggestions,
+                    sentences=self._split.sentences.invoke(inputs).sentences,
+                )
+            else:
+                payload = self._chain.invoke(inputs)
         except OutputParserException as exc:  # pragma: no cover - defensive
             raise SuggestionError("Unable to parse suggestions from LLM") from exc
-        tree = _sanitize_suggestions(payload.suggestions, count)
-        if not tree:
-            raise SuggestionError("LLM returned no valid suggestions")
-        sentences = _sanitize_sentences(payload.sentences)
-        return {"suggestions": tree, "sentences": sentences}
+        return _sanitize_payload(payload, count, self._max_children)
 
     async def apredict_next_words(
         self,
@@ -68,26 +151,630 @@ class AutocompleteService:
         partial_answer: str,
         conversation: str = "",
         suggestions_count: int | None = None,
+        session_id: str | None = None,
+        instant: bool = False,
+        user_id: str | None = None,
+        session: ConversationSession | None = None,
     ) -> dict[str, list]:
-        """Predict the next-word suggestion tree asynchronously."""
+        """Predict the next-word suggestion tree asynchronously.
+
+        With ``instant`` and a local model, the local n-gram tree is returned
+        right away (without sentences) while the Gemini answer is fetched into
+        the cache in the background. With ``user_id`` the tree is re-ranked by
+        that user's own vocabulary after every cache, so cached trees stay shared.
+        A server-held ``session`` replaces ``conversation``; only its newest
+        turns are read when the context window is enabled.
+        """
         count = suggestions_count or self.settings.suggestions_count
-        conversation_context = conversation.strip() or "(none)"
+        result = await self._apredict_tree(question, partial_answer, conversation, count, session_id, instant, session)
+        if user_id and self._vocabulary is not None:
+            await self._vocabulary.aload(user_id)
+            result = {
+                "suggestions": self._vocabulary.personalize(user_id, partial_answer, result["suggestions"], count),
+                "sentences": result["sentences"],
+            }
+        return result
+
+    def learn_reply(self, user_id: str, text: str) -> None:
+        """Feed a reply the user sent into their personal vocabulary.
+
+        With ``local_learn`` it also trains the shared local model; nothing else
+        does, so guest lines and raw transcripts never reach other users.
+        """
+        if self._vocabulary is not None:
+            self._vocabulary.learn(user_id, text)
+        if self._local_learn and self._local_model is not None:
+            self._local_model.train(text)
+
+    async def _apredict_tree(
+        self,
+        question: str,
+        partial_answer: str,
+        conversation: str,
+        count: int,
+        session_id: str | None,
+        instant: bool,
+        session: ConversationSession | None = None,
+    ) -> dict[str, list]:
+        if session is not None:
+            session_id = session.session_id
+        key = SuggestionTreeCache.session_key(session_id, question, conversation)
+        conversation = self._window_conversation(
+            SuggestionTreeCache.session_key(session_id, question), conversation, session
+        )
+        if self._prefetcher is not None:
+            self._prefetcher.on_request(key, question, partial_answer)
+        if self._tree_cache is not None:
+            cached = self._tree_cache.lookup(
+                key,
+                question=question,
+                partial_answer=partial_answer,
+                limit=count,
+                conversation=conversation,
+            )
+            if cached is not None:
+                self._schedule_tree_refresh(key, question, partial_answer, conversation, count)
+                self._schedule_prefetch(key, question, partial_answer, conversation, count, cached)
+                return cached
+        if instant and self._local_model is not None:
+            local = self._local_model.suggest(partial_answer, count=count)
+            if local:
+                self.local_served += 1
+                self._schedule_warmup(question, partial_answer, conversation, count)
+                return {"suggestions": local, "sentences": []}
         try:
-            payload = await self._chain.ainvoke(
-                {
-                    "question": question.strip(),
-                    "partial_answer": partial_answer.strip(),
-                    "conversation": conversation_context,
-                    "suggestions_count": count,
-                }
+            result = await self._apredict_cached(question, partial_answer, conversation, count)
+        except (ResourceExhausted, GoogleAPIError, SuggestionError) as exc:
+            if not self._local_fallback or self._local_model is None or _must_surface(exc):
+                raise
+            local = self._local_model.suggest(partial_answer, count=count)
+            if not local:
+                raise
+            logger.info("Serving local n-gram suggestions while Gemini is unavailable")
+            self.local_fallbacks += 1
+            return {"suggestions": local, "sentences": []}
+        if self._local_model is not None and self._local_mode == "merge":
+            local = self._local_model.suggest(partial_answer, count=count)
+            result = {
+                "suggestions": _merge_local(result["suggestions"], local, count, self._local_merge_slots),
+                "sentences": result["sentences"],
+            }
+        if self._tree_cache is not None:
+            self._tree_cache.remember(
+                key, question=question, partial_answer=partial_answer, conversation=conversation, **result
+            )
+        self._schedule_prefetch(key, question, partial_answer, conversation, count, result)
+        return result
+
+    async def apredict_many(
+        self,
+        requests: Iterable[dict[str, object]],
+        *,
+        max_concurrency: int = 4,
+    ) -> list[dict[str, list] | Exception]:
+        """Predict several requests with bounded concurrency, in input order.
+
+        Each request holds the keyword arguments of ``apredict_next_words``, and
+        every item goes through the same caches, single-flight and admission
+        controller as a single request. Failures are returned in place.
+        """
+        semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+        async def run(request: dict[str, object]) -> dict[str, list]:
+            async with semaphore:
+                return await self.apredict_next_words(**request)
+
+        return await asyncio.gather(*(run(request) for request in requests), return_exceptions=True)
+
+    def _window_conversation(self, key: str, conversation: str, session: ConversationSession | None = None) -> str:
+        """Fit the transcript into the prompt token budget, if windowing is enabled."""
+        if self._context_window is None:
+            return session.transcript if session is not None else conversation
+        if session is not None:
+            window = self._context_window.prepare_turns(
+                key, session.lines, first_index=session.dropped, chars=session.chars
+            )
+        elif not conversation:
+            return conversation
+        else:
+            window = self._context_window.prepare(key, conversation)
+        if window.tokens_after != window.tokens_before:
+            logger.debug(
+                "Conversation trimmed from ~%d to ~%d tokens (%d turns summarized)",
+                window.tokens_before,
+                window.tokens_after,
+                window.summarized_turns,
             )
+        return window.text
+
+    async def _apredict_cached(
+        self,
+        question: str,
+        partial_answer: str,
+        conversation: str,
+        count: int,
+    ) -> dict[str, list]:
+        """Serve from the response cache when possible, revalidating stale entries."""
+        cache_key = self._cache_key(question, partial_answer, conversation, count)
+        if cache_key is None:
+            return await self._apredict_fresh(None, question, partial_answer, conversation, count)
+        cached, state = self._response_cache.get(cache_key)
+        if state == "fresh":
+            return cached
+        if state == "stale":
+            self._schedule_revalidation(cache_key, question, partial_answer, conversation, count)
+            return cached
+        try:
+            return await self._apredict_fresh(cache_key, question, partial_answer, conversation, count)
+        except ResourceExhausted:
+            fallback = self._response_cache.get_rate_limit_fallback(cache_key)
+            if fallback is None:
+                raise
+            logger.info("Serving stale suggestions while Gemini quota is exhausted")
+            return fallback
+
+    def _cache_key(
+        self,
+        question: str,
+        partial_answer: str,
+        conversation: str,
+        count: int,
+    ) -> CacheKey | None:
+        if self._response_cache is None:
+            return None
+        return make_cache_key(
+            question=question,
+            partial_answer=partial_answer,
+            conversation=conversation,
+            suggestions_count=count,
+            model=self.settings.gemini_model or "",
+        )
+
+    async def _apredict_fresh(
+        self,
+        cache_key: CacheKey | None,
+        question: str,
+        partial_answer: str,
+        conversation: str,
+        count: int,
+    ) -> dict[str, list]:
+        """Call upstream (coalescing identical in-flight requests) and store the result."""
+
+        async def run() -> dict[str, list]:
+            result = await self._apredict_upstream(question, partial_answer, conversation, count)
+            if self._response_cache is not None and cache_key is not None:
+                self._response_cache.put(cache_key, result)
+            return result
+
+        if self._singleflight is None:
+            return await run()
+        flight_key = cache_key or make_cache_key(
+            question=question,
+            partial_answer=partial_answer,
+            conversation=conversation,
+            suggestions_count=count,
+            model=self.settings.gemini_model or "",
+        )
+        if LOW_PRIORITY.get() and self._admission is not None and flight_key not in self._singleflight:
+            # Background work only leads a flight when there is spare capacity right now.
+            tokens = estimate_tokens(self._chain_inputs(question, partial_answer, conversation, count))
+            if not self._admission.has_capacity(tokens):
+                self._admission.defer()
+                raise RateLimitExceeded("Low-priority request deferred.", retry_after=0.0)
+
+        async def shared() -> dict[str, list]:
+            # Users may join this flight, so it is admitted at their priority, not the leader's.
+            # The flight task runs in its own copy of the context, so the caller keeps its flag.
+            LOW_PRIORITY.set(False)
+            return await run()
+
+        return await self._singleflight.do(flight_key, shared)
+
+    async def astream_next_words(
+        self,
+        *,
+        question: str,
+        partial_answer: str,
+        conversation: str = "",
+        suggestions_count: int | None = None,
+        session_id: str | None = None,
+    ) -> AsyncIterator[tuple[str, object]]:
+        """Yield ``(event, data)`` pairs as the suggestion payload streams in.
+
+        Events are ``root`` (a root word), ``branch`` (a sanitized root branch
+        with its subtree), ``sentences`` and finally ``done`` with the complete
+        sanitized response. Cached answers are replayed as the same events.
+        """
+        count = suggestions_count or self.settings.suggestions_count
+        key = SuggestionTreeCache.session_key(session_id, question, conversation)
+        conversation = self._window_conversation(SuggestionTreeCache.session_key(session_id, question), conversation)
+        if self._prefetcher is not None:
+            self._prefetcher.on_request(key, question, partial_answer)
+        if self._tree_cache is not None:
+            cached = self._tree_cache.lookup(
+                key,
+                question=question,
+                partial_answer=partial_answer,
+                limit=count,
+                conversation=conversation,
+            )
+            if cached is not None:
+                self._schedule_tree_refresh(key, question, partial_answer, conversation, count)
+                for event in _replay_events(cached):
+                    yield event
+                return
+        cache_key = self._cache_key(question, partial_answer, conversation, count)
+        if cache_key is not None:
+            cached, state = self._response_cache.get(cache_key)
+            if state is not None:
+                if state == "stale":
+                    self._schedule_revalidation(cache_key, question, partial_answer, conversation, count)
+                for event in _replay_events(cached):
+                    yield event
+                return
+
+        result = None
+        async for event in self._astream_generate(question, partial_answer, conversation, count):
+            if event[0] == "done":
+                result = event[1]
+            yield event
+        if self._response_cache is not None and cache_key is not None:
+            self._response_cache.put(cache_key, result)
+        if self._tree_cache is not None:
+            self._tree_cache.remember(
+                key, question=question, partial_answer=partial_answer, conversation=conversation, **result
+            )
+        self._schedule_prefetch(key, question, partial_answer, conversation, count, result)
+
+    async def _astream_generate(
+        self,
+        question: str,
+        partial_answer: str,
+        conversation: str,
+        count: int,
+    ) -> AsyncIterator[tuple[str, object]]:
+        inputs = self._chain_inputs(question, partial_answer, conversation, count)
+        if self._split is None:
+            chain, parser = self._chain, SUGGESTION_PARSER
+            sentences_task = None
+        else:
+            # Words stream first; sentences are generated concurrently and follow.
+            chain, parser = self._split.words, WORD_TREE_PARSER
+            sentences_task = asyncio.ensure_future(self._ainvoke_half(self._split.sentences, inputs))
+
+        scanner = SuggestionStreamParser()
+        emitted: dict[int, int] = {}
+        seen: set[str] = set()
+        chunks: list[str] = []
+        try:
+            await self._admit(inputs)
+            try:
+                async for text in astream_suggestion_text(chain, inputs):
+                    chunks.append(text)
+                    for piece in scanner.feed(text):
+                        event = _stream_event(piece, emitted, seen, count, self._max_children)
+                        if event is not None:
+                            yield event
+            except ResourceExhausted as exc:
+                self._note_rate_limit(exc)
+                raise
+            try:
+                payload = parser.parse("".join(chunks))
+            except OutputParserException as exc:
+                raise SuggestionError("Unable to parse suggestions from LLM") from exc
+        except BaseException:
+            if sentences_task is not None:
+                sentences_task.cancel()
+            raise
+
+        if sentences_task is None:
+            result = _sanitize_payload(payload, count, self._max_children)
+        else:
+            tree = _sanitize_suggestions(payload.suggestions, count, max_children=self._max_children)
+            if not tree:
+                sentences_task.cancel()
+                raise SuggestionError("LLM returned no valid suggestions")
+            sentences = await self._await_sentences(sentences_task)
+            yield "sentences", sentences
+            result = {"suggestions": tree, "sentences": sentences}
+        yield "done", result
+
+    @staticmethod
+    def _chain_inputs(
+        question: str,
+        partial_answer: str,
+        conversation: str,
+        count: int,
+    ) -> dict[str, object]:
+        return {
+            "question": question.strip(),
+            "partial_answer": partial_answer.strip(),
+            "conversation": conversation.strip() or "(none)",
+            "suggestions_count": count,
+        }
+
+    async def _apredict_upstream(
+        self,
+        question: str,
+        partial_answer: str,
+        conversation: str,
+        count: int,
+    ) -> dict[str, list]:
+        inputs = self._chain_inputs(question, partial_answer, conversation, count)
+        if self._split is not None:
+            return await self._apredict_split(inputs, count)
+        try:
+            payload = await self._ainvoke_chain(self._chain, inputs)
         except OutputParserException as exc:  # pragma: no cover - defensive
             raise SuggestionError("Unable to parse suggestions from LLM") from exc
-        tree = _sanitize_suggestions(payload.suggestions, count)
+        return _sanitize_payload(payload, count, self._max_children)
+
+    async def _admit(self, inputs: dict[str, object]) -> None:
+        if self._admission is None:
+            return
+        if LOW_PRIORITY.get():
+            if not self._admission.try_acquire(estimate_tokens(inputs)):
+                raise RateLimitExceeded("Low-priority request deferred.", retry_after=0.0)
+            return
+        await self._admission.acquire(estimate_tokens(inputs))
+
+    def _note_rate_limit(self, exc: ResourceExhausted) -> None:
+        """Turn an upstream quota error into a cooldown shared by every queued request."""
+        if self._admission is None or isinstance(exc, RateLimitExceeded):
+            return
+        delay = retry_delay_from_error(exc)
+        self._admission.cooldown(delay if delay is not None else self._default_cooldown)
+
+    async def _ainvoke_chain(self, chain, inputs: dict[str, object]):
+        await self._admit(inputs)
+        try:
+            return await chain.ainvoke(inputs)
+        except ResourceExhausted as exc:
+            self._note_rate_limit(exc)
+            raise
+
+    async def _apredict_split(self, inputs: dict[str, object], count: int) -> dict[str, list]:
+        """Run the word and sentence halves concurrently and merge them."""
+        sentences_task = asyncio.ensure_future(self._ainvoke_half(self._split.sentences, inputs))
+        try:
+            words = await self._ainvoke_half(self._split.words, inputs)
+        except BaseException:
+            sentences_task.cancel()
+            raise
+        tree = _sanitize_suggestions(words.suggestions, count, max_children=self._max_children)
         if not tree:
+            sentences_task.cancel()
             raise SuggestionError("LLM returned no valid suggestions")
-        sentences = _sanitize_sentences(payload.sentences)
-        return {"suggestions": tree, "sentences": sentences}
+        return {"suggestions": tree, "sentences": await self._await_sentences(sentences_task)}
+
+    async def _ainvoke_half(self, chain, inputs: dict[str, object]):
+        """Invoke one split chain, retrying only that half on parse or upstream errors."""
+        attempt = 0
+        while True:
+            try:
+                return await self._ainvoke_chain(chain, inputs)
+            except ResourceExhausted:
+                raise
+            except (OutputParserException, GoogleAPIError) as exc:
+                attempt += 1
+                if attempt > self._split_retries:
+                    if isinstance(exc, OutputParserException):
+                        raise SuggestionError("Unable to parse suggestions from LLM") from exc
+                    raise
+                logger.info("Retrying failed split half (attempt %d): %s", attempt, exc)
+
+    async def _await_sentences(self, task: asyncio.Future) -> list[SentenceSuggestion]:
+        """Sentences are best effort in split mode: the word tree is still useful on its own."""
+        try:
+            payload = await task
+        except asyncio.CancelledError:
+            raise
+        except Exception:  # noqa: BLE001 - degrade to words only
+            self.split_sentence_failures += 1
+            logger.warning("Sentence generation failed; returning words only", exc_info=True)
+            return []
+        return _sanitize_sentences(payload.sentences)
+
+    def _spawn(self, coro) -> asyncio.Task:
+        task = asyncio.get_running_loop().create_task(coro)
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+        return task
+
+    def _schedule_revalidation(
+        self,
+        cache_key: CacheKey,
+        question: str,
+        partial_answer: str,
+        conversation: str,
+        count: int,
+    ) -> None:
+        if cache_key in self._refreshing:
+            return
+        self._refreshing.add(cache_key)
+
+        async def revalidate() -> None:
+            try:
+                await self._apredict_fresh(cache_key, question, partial_answer, conversation, count)
+            except Exception:  # noqa: BLE001 - keep serving the stale entry
+                logger.warning("Background cache revalidation failed", exc_info=True)
+            finally:
+                self._refreshing.discard(cache_key)
+
+        self._spawn(revalidate())
+
+    def _schedule_warmup(self, question: str, partial_answer: str, conversation: str, count: int) -> None:
+        """Fetch the Gemini answer into the response cache behind an instant local reply."""
+        if self._response_cache is None:
+            return
+
+        async def warm() -> None:
+            LOW_PRIORITY.set(True)
+            try:
+                await self._apredict_cached(question, partial_answer, conversation, count)
+            except Exception as exc:  # noqa: BLE001 - warm-up is best effort
+                logger.debug("Background warm-up skipped: %s", exc)
+
+        self._spawn(warm())
+
+    def _schedule_tree_refresh(
+        self,
+        key: str,
+        question: str,
+        partial_answer: str,
+        conversation: str,
+        count: int,
+    ) -> None:
+        """Fetch a fresh tree for the walked path so deeper picks stay local too."""
+        if key in self._refreshing:
+            self._tree_cache.saved_upstream_calls += 1
+            return
+        self._refreshing.add(key)
+        cache_key = self._cache_key(question, partial_answer, conversation, count)
+        if cache_key is not None and self._response_cache.peek(cache_key) == "fresh":
+            # The refresh below is answered by the response cache, so this hit cost nothing upstream.
+            self._tree_cache.saved_upstream_calls += 1
+
+        async def refresh() -> None:
+            try:
+                # Goes through the response cache so a finished prefetch is reused.
+                result = await self._apredict_cached(question, partial_answer, conversation, count)
+            except Exception:  # noqa: BLE001 - background refresh must never raise
+                self._tree_cache.refresh_errors += 1
+                logger.warning("Background tree refresh failed for %s", key, exc_info=True)
+            else:
+                self._tree_cache.refreshes += 1
+                self._tree_cache.remember(
+                    key, question=question, partial_answer=partial_answer, conversation=conversation, **result
+                )
+            finally:
+                self._refreshing.discard(key)
+
+        self._spawn(refresh())
+
+    def _schedule_prefetch(
+        self,
+        key: str,
+        question: str,
+        partial_answer: str,
+        conversation: str,
+        count: int,
+        result: dict[str, list],
+    ) -> None:
+        """Warm the response cache for the most likely next picks."""
+        if self._prefetcher is None or self._response_cache is None:
+            return
+        self._prefetcher.schedule(
+            key,
+            question=question,
+            partial_answer=partial_answer,
+            words=[branch.word for branch in result["suggestions"]],
+            fetch=lambda target: self._apredict_cached(question, target, conversation, count),
+        )
+
+    def stats(self) -> dict[str, dict]:
+        """Counters for the optional caching layers in front of the chain."""
+        stats: dict[str, dict] = {}
+        if self._tree_cache is not None:
+            stats["tree_cache"] = self._tree_cache.stats()
+        if self._response_cache is not None:
+            stats["response_cache"] = self._response_cache.stats()
+        if self._split is not None:
+            stats["split"] = {"sentence_failures": self.split_sentence_failures}
+        if self._admission is not None:
+            stats["admission"] = self._admission.stats()
+        if self._singleflight is not None:
+            stats["singleflight"] = self._singleflight.stats()
+        if self._prefetcher is not None:
+            stats["prefetch"] = self._prefetcher.stats()
+        if self._context_window is not None:
+            stats["context"] = self._context_window.stats()
+        if self._vocabulary is not None:
+            stats["vocabulary"] = self._vocabulary.stats()
+        if self._local_model is not None:
+            stats["local_model"] = {
+                **self._local_model.stats(),
+                "served_instant": self.local_served,
+                "fallbacks": self.local_fallbacks,
+            }
+        models = [chain.stats() for chain in self.chains if callable(getattr(chain, "stats", None))]
+        if models:
+            stats["models"] = models
+        return stats
+
+
+def _sanitize_payload(payload, count: int, max_children: int | None = None) -> dict[str, list]:
+    tree = _sanitize_suggestions(payload.suggestions, count, max_children=max_children)
+    if not tree:
+        raise SuggestionError("LLM returned no valid suggestions")
+    sentences = _sanitize_sentences(payload.sentences)
+    return {"suggestions": tree, "sentences": sentences}
+
+
+def _replay_events(result: dict[str, list]) -> Iterable[tuple[str, object]]:
+    for index, branch in enumerate(result["suggestions"]):
+        yield "root", {"index": index, "word": branch.word}
+    for index, branch in enumerate(result["suggestions"]):
+        yield "branch", {"index": index, "branch": branch}
+    yield "sentences", result["sentences"]
+    yield "done", result
+
+
+def _stream_event(
+    piece: ParsedPiece,
+    emitted: dict[int, int],
+    seen: set[str],
+    limit: int,
+    max_children: int | None = None,
+) -> tuple[str, object] | None:
+    """Apply the usual sanitization rules to one streamed fragment.
+
+    ``emitted`` maps the raw root index to its position in the sanitized list;
+    ``seen`` holds the lowercased root words already emitted.
+    """
+    if piece.kind == "root_word":
+        word = str(piece.value).strip()
+        if not word or word.lower() in seen or len(seen) >= limit:
+            return None
+        seen.add(word.lower())
+        emitted[piece.index] = len(emitted)
+        return "root", {"index": emitted[piece.index], "word": word}
+    if piece.kind == "root_branch" and piece.index in emitted:
+        try:
+            branch = SuggestionBranch.model_validate(piece.value)
+        except ValidationError:
+            return None
+        cleaned = _sanitize_branch(branch, depth=1, max_depth=4, max_children=max_children)
+        if cleaned is None:
+            return None
+        return "branch", {"index": emitted[piece.index], "branch": cleaned}
+    if piece.kind == "sentences":
+        try:
+            sentences = [SentenceSuggestion.model_validate(item) for item in piece.value]
+        except (TypeError, ValidationError):
+            return None
+        return "sentences", _sanitize_sentences(sentences)
+    return None
+
+
+def _must_surface(exc: Exception) -> bool:
+    """Errors the client has to see: local shedding and a zero quota are not outages."""
+    return isinstance(exc, RateLimitExceeded) or "limit: 0" in str(exc).lower()
+
+
+def _merge_local(
+    remote: list[SuggestionBranch],
+    local: list[SuggestionBranch],
+    limit: int,
+    slots: int,
+) -> list[SuggestionBranch]:
+    """Keep Gemini's order but reserve up to ``slots`` trailing roots for new local words."""
+    taken = {branch.word.lower() for branch in remote}
+    fresh = [branch for branch in local if branch.word.lower() not in taken]
+    # Local words also fill any roots Gemini left empty.
+    extra = fresh[: max(slots, limit - len(remote))]
+    keep = max(limit - len(extra), 0)
+    return remote[:keep] + extra[: limit - min(len(remote), keep)]
 
 
 def _sanitize_suggestions(
@@ -95,23 +782,29 @@ def _sanitize_suggestions(
     limit: int,
     *,
     max_depth: int = 4,
+    max_children: int | None = None,
 ) -> list[SuggestionBranch]:
-    """Normalize nested suggestions by trimming words, deduplicating per level, and enforcing depth."""
+    """Normalize nested suggestions by trimming words, deduplicating per level, and enforcing depth.
+
+    Roots are checked before their subtrees are visited, so duplicates and roots
+    past ``limit`` cost nothing; ``max_children`` caps every deeper level. The
+    cleaned tree is built as plain dicts and validated once, in a single call.
+    """
 
-    sanitized: list[SuggestionBranch] = []
+    sanitized: list[dict] = []
     seen: set[str] = set()
+    pending: list[tuple[list[SuggestionBranch], list[dict], int]] = []
     for branch in branches:
-        cleaned = _sanitize_branch(branch, depth=1, max_depth=max_depth)
-        if cleaned is None:
-            continue
-        key = cleaned.word.lower()
-        if key in seen:
-            continue
-        seen.add(key)
-        sanitized.append(cleaned)
         if len(sanitized) >= limit:
             break
-    return sanitized
+        node = _clean_node(branch.word, seen)
+        if node is None:
+            continue
+        sanitized.append(node)
+        if max_depth > 1 and branch.next:
+            pending.append((branch.next, node["next"], 2))
+    _sanitize_levels(pending, max_depth, max_children)
+    return _TREE_ADAPTER.validate_python(sanitized)
 
 
 def _sanitize_branch(
@@ -119,31 +812,46 @@ def _sanitize_branch(
     *,
     depth: int,
     max_depth: int,
+    max_children: int | None = None,
 ) -> SuggestionBranch | None:
-    word = branch.word.strip()
-    if not word:
+    node = _clean_node(branch.word, set())
+    if node is None:
         return None
+    if depth < max_depth and branch.next:
+        _sanitize_levels([(branch.next, node["next"], depth + 1)], max_depth, max_children)
+    return SuggestionBranch.model_validate(node)
 
-    if depth >= max_depth:
-        children: list[SuggestionBranch] = []
-    else:
-        children = []
-        child_seen: set[str] = set()
-        for child in branch.next:
-            cleaned_child = _sanitize_branch(
-                child,
-                depth=depth + 1,
-                max_depth=max_depth,
-            )
-            if cleaned_child is None:
-                continue
-            key = cleaned_child.word.lower()
-            if key in child_seen:
+
+def _sanitize_levels(
+    pending: list[tuple[list[SuggestionBranch], list[dict], int]],
+    max_depth: int,
+    max_children: int | None,
+) -> None:
+    """Fill each ``(source children, target list, depth)`` level without recursion."""
+    while pending:
+        children, target, depth = pending.pop()
+        seen: set[str] = set()
+        for child in children:
+            if max_children is not None and len(target) >= max_children:
+                break
+            node = _clean_node(child.word, seen)
+            if node is None:
                 continue
-            child_seen.add(key)
-            children.append(cleaned_child)
+            target.append(node)
+            if depth < max_depth and child.next:
+                pending.append((child.next, node["next"], depth + 1))
 
-    return SuggestionBranch(word=word, next=children)
+
+def _clean_node(raw_word: str, seen: set[str]) -> dict | None:
+    word = raw_word.strip()
+    if not word:
+        return None
+    key = word.lower()
+    if key in seen:
+        return None
+    seen.add(key)
+    # Trees repeat the same few words at every level; share one string object.
+    return {"word": sys.intern(word), "next": []}
 
 
 def _sanitize_sentences(
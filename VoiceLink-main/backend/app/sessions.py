@@ -0,0 +1,154 @@
+"""Server-side conversation transcripts so clients only send new turns."""
+
+from __future__ import annotations
+
+import secrets
+import threading
+import time
+from collections import OrderedDict, deque
+from collections.abc import Sequence
+from dataclasses import dataclass, field
+
+
+class SessionNotFound(KeyError):
+    """Raised when a session id is unknown, expired or was evicted."""
+
+
+class _TurnLines(Sequence[str]):
+    """``role: text`` view of a session's turns that formats only the lines it is asked for."""
+
+    def __init__(self, turns: deque[tuple[str, str]]) -> None:
+        self._turns = turns
+
+    def __len__(self) -> int:
+        return len(self._turns)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        role, text = self._turns[index]
+        return f"{role}: {text}"
+
+
+@dataclass
+class ConversationSession:
+    session_id: str
+    user_id: str | None = None
+    turns: deque[tuple[str, str]] = field(default_factory=deque)
+    chars: int = 0
+    dropped: int = 0
+    touched_at: float = field(default_factory=time.monotonic)
+    _transcript: str | None = None
+
+    @property
+    def transcript(self) -> str:
+        """All ``role: text`` lines, joined on demand and cached until the turns change."""
+        if self._transcript is None:
+            self._transcript = "\n".join(self.lines)
+        return self._transcript
+
+    @property
+    def lines(self) -> Sequence[str]:
+        """The turns as lines; ``dropped`` is the absolute number of the first one."""
+        return _TurnLines(self.turns)
+
+    def last_turn(self, role: str) -> str | None:
+        for turn_role, text in reversed(self.turns):
+            if turn_role == role:
+                return text
+        return None
+
+
+class SessionStore:
+    """Bounded LRU of conversation sessions with per-session turn and size limits."""
+
+    def __init__(
+        self,
+        *,
+        max_sessions: int = 1024,
+        max_turns: int = 200,
+        max_chars: int = 20_000,
+        ttl_seconds: float = 3600.0,
+    ) -> None:
+        self._max_sessions = max_sessions
+        self._max_turns = max_turns
+        self._max_chars = max_chars
+        self._ttl = ttl_seconds
+        self._sessions: OrderedDict[str, ConversationSession] = OrderedDict()
+        self._lock = threading.Lock()
+        self.created = 0
+        self.evicted = 0
+        self.expired = 0
+        self.turns_appended = 0
+
+    def create(
+        self,
+        turns: list[tuple[str, str]] | None = None,
+        *,
+        user_id: str | None = None,
+    ) -> ConversationSession:
+        session = ConversationSession(session_id=secrets.token_urlsafe(12), user_id=user_id)
+        with self._lock:
+            self._sessions[session.session_id] = session
+            self.created += 1
+            while len(self._sessions) > self._max_sessions:
+                self._sessions.popitem(last=False)
+                self.evicted += 1
+            if turns:
+                self._append(session, turns)
+        return session
+
+    def get(self, session_id: str) -> ConversationSession:
+        with self._lock:
+            return self._touch(session_id)
+
+    def append(self, session_id: str, turns: list[tuple[str, str]]) -> ConversationSession:
+        with self._lock:
+            session = self._touch(session_id)
+            self._append(session, turns)
+            return session
+
+    def delete(self, session_id: str) -> None:
+        with self._lock:
+            if self._sessions.pop(session_id, None) is None:
+                raise SessionNotFound(session_id)
+
+    def _touch(self, session_id: str) -> ConversationSession:
+        session = self._sessions.get(session_id)
+        if session is None:
+            raise SessionNotFound(session_id)
+        now = time.monotonic()
+        if now - session.touched_at > self._ttl:
+            del self._sessions[session_id]
+            self.expired += 1
+            raise SessionNotFound(session_id)
+        session.touched_at = now
+        self._sessions.move_to_end(session_id)
+        return session
+
+    def _append(self, session: ConversationSession, turns: list[tuple[str, str]]) -> None:
+        for role, text in turns:
+            line = f"{role}: {text}"
+            session.turns.append((role, text))
+            session.chars += len(line)
+            self.turns_appended += 1
+        session._transcript = None
+        while len(session.turns) > 1 and (
+            len(session.turns) > self._max_turns or session.chars > self._max_chars
+        ):
+            role, text = session.turns.popleft()
+            session.chars -= len(role) + len(text) + 2
+            session.dropped += 1
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            live = len(self._sessions)
+            chars = sum(session.chars for session in self._sessions.values())
+        return {
+            "sessions": live,
+            "chars": chars,
+            "created": self.created,
+            "evicted": self.evicted,
+            "expired": self.expired,
+            "turns_appended": self.turns_appended,
+        }
@@ -0,0 +1,68 @@
+"""Coalesce identical in-flight upstream calls."""
+
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+@dataclass
+class _Flight:
+    task: asyncio.Task
+    waiters: int = 0
+
+
+class SingleFlight:
+    """Run one upstream call per key and fan its outcome out to every concurrent caller.
+
+    The call runs in its own task, so a leader whose client disconnects does not
+    cancel the work other waiters are relying on. Once the last waiter is
+    cancelled the call itself is cancelled, so abandoned work stops spending quota.
+    """
+
+    def __init__(self) -> None:
+        self._inflight: dict[Hashable, _Flight] = {}
+        self.leaders = 0
+        self.coalesced = 0
+        self.abandoned = 0
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._inflight
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        flight = self._inflight.get(key)
+        if flight is None:
+            flight = _Flight(asyncio.ensure_future(fn()))
+            self._inflight[key] = flight
+            flight.task.add_done_callback(lambda done, key=key: self._finish(key, done))
+            self.leaders += 1
+        else:
+            self.coalesced += 1
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        except asyncio.CancelledError:
+            if flight.waiters == 1 and not flight.task.done():
+                flight.task.cancel()
+                self.abandoned += 1
+            raise
+        finally:
+            flight.waiters -= 1
+
+    def _finish(self, key: Hashable, task: asyncio.Task) -> None:
+        flight = self._inflight.get(key)
+        if flight is not None and flight.task is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()  # mark retrieved even if every waiter went away
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "in_flight": len(self._inflight),
+            "upstream_calls": self.leaders,
+            "saved_upstream_calls": self.coalesced,
+            "abandoned": self.abandoned,
+        }
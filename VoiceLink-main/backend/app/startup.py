@@ -0,0 +1,118 @@
+"""Background warm-up at startup and the readiness state it reports."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+from .config import Settings
+from .prompts import MODEL_DISCOVERY, chain_clients, import_gemini_sdks, ping_clients, warm_chain
+from .registry import ServiceRegistry
+
+logger = logging.getLogger(__name__)
+
+
+class StartupState:
+    """Progress of the lifespan warm-up, reported by ``/ready`` and ``/metrics``.
+
+    The service counts as ready once the warm-up finished, was skipped, or a
+    suggestion has been served, whichever comes first. A failed warm-up is
+    retried, and meanwhile the first request builds the chains itself.
+    """
+
+    def __init__(self, *, import_seconds: float | None = None) -> None:
+        self.started_at = time.monotonic()
+        self.import_seconds = import_seconds
+        self.phase = "starting"
+        self.phase_seconds: dict[str, float] = {}
+        self.warmed = False
+        self.attempts = 0
+        self.error: str | None = None
+        self.warmup_seconds: float | None = None
+        self.first_suggestion_seconds: float | None = None
+
+    @contextmanager
+    def timing(self, phase: str) -> Iterator[None]:
+        self.phase = phase
+        started = time.monotonic()
+        yield
+        self.phase_seconds[phase] = round(time.monotonic() - started, 4)
+
+    @property
+    def ready(self) -> bool:
+        return self.warmed or self.phase == "skipped" or self.first_suggestion_seconds is not None
+
+    def record_first_suggestion(self) -> None:
+        """Seconds from startup to the first suggestion served; only the first call counts."""
+        if self.first_suggestion_seconds is None:
+            self.first_suggestion_seconds = round(time.monotonic() - self.started_at, 4)
+
+    def snapshot(self) -> dict:
+        return {
+            "ready": self.ready,
+            "phase": self.phase,
+            "error": self.error,
+            "attempts": self.attempts,
+            "import_seconds": self.import_seconds,
+            "phase_seconds": dict(self.phase_seconds),
+            "warmup_seconds": self.warmup_seconds,
+            "first_suggestion_seconds": self.first_suggestion_seconds,
+        }
+
+
+async def warm_up(
+    registry: ServiceRegistry,
+    settings: Settings,
+    state: StartupState,
+    *,
+    ping: bool = False,
+    retry_seconds: float = 1.0,
+    max_retry_seconds: float = 60.0,
+    max_attempts: int | None = None,
+) -> None:
+    """Import the Gemini SDKs, discover models, build and warm the chains, off the event loop.
+
+    A failed attempt is retried with exponential backoff until one succeeds,
+    a served suggestion has built the chains anyway, or ``max_attempts`` ran out.
+    """
+    delay = retry_seconds
+    while not await _warm_up_once(registry, settings, state, ping=ping):
+        if state.first_suggestion_seconds is not None:
+            return
+        if max_attempts is not None and state.attempts >= max_attempts:
+            return
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, max_retry_seconds)
+
+
+async def _warm_up_once(registry: ServiceRegistry, settings: Settings, state: StartupState, *, ping: bool) -> bool:
+    state.attempts += 1
+    started = time.monotonic()
+    try:
+        with state.timing("importing"):
+            await asyncio.to_thread(import_gemini_sdks)
+        with state.timing("discovering"):
+            await MODEL_DISCOVERY.aget(settings.google_api_key)
+        with state.timing("building"):
+            service = await asyncio.to_thread(registry.get, settings)
+        with state.timing("warming"):
+            await asyncio.to_thread(lambda: [warm_chain(chain) for chain in service.chains])
+        if ping:
+            with state.timing("pinging"):
+                # Split chains share their clients; ping each one once.
+                clients = {id(client): client for chain in service.chains for client in chain_clients(chain)}
+                await ping_clients(list(clients.values()))
+    except Exception as exc:  # noqa: BLE001 - requests fall back to building the chains lazily
+        state.phase = "failed"
+        state.error = f"{type(exc).__name__}: {exc}"
+        logger.warning("Startup warm-up attempt %d failed; retrying in the background", state.attempts, exc_info=True)
+        return False
+    state.phase = "ready"
+    state.error = None
+    state.warmed = True
+    state.warmup_seconds = round(time.monotonic() - started, 4)
+    logger.info("Warm-up finished in %.2fs: %s", state.warmup_seconds, state.phase_seconds)
+    return True
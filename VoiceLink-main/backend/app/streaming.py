@@ -0,0 +1,129 @@
+"""Incremental parsing of streamed ``SuggestionPayload`` JSON and SSE framing."""
+
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass
+from typing import Any
+
+from pydantic import BaseModel
+
+
+@dataclass
+class _Frame:
+    kind: str  # "{" or "["
+    key: str | None
+    index: int | None
+    start: int
+    expect_key: bool = True
+    last_key: str | None = None
+    items: int = 0
+
+
+@dataclass
+class ParsedPiece:
+    """A fragment of the payload that has finished streaming."""
+
+    kind: str  # "root_word", "root_branch" or "sentences"
+    index: int | None = None
+    value: Any = None
+
+
+class SuggestionStreamParser:
+    """Scan streamed model text and report root words, root branches and sentences as they complete.
+
+    Only the structure of the top-level JSON object is tracked; completed
+    fragments are decoded with ``json.loads`` so the parser never has to
+    understand partial values. Text before the first ``{`` (such as a Markdown
+    code fence) and after the closing ``}`` is ignored.
+    """
+
+    def __init__(self) -> None:
+        self._buffer = ""
+        self._pos = 0
+        self._stack: list[_Frame] = []
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._finished = False
+
+    def feed(self, text: str) -> list[ParsedPiece]:
+        self._buffer += text
+        pieces: list[ParsedPiece] = []
+        buffer = self._buffer
+        while self._pos < len(buffer) and not self._finished:
+            char = buffer[self._pos]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    self._on_string(json.loads(buffer[self._string_start : self._pos + 1]), pieces)
+            elif not self._stack:
+                if char == "{":
+                    self._stack.append(_Frame(kind="{", key=None, index=None, start=self._pos))
+            elif char == '"':
+                self._in_string = True
+                self._string_start = self._pos
+            elif char in "{[":
+                self._push(char)
+            elif char in "}]":
+                self._pop(pieces)
+            elif char == "," and self._stack[-1].kind == "{":
+                self._stack[-1].expect_key = True
+            self._pos += 1
+        return pieces
+
+    def _push(self, kind: str) -> None:
+        parent = self._stack[-1]
+        if parent.kind == "{":
+            key, index = parent.last_key, None
+        else:
+            key, index = None, parent.items
+            parent.items += 1
+        self._stack.append(_Frame(kind=kind, key=key, index=index, start=self._pos))
+
+    def _pop(self, pieces: list[ParsedPiece]) -> None:
+        frame = self._stack.pop()
+        if not self._stack:
+            self._finished = True
+            return
+        fragment = self._buffer[frame.start : self._pos + 1]
+        if _is_root_branch(frame, self._stack[-1], len(self._stack) + 1):
+            pieces.append(ParsedPiece("root_branch", frame.index, json.loads(fragment)))
+        elif len(self._stack) == 1 and frame.key == "sentences" and frame.kind == "[":
+            pieces.append(ParsedPiece("sentences", None, json.loads(fragment)))
+
+    def _on_string(self, value: str, pieces: list[ParsedPiece]) -> None:
+        frame = self._stack[-1]
+        if frame.kind == "{" and frame.expect_key:
+            frame.last_key = value
+            frame.expect_key = False
+        elif (
+            frame.kind == "{"
+            and frame.last_key == "word"
+            and _is_root_branch(frame, self._stack[-2], len(self._stack))
+        ):
+            pieces.append(ParsedPiece("root_word", frame.index, value))
+
+
+def _is_root_branch(frame: _Frame, parent: _Frame, depth: int) -> bool:
+    """True for an object directly inside the top-level ``suggestions`` array."""
+    return depth == 3 and frame.kind == "{" and parent.kind == "[" and parent.key == "suggestions"
+
+
+def _jsonable(data: Any) -> Any:
+    if isinstance(data, BaseModel):
+        return data.model_dump()
+    if isinstance(data, dict):
+        return {key: _jsonable(value) for key, value in data.items()}
+    if isinstance(data, (list, tuple)):
+        return [_jsonable(item) for item in data]
+    return data
+
+
+def format_sse(event: str, data: Any) -> str:
+    """Frame one Server-Sent Event."""
+    return f"event: {event}\ndata: {json.dumps(_jsonable(data), separators=(',', ':'))}\n\n"
@@ -0,0 +1,15 @@
+"""Text helpers shared by the caches: normalization and short stable hashes."""
+
+from __future__ import annotations
+
+import hashlib
+
+
+def normalize_text(text: str) -> str:
+    """Fold case and collapse whitespace so near-identical requests share an entry."""
+    return " ".join(text.casefold().split())
+
+
+def fingerprint(text: str) -> str:
+    """Short stable digest of ``text``, safe to use as a key or file name."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
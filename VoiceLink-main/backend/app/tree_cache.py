@@ -0,0 +1,143 @@
+"""Per-session memory of the last suggestion tree so word picks can be answered locally."""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+from .prompts import SentenceSuggestion, SuggestionBranch
+from .text import fingerprint, normalize_text
+
+
+def _words(text: str) -> list[str]:
+    return text.casefold().split()
+
+
+@dataclass
+class _TreeEntry:
+    question: str
+    conversation: str
+    base_words: list[str]
+    suggestions: list[SuggestionBranch]
+    sentences: list[SentenceSuggestion]
+    stored_at: float = field(default_factory=time.monotonic)
+
+
+class SuggestionTreeCache:
+    """Remember the last sanitized tree per session and walk it for follow-up requests.
+
+    When a new ``partial_answer`` equals the remembered one plus a path of words
+    that exists in the tree, the children at the end of that path are already the
+    answer to the new request and no upstream call is needed.
+    """
+
+    def __init__(self, *, max_sessions: int = 1024, ttl_seconds: float = 300.0) -> None:
+        self._max_sessions = max_sessions
+        self._ttl = ttl_seconds
+        self._entries: OrderedDict[str, _TreeEntry] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.refresh_errors = 0
+        # Hits whose background refresh did not reach Gemini either.
+        self.saved_upstream_calls = 0
+
+    @staticmethod
+    def session_key(session_id: str | None, question: str, conversation: str = "") -> str:
+        """Key by explicit session id, falling back to the normalized question and conversation.
+
+        Without a session id the conversation fingerprint keeps clients that ask
+        the same question in different conversations apart.
+        """
+        if session_id:
+            return f"session:{session_id}"
+        return "question:" + normalize_text(question) + ":" + fingerprint(conversation.strip())
+
+    def remember(
+        self,
+        key: str,
+        *,
+        question: str,
+        partial_answer: str,
+        suggestions: list[SuggestionBranch],
+        sentences: list[SentenceSuggestion],
+        conversation: str = "",
+    ) -> None:
+        entry = _TreeEntry(
+            question=normalize_text(question),
+            conversation=fingerprint(conversation.strip()),
+            base_words=_words(partial_answer),
+            suggestions=list(suggestions),
+            sentences=list(sentences),
+        )
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_sessions:
+                self._entries.popitem(last=False)
+
+    def lookup(
+        self,
+        key: str,
+        *,
+        question: str,
+        partial_answer: str,
+        limit: int,
+        conversation: str = "",
+    ) -> dict[str, list] | None:
+        """Return the subtree reached by the new words, or ``None`` on a miss.
+
+        The question and the conversation must both match the remembered tree.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry.stored_at > self._ttl:
+                del self._entries[key]
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+        result = self._walk(entry, question, conversation, partial_answer, limit) if entry else None
+        with self._lock:
+            if result is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return result
+
+    @staticmethod
+    def _walk(
+        entry: _TreeEntry,
+        question: str,
+        conversation: str,
+        partial_answer: str,
+        limit: int,
+    ) -> dict[str, list] | None:
+        if normalize_text(question) != entry.question or fingerprint(conversation.strip()) != entry.conversation:
+            return None
+        words = _words(partial_answer)
+        base = entry.base_words
+        if len(words) <= len(base) or words[: len(base)] != base:
+            return None
+        level = entry.suggestions
+        for word in words[len(base):]:
+            node = next((branch for branch in level if branch.word.casefold() == word), None)
+            if node is None:
+                return None
+            level = node.next
+        if not level:
+            return None
+        return {"suggestions": level[:limit], "sentences": list(entry.sentences)}
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "sessions": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "saved_upstream_calls": self.saved_upstream_calls,
+                "refreshes": self.refreshes,
+                "refresh_errors": self.refresh_errors,
+            }
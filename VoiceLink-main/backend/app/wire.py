@@ -0,0 +1,112 @@
+"""Compact, content-negotiated encodings of suggestion responses.
+
+The default response stays the nested ``SuggestionResponse`` JSON. Clients can
+opt in to a flat layout by sending one of the ``Accept`` media types below:
+
+``words``
+    Every word of the tree in pre-order (a node's subtree follows it directly).
+``parents``
+    Index into ``words`` of each word's parent, ``-1`` for root words.
+``sentences``
+    ``[style, text]`` pairs.
+"""
+
+from __future__ import annotations
+
+import gzip
+import json
+
+from fastapi.responses import Response
+
+from .prompts import SentenceSuggestion, SuggestionBranch
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - optional dependency
+    msgpack = None
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+COMPACT_JSON = "application/vnd.voicelink.compact+json"
+COMPACT_MSGPACK = "application/vnd.voicelink.compact+msgpack"
+COMPACT_VERSION = 1
+# Below this size compression costs more than the bytes it saves.
+COMPRESS_MIN_BYTES = 1024
+
+
+def flatten_tree(branches: list[SuggestionBranch]) -> tuple[list[str], list[int]]:
+    """Pre-order word list plus the parent index of each word."""
+    words: list[str] = []
+    parents: list[int] = []
+    stack = [(branch, -1) for branch in reversed(branches)]
+    while stack:
+        branch, parent = stack.pop()
+        index = len(words)
+        words.append(branch.word)
+        parents.append(parent)
+        stack.extend((child, index) for child in reversed(branch.next))
+    return words, parents
+
+
+def unflatten_tree(words: list[str], parents: list[int]) -> list[SuggestionBranch]:
+    """Inverse of ``flatten_tree``."""
+    nodes = [SuggestionBranch(word=word) for word in words]
+    roots: list[SuggestionBranch] = []
+    for node, parent in zip(nodes, parents):
+        (roots if parent < 0 else nodes[parent].next).append(node)
+    return roots
+
+
+def compact_payload(suggestions: list[SuggestionBranch], sentences: list[SentenceSuggestion]) -> dict:
+    words, parents = flatten_tree(suggestions)
+    return {
+        "v": COMPACT_VERSION,
+        "words": words,
+        "parents": parents,
+        "sentences": [[sentence.style, sentence.text] for sentence in sentences],
+    }
+
+
+def negotiate(accept: str | None) -> str | None:
+    """Pick the compact media type the client asked for, or ``None`` for the default JSON."""
+    if not accept:
+        return None
+    offered = {part.split(";")[0].strip().lower() for part in accept.split(",")}
+    if COMPACT_MSGPACK in offered and msgpack is not None:
+        return COMPACT_MSGPACK
+    if COMPACT_JSON in offered or COMPACT_MSGPACK in offered:
+        return COMPACT_JSON
+    return None
+
+
+def _pick_encoding(accept_encoding: str | None) -> str | None:
+    offered = {part.split(";")[0].strip().lower() for part in (accept_encoding or "").split(",")}
+    if "zstd" in offered and zstandard is not None:
+        return "zstd"
+    if "gzip" in offered:
+        return "gzip"
+    return None
+
+
+def compact_response(
+    result: dict[str, list],
+    media_type: str,
+    accept_encoding: str | None = None,
+) -> Response:
+    """Serialize ``result`` in the negotiated compact format, compressing larger bodies."""
+    payload = compact_payload(result["suggestions"], result["sentences"])
+    if media_type == COMPACT_MSGPACK:
+        body = msgpack.packb(payload, use_bin_type=True)
+    else:
+        body = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    headers = {"Vary": "Accept, Accept-Encoding"}
+    encoding = _pick_encoding(accept_encoding) if len(body) >= COMPRESS_MIN_BYTES else None
+    if encoding == "zstd":
+        body = zstandard.ZstdCompressor(level=3).compress(body)
+        headers["Content-Encoding"] = "zstd"
+    elif encoding == "gzip":
+        body = gzip.compress(body, compresslevel=5)
+        headers["Content-Encoding"] = "gzip"
+    return Response(content=body, media_type=media_type, headers=headers)
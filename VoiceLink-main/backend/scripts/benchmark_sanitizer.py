@@ -0,0 +1,110 @@
+"""Microbenchmark: iterative tree sanitizer vs the previous recursive one.
+
+    python scripts/benchmark_sanitizer.py [--width 4] [--depth 5] [--roots 12]
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import timeit
+from typing import Iterable
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.abspath(os.path.join(SCRIPT_DIR, ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from app.prompts import SuggestionBranch  # noqa: E402
+from app.service import _sanitize_suggestions  # noqa: E402
+
+VOCABULARY = ["yes", "no", "maybe", "the", "a", "coffee", "tea", "please", "now", "later", "I", "you"]
+
+
+def _legacy_sanitize_suggestions(branches: Iterable[SuggestionBranch], limit: int, *, max_depth: int = 4):
+    """The recursive, re-validating implementation this module replaced."""
+    sanitized = []
+    seen: set[str] = set()
+    for branch in branches:
+        cleaned = _legacy_sanitize_branch(branch, depth=1, max_depth=max_depth)
+        if cleaned is None:
+            continue
+        key = cleaned.word.lower()
+        if key in seen:
+            continue
+        seen.add(key)
+        sanitized.append(cleaned)
+        if len(sanitized) >= limit:
+            break
+    return sanitized
+
+
+def _legacy_sanitize_branch(branch: SuggestionBranch, *, depth: int, max_depth: int):
+    word = branch.word.strip()
+    if not word:
+        return None
+    children = []
+    if depth < max_depth:
+        child_seen: set[str] = set()
+        for child in branch.next:
+            cleaned_child = _legacy_sanitize_branch(child, depth=depth + 1, max_depth=max_depth)
+            if cleaned_child is None:
+                continue
+            key = cleaned_child.word.lower()
+            if key in child_seen:
+                continue
+            child_seen.add(key)
+            children.append(cleaned_child)
+    return SuggestionBranch(word=word, next=children)
+
+
+def synthetic_tree(roots: int, width: int, depth: int) -> list[SuggestionBranch]:
+    """Padded, partly duplicated words like a verbose model answer."""
+
+    def level(count: int, remaining: int, offset: int) -> list[SuggestionBranch]:
+        return [
+            SuggestionBranch(
+                word=f" {VOCABULARY[(offset + i) % len(VOCABULARY)]} ",
+                next=level(width, remaining - 1, offset + i + 1) if remaining > 1 else [],
+            )
+            for i in range(count)
+        ]
+
+    return level(roots, depth, 0)
+
+
+def _nodes(branches: list[SuggestionBranch]) -> int:
+    return sum(1 + _nodes(branch.next) for branch in branches)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--roots", type=int, default=12)
+    parser.add_argument("--width", type=int, default=4)
+    parser.add_argument("--depth", type=int, default=5)
+    parser.add_argument("--limit", type=int, default=5)
+    parser.add_argument("--max-children", type=int, default=3)
+    args = parser.parse_args()
+
+    tree = synthetic_tree(args.roots, args.width, args.depth)
+    print(f"input nodes: {_nodes(tree)}")
+    cases = [
+        ("recursive (previous)", lambda: _legacy_sanitize_suggestions(tree, args.limit)),
+        ("iterative", lambda: _sanitize_suggestions(tree, args.limit)),
+        (
+            f"iterative, max_children={args.max_children}",
+            lambda: _sanitize_suggestions(tree, args.limit, max_children=args.max_children),
+        ),
+    ]
+    assert cases[0][1]() == cases[1][1](), "implementations disagree"
+    print(f"{'implementation':<32}{'output nodes':>14}{'µs/call':>12}")
+    for name, run in cases:
+        timer = timeit.Timer(run)
+        number, _ = timer.autorange()
+        seconds = min(timer.repeat(repeat=5, number=number)) / number
+        print(f"{name:<32}{_nodes(run()):>14}{seconds * 1e6:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Compare prompt size and parse time of the format-instructions and structured-output modes.
+
+Runs offline by default (token counts estimated at ~4 characters per token).
+Pass ``--gemini`` with GOOGLE_API_KEY set to count tokens with Gemini instead.
+
+    python scripts/benchmark_structured_output.py [--repeat 3] [--gemini]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import timeit
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.abspath(os.path.join(SCRIPT_DIR, ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from app.context import approx_tokens  # noqa: E402
+from app.prompts import (  # noqa: E402
+    PROMPT_TEMPLATE,
+    STRUCTURED_PROMPT_TEMPLATE,
+    SUGGESTION_PARSER,
+    StructuredPayloadParser,
+    SuggestionPayload,
+)
+
+SAMPLE_INPUTS = {
+    "conversation": "guest: How was the weekend?\nuser: Pretty good, we went hiking.\nguest: Where did you go?",
+    "question": "Where did you go?",
+    "partial_answer": "We went to",
+    "suggestions_count": 5,
+}
+
+
+def _sample_payload() -> str:
+    def branch(word: str, depth: int) -> dict:
+        children = [] if depth == 4 else [branch(f"{word}{i}", depth + 1) for i in range(3 if depth < 3 else 2)]
+        return {"word": word, "next": children}
+
+    return json.dumps(
+        {
+            "suggestions": [branch(f"w{i}", 1) for i in range(5)],
+            "sentences": [
+                {"style": "smart", "text": "We went up to the lake trail near the ridge."},
+                {"style": "funny", "text": "We went wherever the snacks were."},
+                {"style": "casual", "text": "Just the usual spot by the lake."},
+            ],
+        }
+    )
+
+
+def _prompt_text(template) -> str:
+    return "\n".join(message.content for message in template.format_messages(**SAMPLE_INPUTS))
+
+
+def _count_tokens(text: str, use_gemini: bool) -> int:
+    if not use_gemini:
+        return approx_tokens(text)
+    from langchain_google_genai import ChatGoogleGenerativeAI
+
+    model = ChatGoogleGenerativeAI(model=os.environ.get("GEMINI_MODEL") or "gemini-2.0-flash")
+    return model.get_num_tokens(text)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=3, help="timing rounds per mode (best is reported)")
+    parser.add_argument("--gemini", action="store_true", help="count tokens with the Gemini API")
+    args = parser.parse_args()
+
+    payload = _sample_payload()
+    # The text-parsing mode usually gets the JSON back inside a markdown fence.
+    fenced = f"```json\n{payload}\n```"
+    structured_parser = StructuredPayloadParser(pydantic_object=SuggestionPayload)
+    modes = [
+        ("format_instructions", PROMPT_TEMPLATE, lambda: SUGGESTION_PARSER.parse(fenced)),
+        ("structured_output", STRUCTURED_PROMPT_TEMPLATE, lambda: structured_parser.parse(payload)),
+    ]
+
+    unit = "tokens" if args.gemini else "tokens (est.)"
+    print(f"{'mode':<22}{'prompt ' + unit:>22}{'parse µs':>12}")
+    for name, template, parse in modes:
+        tokens = _count_tokens(_prompt_text(template), args.gemini)
+        timer = timeit.Timer(parse)
+        number, _ = timer.autorange()
+        seconds = min(timer.repeat(repeat=args.repeat, number=number)) / number
+        print(f"{name:<22}{tokens:>22}{seconds * 1e6:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
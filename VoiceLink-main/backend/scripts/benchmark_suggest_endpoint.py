@@ -0,0 +1,152 @@
+"""Request CPU time of /suggest: single-pass parsing/encoding vs the previous handler.
+
+    python scripts/benchmark_suggest_endpoint.py [--requests 1000] [--width 4] [--depth 3]
+
+Both handlers run in bare apps around the same stub service, so the numbers only
+cover FastAPI routing, request validation and response serialization.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.abspath(os.path.join(SCRIPT_DIR, ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from fastapi import Body, FastAPI, Request, Response  # noqa: E402
+
+from app.main import _json_response, _parse_suggestion_request  # noqa: E402
+from app.prompts import SentenceSuggestion, SuggestionBranch  # noqa: E402
+from app.schemas import SuggestionRequest, SuggestionResponse  # noqa: E402
+
+
+def synthetic_result(width: int, depth: int) -> dict:
+    def level(prefix: str, remaining: int) -> list[SuggestionBranch]:
+        if remaining == 0:
+            return []
+        return [SuggestionBranch(word=f"{prefix}{i}", next=level(f"{prefix}{i}-", remaining - 1)) for i in range(width)]
+
+    return {
+        "suggestions": level("w", depth),
+        "sentences": [SentenceSuggestion(style=style, text=f"A {style} reply.") for style in ("smart", "funny")],
+    }
+
+
+class _StubService:
+    def __init__(self, result: dict) -> None:
+        self._result = result
+
+    async def apredict_next_words(self, **_: object) -> dict:
+        return self._result
+
+
+def legacy_app(service: _StubService) -> FastAPI:
+    """The previous handler: union body, manual re-validation, response_model re-validation."""
+    app = FastAPI()
+
+    @app.post("/suggest", response_model=SuggestionResponse)
+    async def suggest(payload: SuggestionRequest | dict | str = Body(...)) -> SuggestionResponse:
+        if isinstance(payload, str):
+            payload = json.loads(payload)
+        if isinstance(payload, dict):
+            payload = SuggestionRequest(**payload)
+        result = await service.apredict_next_words(question=payload.question)
+        return SuggestionResponse(suggestions=result["suggestions"], sentences=result["sentences"])
+
+    return app
+
+
+def single_pass_app(service: _StubService) -> FastAPI:
+    """The current handler: one validation of the raw body, one encode of the response."""
+    app = FastAPI()
+
+    @app.post("/suggest", response_model=SuggestionResponse)
+    async def suggest(request: Request) -> Response:
+        payload = _parse_suggestion_request(await request.body())
+        result = await service.apredict_next_words(question=payload.question)
+        return _json_response(result)
+
+    return app
+
+
+async def _call(app: FastAPI, body: bytes) -> tuple[int, bytes]:
+    """Drive the ASGI app directly so client overhead stays out of the numbers."""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": "/suggest",
+        "raw_path": b"/suggest",
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+        "client": ("127.0.0.1", 1),
+        "server": ("127.0.0.1", 80),
+    }
+    messages = [{"type": "http.request", "body": body, "more_body": False}]
+    sent: list[dict] = []
+
+    async def receive() -> dict:
+        return messages.pop() if messages else {"type": "http.disconnect"}
+
+    async def send(message: dict) -> None:
+        sent.append(message)
+
+    await app(scope, receive, send)
+    return sent[0]["status"], b"".join(message.get("body", b"") for message in sent[1:])
+
+
+async def measure(app: FastAPI, body: bytes, requests: int, repeat: int = 5) -> float:
+    """Best-of-``repeat`` process CPU time per request."""
+    for _ in range(50):
+        await _call(app, body)
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.process_time()
+        for _ in range(requests):
+            status, content = await _call(app, body)
+        best = min(best, time.process_time() - start)
+        assert status == 200, content
+    return best / requests
+
+
+async def run(args: argparse.Namespace) -> None:
+    service = _StubService(synthetic_result(args.width, args.depth))
+    document = {
+        "question": "Would you like some tea?",
+        "partial_answer": "Yes",
+        "conversation": "guest: Would you like some tea?",
+    }
+    bodies = {"object": json.dumps(document).encode(), "stringified": json.dumps(json.dumps(document)).encode()}
+    apps = {"previous": legacy_app(service), "single-pass": single_pass_app(service)}
+    previous = await _call(apps["previous"], bodies["object"])
+    current = await _call(apps["single-pass"], bodies["object"])
+    assert json.loads(previous[1]) == json.loads(current[1]), "handlers disagree"
+
+    print(f"{'handler':<14}{'body':<14}{'CPU µs/request':>16}")
+    for body_name, body in bodies.items():
+        for app_name, app in apps.items():
+            seconds = await measure(app, body, args.requests)
+            print(f"{app_name:<14}{body_name:<14}{seconds * 1e6:>16.0f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--width", type=int, default=4)
+    parser.add_argument("--depth", type=int, default=3)
+    args = parser.parse_args()
+
+    asyncio.run(run(args))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Tests for batched suggestion requests."""
+
+import asyncio
+from dataclasses import dataclass
+
+from google.api_core.exceptions import ServiceUnavailable
+
+from app.prompts import SentenceSuggestion, SuggestionBranch, SuggestionPayload
+from app.response_cache import ResponseCache
+from app.service import AutocompleteService
+
+
+@dataclass
+class DummySettings:
+    google_api_key: str = "test-key"
+    gemini_model: str = "gemini-2.5-flash"
+    suggestions_count: int = 5
+
+
+class ConcurrencyChain:
+    def __init__(self) -> None:
+        self.active = 0
+        self.peak = 0
+        self.calls = 0
+
+    async def ainvoke(self, inputs: dict) -> SuggestionPayload:
+        self.calls += 1
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(0.01)
+            if inputs["question"] == "fail?":
+                raise ServiceUnavailable("down")
+            return SuggestionPayload(
+                suggestions=[SuggestionBranch(word=inputs["question"].rstrip("?"))],
+                sentences=[SentenceSuggestion(style="smart", text="Sure.")],
+            )
+        finally:
+            self.active -= 1
+
+
+def test_batch_keeps_order_bounds_concurrency_and_returns_errors_in_place() -> None:
+    chain = ConcurrencyChain()
+    service = AutocompleteService(settings=DummySettings(), chain=chain)
+    requests = [{"question": f"q{i}?", "partial_answer": ""} for i in range(6)]
+    requests.insert(2, {"question": "fail?", "partial_answer": ""})
+
+    results = asyncio.run(service.apredict_many(requests, max_concurrency=2))
+
+    assert chain.peak == 2
+    assert isinstance(results[2], ServiceUnavailable)
+    words = [r["suggestions"][0].word for i, r in enumerate(results) if i != 2]
+    assert words == [f"q{i}" for i in range(6)]
+
+
+def test_batch_shares_the_response_cache() -> None:
+    chain = ConcurrencyChain()
+    service = AutocompleteService(settings=DummySettings(), chain=chain, response_cache=ResponseCache())
+
+    async def scenario() -> None:
+        await service.apredict_next_words(question="tea?", partial_answer="")
+        await service.apredict_many([{"question": "Tea?", "partial_answer": ""}, {"question": "milk?", "partial_answer": ""}])
+
+    asyncio.run(scenario())
+
+    assert chain.calls == 2
@@ -0,0 +1,131 @@
+"""Tests for per-model circuit breakers."""
+
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+from langchain_core.runnables import RunnableLambda
+from google.api_core.exceptions import InternalServerError, NotFound, ResourceExhausted, ServiceUnavailable
+
+from app.breaker import CLOSED, HALF_OPEN, OPEN, BreakerBoard, BreakerPolicy, CircuitBreaker
+from app.prompts import _FallbackSuggestionChain, _compose
+
+
+class FlakyChain:
+    def __init__(self, name: str, *, error: Exception | None = None, delay: float = 0.0) -> None:
+        self.bound = SimpleNamespace(kwargs={"model": name})
+        self.error = error
+        self.delay = delay
+        self.calls = 0
+
+    async def ainvoke(self, _: dict) -> str:
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        return self.bound.kwargs["model"]
+
+    def invoke(self, _: dict) -> str:
+        self.calls += 1
+        if self.error is not None:
+            raise self.error
+        return self.bound.kwargs["model"]
+
+
+def test_breaker_state_machine() -> None:
+    breaker = CircuitBreaker("m", BreakerPolicy(failure_threshold=2, reset_seconds=0.05))
+    breaker.record_failure(InternalServerError("boom"))
+    assert breaker.state == CLOSED
+    breaker.record_failure(InternalServerError("boom"))
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+
+    time.sleep(0.06)
+    assert breaker.allow()  # half-open trial
+    assert breaker.state == HALF_OPEN
+    assert not breaker.allow()  # only one trial at a time
+    breaker.record_failure(InternalServerError("still broken"))
+    assert breaker.state == OPEN
+
+    time.sleep(0.06)
+    assert breaker.probe_due()
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    assert breaker.snapshot()["trips"] == 2
+
+
+def test_open_model_is_skipped() -> None:
+    board = BreakerBoard(BreakerPolicy(failure_threshold=1, reset_seconds=60))
+    missing = FlakyChain("missing", error=NotFound("gone"))
+    ok = FlakyChain("ok")
+    chain = _FallbackSuggestionChain([missing, ok], breakers=board)
+
+    assert asyncio.run(chain.ainvoke({})) == "ok"
+    assert asyncio.run(chain.ainvoke({})) == "ok"
+    assert missing.calls == 1
+    assert board.snapshot()["missing"]["state"] == OPEN
+    assert board.snapshot()["missing"]["skipped"] == 1
+
+
+def test_timeout_trips_and_all_open_fails_fast() -> None:
+    board = BreakerBoard(BreakerPolicy(failure_threshold=1, reset_seconds=60, timeout_seconds=0.01))
+    slow = FlakyChain("slow", delay=1.0)
+    chain = _FallbackSuggestionChain([slow], breakers=board)
+
+    with pytest.raises(Exception, match="did not answer"):
+        asyncio.run(chain.ainvoke({}))
+    with pytest.raises(ServiceUnavailable):
+        asyncio.run(chain.ainvoke({}))
+    assert slow.calls == 1
+
+
+def test_probe_closes_recovered_model() -> None:
+    board = BreakerBoard(BreakerPolicy(failure_threshold=1, reset_seconds=0.0))
+    flaky = FlakyChain("flaky", error=InternalServerError("boom"))
+    chain = _FallbackSuggestionChain([flaky], breakers=board)
+    with pytest.raises(InternalServerError):
+        chain.invoke({})
+    assert board.snapshot()["flaky"]["state"] == OPEN
+
+    flaky.error = None
+    asyncio.run(chain.probe_open_models())
+    assert board.snapshot()["flaky"]["state"] == CLOSED
+
+
+def test_quota_errors_do_not_open_the_circuit() -> None:
+    board = BreakerBoard(BreakerPolicy(failure_threshold=1, reset_seconds=60))
+    limited = FlakyChain("limited", error=ResourceExhausted("quota"))
+    chain = _FallbackSuggestionChain([limited], breakers=board)
+
+    for _ in range(3):
+        with pytest.raises(ResourceExhausted):
+            asyncio.run(chain.ainvoke({}))
+    assert limited.calls == 3
+    assert board.snapshot()["limited"]["state"] == CLOSED
+
+
+@pytest.mark.parametrize("error", [ValueError("bad request body"), RuntimeError("transport closed")])
+def test_any_error_in_a_half_open_trial_settles_the_breaker(error: Exception) -> None:
+    board = BreakerBoard(BreakerPolicy(failure_threshold=1, reset_seconds=0.01))
+    flaky = FlakyChain("flaky", error=error)
+    chain = _FallbackSuggestionChain([flaky, FlakyChain("ok")], breakers=board)
+    board.get("flaky").record_failure(InternalServerError("boom"))
+    time.sleep(0.02)
+
+    with pytest.raises(type(error)):
+        chain.invoke({})
+    assert board.snapshot()["flaky"]["state"] == OPEN
+
+    time.sleep(0.02)
+    flaky.error = None
+    assert asyncio.run(chain.ainvoke({})) == "flaky"
+    assert board.snapshot()["flaky"]["state"] == CLOSED
+
+
+def test_single_model_is_not_gated_by_a_breaker() -> None:
+    step = RunnableLambda(lambda value: value)
+
+    chain = _compose([step], step, step, breakers=BreakerBoard())
+
+    assert not isinstance(chain, _FallbackSuggestionChain)
@@ -0,0 +1,133 @@
+"""Tests for token-budgeted conversation windowing."""
+
+import asyncio
+from dataclasses import dataclass
+
+from app.context import RECENT_HEADER, SUMMARY_HEADER, ConversationWindow, approx_tokens
+from app.prompts import SentenceSuggestion, SuggestionBranch, SuggestionPayload
+from app.service import AutocompleteService
+
+
+@dataclass
+class DummySettings:
+    google_api_key: str = "test-key"
+    gemini_model: str = "gemini-2.5-flash"
+    suggestions_count: int = 5
+
+
+class RecordingChain:
+    def __init__(self) -> None:
+        self.conversations: list[str] = []
+
+    async def ainvoke(self, inputs: dict) -> SuggestionPayload:
+        self.conversations.append(inputs["conversation"])
+        return SuggestionPayload(
+            suggestions=[SuggestionBranch(word="yes")],
+            sentences=[SentenceSuggestion(style="smart", text="Yes.")],
+        )
+
+
+def _transcript(turns: int) -> str:
+    return "\n".join(
+        f"{'Partner' if i % 2 else 'User'}: turn {i} " + "with some extra words " * 5 for i in range(turns)
+    )
+
+
+def test_short_conversation_is_untouched() -> None:
+    window = ConversationWindow(keep_turns=4)
+    conversation = _transcript(3)
+
+    result = window.prepare("s", conversation)
+
+    assert result.text == conversation
+    assert result.tokens_before == result.tokens_after
+
+
+def test_many_turns_within_budget_are_untouched() -> None:
+    window = ConversationWindow(keep_turns=2, token_budget=800)
+    conversation = _transcript(12)
+
+    result = window.prepare("s", conversation)
+
+    assert result.text == conversation
+    assert result.summarized_turns == 0
+    assert window.stats()["trimmed"] == 0
+
+
+def test_long_conversation_fits_budget_and_keeps_recent_turns() -> None:
+    window = ConversationWindow(keep_turns=4, token_budget=200, summary_token_budget=60)
+    conversation = _transcript(30)
+
+    result = window.prepare("s", conversation)
+
+    assert result.tokens_before > 200
+    assert result.tokens_after <= 200
+    assert approx_tokens(result.text) == result.tokens_after
+    assert SUMMARY_HEADER in result.text and RECENT_HEADER in result.text
+    assert conversation.splitlines()[-1].strip() in result.text
+    assert result.summarized_turns >= 26
+
+
+def test_summary_is_reused_as_the_transcript_grows() -> None:
+    window = ConversationWindow(keep_turns=2, token_budget=400, summary_token_budget=150)
+
+    window.prepare("s", _transcript(14))
+    window.prepare("s", _transcript(15))
+    window.prepare("other", _transcript(15))
+
+    stats = window.stats()
+    assert stats["summary_reuses"] == 1
+    assert stats["trimmed"] == 3
+    assert stats["prompt_tokens_after"] < stats["prompt_tokens_before"]
+
+
+def test_service_sends_windowed_conversation_and_reports_tokens() -> None:
+    chain = RecordingChain()
+    service = AutocompleteService(
+        settings=DummySettings(),
+        chain=chain,
+        context_window=ConversationWindow(keep_turns=3, token_budget=150, summary_token_budget=40),
+    )
+
+    asyncio.run(
+        service.apredict_next_words(question="Hi?", partial_answer="", conversation=_transcript(20))
+    )
+
+    assert approx_tokens(chain.conversations[0]) <= 150
+    context = service.stats()["context"]
+    assert context["prompt_tokens_before"] > context["prompt_tokens_after"]
+
+
+class CountingTurns(list):
+    """A transcript that records which turns were read."""
+
+    def __init__(self, lines: list[str]) -> None:
+        super().__init__(lines)
+        self.read: set[int] = set()
+
+    def __getitem__(self, index):
+        self.read.add(index)
+        return super().__getitem__(index)
+
+
+def test_session_turns_are_windowed_like_the_transcript() -> None:
+    lines = _transcript(30).splitlines()
+    by_text = ConversationWindow(keep_turns=4, token_budget=200, summary_token_budget=60)
+    by_turns = ConversationWindow(keep_turns=4, token_budget=200, summary_token_budget=60)
+
+    expected = by_text.prepare("s", "\n".join(lines))
+    result = by_turns.prepare_turns("s", lines, first_index=0, chars=sum(map(len, lines)))
+
+    assert result == expected
+
+
+def test_growing_session_only_reads_new_turns() -> None:
+    window = ConversationWindow(keep_turns=2, token_budget=400, summary_token_budget=150)
+    lines = _transcript(40).splitlines()
+    window.prepare_turns("s", lines[:30], first_index=0, chars=sum(map(len, lines[:30])))
+
+    turns = CountingTurns(lines[:32])
+    window.prepare_turns("s", turns, first_index=0, chars=sum(map(len, turns)))
+
+    assert turns.read == {28, 29, 30, 31}
+    assert window.stats()["summary_reuses"] == 1
@@ -0,0 +1,86 @@
+"""Tests for the persistent, single-flight model discovery cache."""
+
+import asyncio
+import json
+import threading
+import time
+
+from app.discovery import ModelDiscovery
+
+
+class Lister:
+    def __init__(self, models=("gemini-2.0-flash",), *, delay: float = 0.0) -> None:
+        self.models = list(models)
+        self.delay = delay
+        self.calls = 0
+        self.fail = False
+
+    def __call__(self, api_key: str) -> list[str]:
+        self.calls += 1
+        time.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("network down")
+        return self.models
+
+
+def test_concurrent_cold_lookups_list_once() -> None:
+    lister = Lister(delay=0.05)
+    discovery = ModelDiscovery(lister)
+
+    async def burst():
+        return await asyncio.gather(*(discovery.aget("key") for _ in range(10)))
+
+    results = asyncio.run(burst())
+    threads = [threading.Thread(target=discovery.get, args=("key",)) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert all(result == ["gemini-2.0-flash"] for result in results)
+    assert lister.calls == 1
+
+
+def test_lists_persist_across_instances_without_the_key(tmp_path) -> None:
+    path = tmp_path / "models.json"
+    ModelDiscovery(Lister(), cache_path=path).get("secret-key")
+
+    lister = Lister(["other"])
+    restarted = ModelDiscovery(lister, cache_path=path)
+
+    assert restarted.get("secret-key") == ["gemini-2.0-flash"]
+    assert lister.calls == 0
+    assert "secret-key" not in path.read_text()
+    assert json.loads(path.read_text())["v"] == 1
+
+
+def test_failed_refresh_keeps_serving_the_last_good_list() -> None:
+    lister = Lister()
+    discovery = ModelDiscovery(lister, ttl_seconds=0.01)
+    discovery.get("key")
+    time.sleep(0.02)
+    lister.fail = True
+
+    assert discovery.get("key") == ["gemini-2.0-flash"]
+    for _ in range(100):
+        if discovery.failures:
+            break
+        time.sleep(0.01)
+
+    assert discovery.failures == 1
+    assert discovery.get("key") == ["gemini-2.0-flash"]
+    assert discovery.stats()["stale_served"] == 2
+
+
+def test_cold_failure_is_not_cached_but_retries_are_spaced() -> None:
+    lister = Lister()
+    lister.fail = True
+    discovery = ModelDiscovery(lister, retry_seconds=0.05)
+
+    assert discovery.get("key") == []
+    assert discovery.get("key") == []
+    assert lister.calls == 1
+
+    time.sleep(0.06)
+    lister.fail = False
+    assert discovery.get("key") == ["gemini-2.0-flash"]
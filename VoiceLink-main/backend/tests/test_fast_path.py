@@ -0,0 +1,45 @@
+"""Tests for the single-pass /suggest request parsing and response encoding."""
+
+import json
+
+import pytest
+from fastapi import HTTPException
+
+from app.main import _json_response, _parse_suggestion_request
+from app.prompts import SentenceSuggestion, SuggestionBranch
+from app.schemas import SuggestionResponse
+
+
+def test_object_and_stringified_bodies_parse_to_the_same_request() -> None:
+    document = {"question": "Tea?", "partial_answer": "Yes", "suggestions_count": 3}
+    raw = json.dumps(document).encode()
+
+    direct = _parse_suggestion_request(raw)
+    wrapped = _parse_suggestion_request(json.dumps(raw.decode()).encode())
+
+    assert direct == wrapped
+    assert direct.suggestions_count == 3
+
+
+def test_invalid_bodies_are_422() -> None:
+    with pytest.raises(HTTPException) as not_json:
+        _parse_suggestion_request(b'"{not json"')
+    with pytest.raises(HTTPException) as bad_field:
+        _parse_suggestion_request(b'{"suggestions_count": "many"}')
+
+    assert not_json.value.status_code == 422
+    assert not_json.value.detail == "Body is a string but not valid JSON."
+    assert bad_field.value.status_code == 422
+    assert isinstance(bad_field.value.detail, list)
+
+
+def test_response_bytes_match_the_response_model() -> None:
+    result = {
+        "suggestions": [SuggestionBranch(word="Yes", next=[SuggestionBranch(word="please")])],
+        "sentences": [SentenceSuggestion(style="smart", text="Yes, please.")],
+    }
+
+    response = _json_response(result)
+
+    assert response.media_type == "application/json"
+    assert SuggestionResponse.model_validate_json(response.body) == SuggestionResponse(**result)
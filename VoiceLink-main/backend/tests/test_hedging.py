@@ -0,0 +1,115 @@
+"""Tests for hedged requests across fallback models."""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from google.api_core.exceptions import NotFound
+
+from app.breaker import BreakerBoard, BreakerPolicy
+from app.hedging import HedgePolicy, LatencyWindow, hedge_delay
+from app.prompts import _FallbackSuggestionChain
+from app.rate_limit import AdmissionController
+
+
+class TimedChain:
+    def __init__(self, name: str, delay: float, *, error: Exception | None = None) -> None:
+        self.bound = SimpleNamespace(kwargs={"model": name})
+        self._delay = delay
+        self._error = error
+        self.started = 0
+        self.cancelled = 0
+
+    async def ainvoke(self, _: dict) -> str:
+        self.started += 1
+        try:
+            await asyncio.sleep(self._delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        if self._error is not None:
+            raise self._error
+        return self.bound.kwargs["model"]
+
+
+def test_hedge_delay_uses_rolling_percentile() -> None:
+    policy = HedgePolicy(min_samples=3, min_delay_seconds=0.0, initial_delay_seconds=9.0)
+    window = LatencyWindow(10)
+    assert hedge_delay(policy, window) == 9.0
+    for seconds in (0.1, 0.2, 0.3, 1.0):
+        window.add(seconds)
+    assert hedge_delay(policy, window) == 1.0
+    assert hedge_delay(HedgePolicy(delay_seconds=0.5), window) == 0.5
+
+
+def test_slow_primary_is_hedged_and_cancelled() -> None:
+    slow = TimedChain("slow", 1.0)
+    fast = TimedChain("fast", 0.01)
+    chain = _FallbackSuggestionChain(
+        [slow, fast],
+        hedge=HedgePolicy(delay_seconds=0.02, max_hedge_ratio=1.0),
+    )
+
+    assert asyncio.run(chain.ainvoke({})) == "fast"
+    assert slow.cancelled == 1
+    stats = chain.stats()
+    assert stats["hedges"] == 1
+    assert stats["wins"] == {"slow": 0, "fast": 1}
+
+
+def test_hedge_budget_limits_extra_calls() -> None:
+    slow = TimedChain("slow", 0.05)
+    fast = TimedChain("fast", 0.0)
+    chain = _FallbackSuggestionChain(
+        [slow, fast],
+        hedge=HedgePolicy(delay_seconds=0.0, max_hedge_ratio=0.0),
+    )
+
+    assert asyncio.run(chain.ainvoke({})) == "slow"
+    assert fast.started == 0
+    assert chain.stats()["hedge_rate"] == 0.0
+
+
+def test_hedge_needs_rate_limiter_capacity() -> None:
+    slow = TimedChain("slow", 0.05)
+    fast = TimedChain("fast", 0.0)
+    admission = AdmissionController(rpm=1)
+    assert admission.try_acquire()  # the primary call's slot
+    chain = _FallbackSuggestionChain(
+        [slow, fast],
+        hedge=HedgePolicy(delay_seconds=0.0, max_hedge_ratio=1.0),
+        admission=admission,
+    )
+
+    assert asyncio.run(chain.ainvoke({})) == "slow"
+    assert fast.started == 0
+    stats = chain.stats()
+    assert stats["hedges"] == 0
+    assert stats["hedges_denied"] == 1
+
+
+def test_hedge_is_not_counted_without_a_candidate() -> None:
+    slow = TimedChain("slow", 0.05)
+    broken = TimedChain("broken", 0.0)
+    board = BreakerBoard(BreakerPolicy(failure_threshold=1, reset_seconds=60))
+    board.get("broken").record_failure(RuntimeError("down"))
+    chain = _FallbackSuggestionChain(
+        [slow, broken],
+        hedge=HedgePolicy(delay_seconds=0.0, max_hedge_ratio=1.0),
+        breakers=board,
+    )
+
+    assert asyncio.run(chain.ainvoke({})) == "slow"
+    assert broken.started == 0
+    assert chain.stats()["hedges"] == 0
+
+
+def test_not_found_moves_on_and_exhaustion_raises() -> None:
+    missing = TimedChain("missing", 0.0, error=NotFound("gone"))
+    ok = TimedChain("ok", 0.0)
+    chain = _FallbackSuggestionChain([missing, ok], hedge=HedgePolicy(delay_seconds=5.0))
+    assert asyncio.run(chain.ainvoke({})) == "ok"
+
+    chain = _FallbackSuggestionChain([missing, missing], hedge=HedgePolicy(delay_seconds=5.0))
+    with pytest.raises(RuntimeError, match="No Gemini model succeeded"):
+        asyncio.run(chain.ainvoke({}))
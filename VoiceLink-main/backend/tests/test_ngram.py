@@ -0,0 +1,142 @@
+"""Tests for the local n-gram next-word tier."""
+
+import asyncio
+from dataclasses import dataclass
+
+import pytest
+from google.api_core.exceptions import ResourceExhausted
+
+from app.ngram import NGramModel
+from app.prompts import SentenceSuggestion, SuggestionBranch, SuggestionPayload
+from app.rate_limit import RateLimitExceeded
+from app.response_cache import ResponseCache
+from app.service import AutocompleteService
+
+
+@dataclass
+class DummySettings:
+    google_api_key: str = "test-key"
+    gemini_model: str = "gemini-2.5-flash"
+    suggestions_count: int = 5
+
+
+class FixedChain:
+    def __init__(self, *words: str, error: Exception | None = None) -> None:
+        self.words = words
+        self.error = error
+        self.calls = 0
+
+    async def ainvoke(self, inputs: dict) -> SuggestionPayload:
+        self.calls += 1
+        if self.error is not None:
+            raise self.error
+        return SuggestionPayload(
+            suggestions=[SuggestionBranch(word=word) for word in self.words],
+            sentences=[SentenceSuggestion(style="smart", text="Sure.")],
+        )
+
+
+def test_predicts_with_backoff_and_builds_a_tree() -> None:
+    model = NGramModel(order=3)
+    model.train("I want tea. I want coffee. I want tea now. You want cake.")
+
+    assert model.predict(["i", "want"], 2) == ["tea", "coffee"]
+    assert model.predict(["we", "want"], 1) == ["tea"]
+    tree = model.suggest("", count=2, width=2, depth=2)
+    assert tree[0].word == "I"
+    assert [child.word for child in tree[0].next] == ["want"]
+
+
+def test_compact_format_round_trips() -> None:
+    model = NGramModel.load()
+    model.train("Want some tea? Yes please, Earl Grey tea.")
+
+    restored = NGramModel.from_bytes(model.to_bytes())
+
+    assert restored.predict(["earl"], 1) == ["grey"]
+    assert restored.suggest("I would", count=3) == model.suggest("I would", count=3)
+
+
+def test_instant_mode_answers_locally_and_warms_the_cache() -> None:
+    chain = FixedChain("gemini")
+    service = AutocompleteService(
+        settings=DummySettings(),
+        chain=chain,
+        response_cache=ResponseCache(),
+        local_model=NGramModel.load(),
+    )
+
+    async def scenario() -> tuple[dict, dict]:
+        first = await service.apredict_next_words(question="Hi?", partial_answer="I am", instant=True)
+        await asyncio.sleep(0.01)
+        second = await service.apredict_next_words(question="Hi?", partial_answer="I am")
+        return first, second
+
+    first, second = asyncio.run(scenario())
+
+    assert first["sentences"] == [] and first["suggestions"]
+    assert [branch.word for branch in second["suggestions"]] == ["gemini"]
+    assert chain.calls == 1
+
+
+def test_local_tree_is_served_when_gemini_is_rate_limited() -> None:
+    service = AutocompleteService(
+        settings=DummySettings(),
+        chain=FixedChain(error=ResourceExhausted("quota")),
+        local_model=NGramModel.load(),
+        local_fallback=True,
+    )
+
+    result = asyncio.run(service.apredict_next_words(question="Hi?", partial_answer="thank"))
+
+    assert result["suggestions"][0].word == "you"
+    assert service.stats()["local_model"]["fallbacks"] == 1
+
+
+@pytest.mark.parametrize(
+    ("error", "fallback"),
+    [
+        (ResourceExhausted("quota"), False),
+        (RateLimitExceeded("Local rate limit reached.", retry_after=1.0), True),
+        (ResourceExhausted("Quota exceeded, limit: 0"), True),
+    ],
+)
+def test_errors_surface_unless_the_fallback_applies(error: Exception, fallback: bool) -> None:
+    service = AutocompleteService(
+        settings=DummySettings(),
+        chain=FixedChain(error=error),
+        local_model=NGramModel.load(),
+        local_fallback=fallback,
+    )
+
+    with pytest.raises(ResourceExhausted):
+        asyncio.run(service.apredict_next_words(question="Hi?", partial_answer="thank"))
+    assert service.stats()["local_model"]["fallbacks"] == 0
+
+
+def test_only_opted_in_replies_train_the_shared_model() -> None:
+    model = NGramModel()
+    service = AutocompleteService(settings=DummySettings(), chain=FixedChain("ok"), local_model=model)
+
+    asyncio.run(service.apredict_next_words(question="Hi?", partial_answer="", conversation="guest: my pin is 4321"))
+    service.learn_reply("alice", "Earl Grey please")
+    assert model.trained_tokens == 0
+
+    learning = AutocompleteService(
+        settings=DummySettings(), chain=FixedChain("ok"), local_model=model, local_learn=True
+    )
+    learning.learn_reply("alice", "Earl Grey please")
+    assert model.predict(["earl"], 1) == ["grey"]
+
+
+def test_merge_reserves_a_slot_for_local_words() -> None:
+    service = AutocompleteService(
+        settings=DummySettings(),
+        chain=FixedChain("a", "b", "c", "d", "e"),
+        local_model=NGramModel.load(),
+        local_mode="merge",
+    )
+
+    result = asyncio.run(service.apredict_next_words(question="Hi?", partial_answer="thank"))
+
+    assert [branch.word for branch in result["suggestions"]] == ["a", "b", "c", "d", "you"]
@@ -0,0 +1,103 @@
+"""Tests for per-user vocabulary re-ranking."""
+
+import asyncio
+from dataclasses import dataclass
+
+from app.personal import PersonalVocabulary, VocabularyTrie
+from app.prompts import SentenceSuggestion, SuggestionBranch, SuggestionPayload
+from app.response_cache import ResponseCache
+from app.service import AutocompleteService
+from app.text import fingerprint
+
+
+@dataclass
+class DummySettings:
+    google_api_key: str = "test-key"
+    gemini_model: str = "gemini-2.5-flash"
+    suggestions_count: int = 5
+
+
+class TreeChain:
+    async def ainvoke(self, inputs: dict) -> SuggestionPayload:
+        return SuggestionPayload(
+            suggestions=[
+                SuggestionBranch(word="coffee", next=[SuggestionBranch(word="please"), SuggestionBranch(word="now")]),
+                SuggestionBranch(word="tea", next=[SuggestionBranch(word="please"), SuggestionBranch(word="now")]),
+                SuggestionBranch(word="water"),
+            ],
+            sentences=[SentenceSuggestion(style="smart", text="Sure.")],
+        )
+
+
+def _words(branches: list[SuggestionBranch]) -> list[str]:
+    return [branch.word for branch in branches]
+
+
+def test_trie_counts_follow_the_longest_known_suffix() -> None:
+    trie = VocabularyTrie()
+    trie.learn("I want tea now. I want tea now. I want juice.")
+
+    assert trie.next_counts(["i", "want"]) == {"tea": 2, "juice": 1}
+    assert trie.next_counts(["we", "want"]) == {"tea": 2, "juice": 1}
+    assert trie.next_counts([]) == {"i": 3}
+
+
+def test_reranks_roots_and_children_and_injects_frequent_words() -> None:
+    vocabulary = PersonalVocabulary(inject=1, min_count=2)
+    for _ in range(2):
+        vocabulary.learn("u1", "I want tea now")
+        vocabulary.learn("u1", "I want juice")
+    service = AutocompleteService(
+        settings=DummySettings(),
+        chain=TreeChain(),
+        response_cache=ResponseCache(),
+        vocabulary=vocabulary,
+    )
+
+    async def scenario() -> tuple[dict, dict]:
+        mine = await service.apredict_next_words(question="Drink?", partial_answer="I want", user_id="u1")
+        shared = await service.apredict_next_words(question="Drink?", partial_answer="I want")
+        return mine, shared
+
+    mine, shared = asyncio.run(scenario())
+
+    assert _words(mine["suggestions"]) == ["tea", "juice", "coffee", "water"]
+    assert _words(mine["suggestions"][0].next) == ["now", "please"]
+    assert _words(shared["suggestions"]) == ["coffee", "tea", "water"]
+    assert _words(shared["suggestions"][1].next) == ["please", "now"]
+
+
+def test_vocabulary_persists_per_user(tmp_path) -> None:
+    vocabulary = PersonalVocabulary(directory=tmp_path)
+    vocabulary.learn("user/1", "Call Maria please")
+    vocabulary.flush()
+
+    restored = PersonalVocabulary(directory=tmp_path, min_count=1)
+    asyncio.run(restored.aload("user/1"))
+    ranked = restored.personalize("user/1", "call", [SuggestionBranch(word="mom")], limit=2)
+
+    assert _words(ranked) == ["Maria", "mom"]
+    assert [path.name for path in tmp_path.iterdir()] == [f"{fingerprint('user/1')}.json.gz"]
+
+
+def test_unknown_user_ids_do_not_evict_real_users(tmp_path) -> None:
+    vocabulary = PersonalVocabulary(directory=tmp_path, max_users=1, min_count=1)
+    vocabulary.learn("alice", "Call Maria please")
+    branches = [SuggestionBranch(word="mom")]
+
+    for index in range(5):
+        asyncio.run(vocabulary.aload(f"stranger-{index}"))
+        assert vocabulary.personalize(f"stranger-{index}", "call", branches, limit=2) == branches
+
+    assert vocabulary.stats()["users"] == 1
+    assert _words(vocabulary.personalize("alice", "call", branches, limit=2)) == ["Maria", "mom"]
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_similar_user_ids_get_separate_files(tmp_path) -> None:
+    vocabulary = PersonalVocabulary(directory=tmp_path)
+    for user_id in ("a.b", "a/b", "a_b"):
+        vocabulary.learn(user_id, f"hello {user_id}")
+    vocabulary.flush()
+
+    assert len(list(tmp_path.iterdir())) == 3
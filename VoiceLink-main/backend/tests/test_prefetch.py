@@ -0,0 +1,98 @@
+"""Tests for speculative prefetch of likely word picks."""
+
+import asyncio
+from dataclasses import dataclass
+
+from app.prefetch import Prefetcher
+from app.prompts import SentenceSuggestion, SuggestionBranch, SuggestionPayload
+from app.rate_limit import AdmissionController
+from app.response_cache import ResponseCache
+from app.service import AutocompleteService
+from app.singleflight import SingleFlight
+
+
+@dataclass
+class DummySettings:
+    google_api_key: str = "test-key"
+    gemini_model: str = "gemini-2.5-flash"
+    suggestions_count: int = 5
+
+
+class EchoChain:
+    """Returns root words derived from the partial answer so each level is distinct."""
+
+    def __init__(self, delay: float = 0.0) -> None:
+        self.partials: list[str] = []
+        self.delay = delay
+
+    async def ainvoke(self, inputs: dict) -> SuggestionPayload:
+        self.partials.append(inputs["partial_answer"])
+        await asyncio.sleep(self.delay)
+        level = len(inputs["partial_answer"].split())
+        return SuggestionPayload(
+            suggestions=[SuggestionBranch(word=f"w{level}a"), SuggestionBranch(word=f"w{level}b")],
+            sentences=[SentenceSuggestion(style="smart", text="Okay.")],
+        )
+
+
+def _service(chain: EchoChain, **prefetch) -> AutocompleteService:
+    return AutocompleteService(
+        settings=DummySettings(),
+        chain=chain,
+        response_cache=ResponseCache(),
+        singleflight=SingleFlight(),
+        prefetcher=Prefetcher(**prefetch),
+    )
+
+
+def test_prefetched_pick_is_served_from_cache() -> None:
+    chain = EchoChain()
+    service = _service(chain, top_k=1)
+
+    async def scenario() -> dict:
+        await service.apredict_next_words(question="Hi?", partial_answer="", session_id="s")
+        await asyncio.sleep(0.01)
+        return await service.apredict_next_words(question="Hi?", partial_answer="w0a", session_id="s")
+
+    result = asyncio.run(scenario())
+
+    assert chain.partials[:2] == ["", "w0a"]
+    assert [b.word for b in result["suggestions"]] == ["w1a", "w1b"]
+    assert service.stats()["response_cache"]["hits"] == 1
+
+
+def test_unpicked_prefetches_are_cancelled_and_budget_is_enforced() -> None:
+    chain = EchoChain(delay=0.05)
+    service = _service(chain, top_k=2, session_budget=2)
+
+    async def scenario() -> None:
+        await service.apredict_next_words(question="Hi?", partial_answer="", session_id="s")
+        await asyncio.sleep(0)
+        await service.apredict_next_words(question="Hi?", partial_answer="something else", session_id="s")
+        await asyncio.sleep(0.1)
+
+    asyncio.run(scenario())
+    stats = service.stats()["prefetch"]
+    assert stats["cancelled"] == 2
+    assert stats["skipped_budget"] == 2
+    assert service.stats()["singleflight"]["abandoned"] == 2
+
+
+def test_prefetch_never_waits_in_the_admission_queue() -> None:
+    chain = EchoChain()
+    service = AutocompleteService(
+        settings=DummySettings(),
+        chain=chain,
+        response_cache=ResponseCache(),
+        admission=AdmissionController(rpm=1),
+        prefetcher=Prefetcher(top_k=2),
+    )
+
+    async def scenario() -> None:
+        await service.apredict_next_words(question="Hi?", partial_answer="", session_id="s")
+        await asyncio.sleep(0.01)
+
+    asyncio.run(scenario())
+    assert chain.partials == [""]
+    assert service.stats()["prefetch"]["failed"] == 2
+    assert service.stats()["admission"]["deferred_low_priority"] == 2
@@ -0,0 +1,74 @@
+"""Tests for client-side admission control."""
+
+import asyncio
+import time
+from dataclasses import dataclass
+
+import pytest
+from google.api_core.exceptions import ResourceExhausted
+
+from app.prompts import SuggestionPayload
+from app.rate_limit import AdmissionController, RateLimitExceeded, retry_delay_from_error
+from app.service import AutocompleteService
+
+
+@dataclass
+class DummySettings:
+    google_api_key: str = "test-key"
+    gemini_model: str = "gemini-2.5-flash"
+    suggestions_count: int = 5
+
+
+class QuotaChain:
+    async def ainvoke(self, _: dict) -> SuggestionPayload:
+        raise ResourceExhausted("Quota exceeded. Please retry in 7.5s.")
+
+
+def test_retry_delay_parsing() -> None:
+    assert retry_delay_from_error(ResourceExhausted("Please retry in 12.3s")) == 12.3
+    assert retry_delay_from_error(ResourceExhausted("retry_delay { seconds: 4 }")) == 4.0
+    assert retry_delay_from_error(ResourceExhausted("nope")) is None
+
+
+def test_bucket_admits_burst_then_sheds_beyond_max_wait() -> None:
+    limiter = AdmissionController(rpm=2, max_wait_seconds=0.1)
+
+    async def scenario() -> None:
+        await limiter.acquire()
+        await limiter.acquire()
+        with pytest.raises(RateLimitExceeded) as info:
+            await limiter.acquire()
+        assert info.value.retry_after > 0
+
+    asyncio.run(scenario())
+    assert limiter.stats()["admitted"] == 2
+    assert limiter.stats()["shed"] == 1
+
+
+def test_full_queue_is_shed_immediately() -> None:
+    limiter = AdmissionController(rpm=60, max_queue=1, max_wait_seconds=5.0)
+    limiter.cooldown(0.2)
+
+    async def scenario() -> float:
+        waiter = asyncio.ensure_future(limiter.acquire())
+        await asyncio.sleep(0)
+        started = time.monotonic()
+        with pytest.raises(RateLimitExceeded):
+            await limiter.acquire()
+        elapsed = time.monotonic() - started
+        await waiter
+        return elapsed
+
+    assert asyncio.run(scenario()) < 0.05
+
+
+def test_upstream_quota_error_sets_global_cooldown() -> None:
+    limiter = AdmissionController(rpm=60)
+    service = AutocompleteService(settings=DummySettings(), chain=QuotaChain(), admission=limiter)
+
+    with pytest.raises(ResourceExhausted):
+        asyncio.run(service.apredict_next_words(question="Hi?", partial_answer=""))
+
+    stats = limiter.stats()
+    assert stats["cooldowns"] == 1
+    assert 7.0 < stats["cooldown_remaining_seconds"] <= 7.5
@@ -0,0 +1,104 @@
+"""Tests for the warm service registry."""
+
+from dataclasses import dataclass
+
+from app.registry import ServiceRegistry
+
+
+@dataclass
+class DummySettings:
+    google_api_key: str = "test-key"
+    gemini_model: str = "gemini-2.5-flash"
+    gemini_temperature: float = 0.3
+    suggestions_count: int = 5
+
+
+class CountingFactory:
+    def __init__(self) -> None:
+        self.calls: list[dict] = []
+
+    def __call__(self, **kwargs) -> object:
+        self.calls.append(kwargs)
+        return object()
+
+
+def test_registry_builds_each_chain_once() -> None:
+    factory = CountingFactory()
+    registry = ServiceRegistry(chain_factory=factory)
+
+    first = registry.get(DummySettings())
+    second = registry.get(DummySettings())
+
+    assert first is second
+    assert len(factory.calls) == 1
+    assert factory.calls[0] == {
+        "google_api_key": "test-key",
+        "model_name": "gemini-2.5-flash",
+        "temperature": 0.3,
+    }
+
+
+def test_registry_keys_on_model_and_temperature() -> None:
+    factory = CountingFactory()
+    registry = ServiceRegistry(chain_factory=factory)
+
+    registry.get(DummySettings())
+    registry.get(DummySettings(gemini_model="gemini-2.5-pro"))
+    registry.get(DummySettings(gemini_temperature=0.7))
+
+    assert len(factory.calls) == 3
+    assert registry.stats()["services"] == 3
+
+    registry.clear()
+    assert registry.stats() == {"services": 0, "chains": 0, "clients": 0}
+
+
+def test_registry_builds_split_chains_when_enabled() -> None:
+    combined = CountingFactory()
+    split = CountingFactory()
+    registry = ServiceRegistry(chain_factory=combined, split_factory=lambda **kw: (split(**kw), object()))
+
+    @dataclass
+    class SplitSettings(DummySettings):
+        split_generation: bool = True
+        split_retries: int = 2
+
+    service = registry.get(SplitSettings())
+
+    assert combined.calls == []
+    assert len(split.calls) == 1
+    assert service.chain is None
+    assert len(service.chains) == 2
+    assert registry.stats()["chains"] == 2
+
+
+@dataclass
+class RateLimitSettings(DummySettings):
+    rate_limit_enabled: bool = True
+    rate_limit_rpm: int | None = None
+    rate_limit_tpm: int | None = None
+    rate_limit_queue_size: int = 32
+    rate_limit_max_wait_seconds: float = 10.0
+
+
+def test_rate_limiter_needs_an_explicit_rpm() -> None:
+    registry = ServiceRegistry(chain_factory=CountingFactory())
+
+    assert registry.get(RateLimitSettings()).admission is None
+    assert registry.get(RateLimitSettings(gemini_model="gemini-2.5-pro", rate_limit_rpm=60)).admission is not None
+
+
+@dataclass
+class HedgedSettings(RateLimitSettings):
+    hedge_enabled: bool = True
+    hedge_delay_ms: float | None = None
+    hedge_max_ratio: float = 0.1
+
+
+def test_hedged_chain_shares_the_services_admission_controller() -> None:
+    factory = CountingFactory()
+    registry = ServiceRegistry(chain_factory=factory)
+
+    service = registry.get(HedgedSettings(rate_limit_rpm=60))
+
+    assert factory.calls[0]["admission"] is service.admission
@@ -0,0 +1,93 @@
+"""Tests for the normalized response cache."""
+
+import asyncio
+from dataclasses import dataclass
+
+import pytest
+from google.api_core.exceptions import ResourceExhausted
+
+from app.prompts import SentenceSuggestion, SuggestionBranch, SuggestionPayload
+from app.response_cache import ResponseCache, make_cache_key
+from app.service import AutocompleteService
+
+
+class ScriptedChain:
+    def __init__(self) -> None:
+        self.calls = 0
+        self.fail_with: Exception | None = None
+
+    async def ainvoke(self, _: dict) -> SuggestionPayload:
+        self.calls += 1
+        await asyncio.sleep(0)
+        if self.fail_with is not None:
+            raise self.fail_with
+        return SuggestionPayload(
+            suggestions=[SuggestionBranch(word=f"word{self.calls}")],
+            sentences=[SentenceSuggestion(style="smart", text="Sure.")],
+        )
+
+
+@dataclass
+class DummySettings:
+    google_api_key: str = "test-key"
+    gemini_model: str = "gemini-2.5-flash"
+    suggestions_count: int = 5
+
+
+def _key(**overrides) -> tuple:
+    fields = {
+        "question": "Want tea?",
+        "partial_answer": "",
+        "conversation": "",
+        "suggestions_count": 5,
+        "model": "m",
+    }
+    fields.update(overrides)
+    return make_cache_key(**fields)
+
+
+def test_key_folds_case_and_whitespace() -> None:
+    assert _key(question="  want   TEA? ") == _key()
+    assert _key(conversation="guest:  Hi") == _key(conversation="GUEST: hi")
+    assert _key(suggestions_count=3) != _key()
+
+
+def test_lru_eviction_and_counters() -> None:
+    cache = ResponseCache(max_entries=2)
+    value = {"suggestions": [SuggestionBranch(word="a")], "sentences": []}
+    for question in ("a", "b", "c"):
+        cache.put(_key(question=question), value)
+
+    assert cache.get(_key(question="a")) == (None, None)
+    assert cache.get(_key(question="c"))[1] == "fresh"
+    stats = cache.stats()
+    assert stats["evictions"] == 1
+    assert stats["entries"] == 2
+    assert stats["hit_ratio"] == 0.5
+    assert stats["approx_bytes"] > 0
+
+
+def test_service_serves_cached_then_stale_on_rate_limit() -> None:
+    chain = ScriptedChain()
+    cache = ResponseCache(ttl_seconds=60, stale_seconds=0)
+    service = AutocompleteService(settings=DummySettings(), chain=chain, response_cache=cache)
+
+    async def scenario() -> tuple[dict, dict]:
+        first = await service.apredict_next_words(question="Tea?", partial_answer="")
+        second = await service.apredict_next_words(question="tea? ", partial_answer=" ")
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert chain.calls == 1
+    assert first["suggestions"][0].word == second["suggestions"][0].word == "word1"
+
+    # Expire the entry, then make upstream refuse: the stale value is still served.
+    cache._ttl = -1
+    chain.fail_with = ResourceExhausted("quota")
+    result = asyncio.run(service.apredict_next_words(question="Tea?", partial_answer=""))
+    assert result["suggestions"][0].word == "word1"
+    assert cache.stats()["rate_limit_fallbacks"] == 1
+
+    cache._serve_stale_on_rate_limit = False
+    with pytest.raises(ResourceExhausted):
+        asyncio.run(service.apredict_next_words(question="Tea?", partial_answer=""))
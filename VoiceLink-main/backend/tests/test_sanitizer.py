@@ -0,0 +1,48 @@
+"""Tests for the iterative suggestion-tree sanitizer."""
+
+from app.prompts import SuggestionBranch
+from app.service import _sanitize_branch, _sanitize_suggestions
+
+
+def _chain(words: list[str]) -> SuggestionBranch:
+    node = SuggestionBranch(word=words[-1])
+    for word in reversed(words[:-1]):
+        node = SuggestionBranch(word=word, next=[node])
+    return node
+
+
+def test_trims_dedupes_per_level_and_caps_depth() -> None:
+    tree = [
+        SuggestionBranch(
+            word=" Yes ",
+            next=[SuggestionBranch(word="please"), SuggestionBranch(word=" Please"), SuggestionBranch(word="  ")],
+        ),
+        SuggestionBranch(word="yes"),
+        _chain(["a", "b", "c", "d", "e"]),
+    ]
+
+    result = _sanitize_suggestions(tree, 5)
+
+    assert [branch.word for branch in result] == ["Yes", "a"]
+    assert [child.word for child in result[0].next] == ["please"]
+    assert result[1].next[0].next[0].next[0].word == "d"
+    assert result[1].next[0].next[0].next[0].next == []
+
+
+def test_limits_roots_and_children() -> None:
+    tree = [
+        SuggestionBranch(word=f"r{i}", next=[SuggestionBranch(word=f"c{j}") for j in range(5)])
+        for i in range(4)
+    ]
+
+    result = _sanitize_suggestions(tree, 2, max_children=3)
+
+    assert [branch.word for branch in result] == ["r0", "r1"]
+    assert all(len(branch.next) == 3 for branch in result)
+
+
+def test_single_branch_matches_tree_sanitizer() -> None:
+    branch = _chain([" x ", "y", "z"])
+
+    assert _sanitize_branch(branch, depth=1, max_depth=4) == _sanitize_suggestions([branch], 1)[0]
+    assert _sanitize_branch(SuggestionBranch(word=" "), depth=1, max_depth=4) is None
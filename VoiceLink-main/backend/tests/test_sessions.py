@@ -0,0 +1,51 @@
+"""Tests for server-side conversation sessions."""
+
+import pytest
+
+from app.sessions import SessionNotFound, SessionStore
+
+
+def test_appended_turns_extend_the_transcript() -> None:
+    store = SessionStore()
+    session = store.create([("guest", "How are you?")])
+
+    store.append(session.session_id, [("user", "Fine, thanks."), ("guest", "Coffee?")])
+
+    assert store.get(session.session_id).transcript == "guest: How are you?\nuser: Fine, thanks.\nguest: Coffee?"
+    assert session.last_turn("guest") == "Coffee?"
+
+
+def test_oldest_turns_are_dropped_past_the_limits() -> None:
+    store = SessionStore(max_turns=2, max_chars=1_000)
+    session = store.create()
+
+    store.append(session.session_id, [("guest", "one"), ("user", "two"), ("guest", "three")])
+
+    assert session.transcript == "user: two\nguest: three"
+    assert session.chars == len("user: two") + len("guest: three")
+    assert session.dropped == 1
+    assert list(session.lines) == ["user: two", "guest: three"]
+
+
+def test_least_recently_used_session_is_evicted() -> None:
+    store = SessionStore(max_sessions=2)
+    first = store.create()
+    second = store.create()
+    store.get(first.session_id)
+
+    store.create()
+
+    store.get(first.session_id)
+    with pytest.raises(SessionNotFound):
+        store.get(second.session_id)
+    assert store.stats()["evicted"] == 1
+
+
+def test_idle_sessions_expire() -> None:
+    store = SessionStore(ttl_seconds=0.0001)
+    session = store.create()
+    session.touched_at -= 1
+
+    with pytest.raises(SessionNotFound):
+        store.append(session.session_id, [("guest", "Hello?")])
+    assert store.stats()["expired"] == 1
@@ -0,0 +1,141 @@
+"""Tests for coalescing identical in-flight requests."""
+
+import asyncio
+from dataclasses import dataclass
+
+import pytest
+
+from app.prefetch import LOW_PRIORITY
+from app.prompts import SentenceSuggestion, SuggestionBranch, SuggestionPayload
+from app.rate_limit import AdmissionController, RateLimitExceeded
+from app.service import AutocompleteService
+from app.singleflight import SingleFlight
+
+
+@dataclass
+class DummySettings:
+    google_api_key: str = "test-key"
+    gemini_model: str = "gemini-2.5-flash"
+    suggestions_count: int = 5
+
+
+class SlowChain:
+    def __init__(self, error: Exception | None = None) -> None:
+        self.calls = 0
+        self.error = error
+
+    async def ainvoke(self, _: dict) -> SuggestionPayload:
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        if self.error is not None:
+            raise self.error
+        return SuggestionPayload(
+            suggestions=[SuggestionBranch(word="sure")],
+            sentences=[SentenceSuggestion(style="smart", text="Sure thing.")],
+        )
+
+
+def test_identical_requests_share_one_upstream_call() -> None:
+    chain = SlowChain()
+    service = AutocompleteService(settings=DummySettings(), chain=chain, singleflight=SingleFlight())
+
+    async def scenario() -> list[dict]:
+        return await asyncio.gather(
+            service.apredict_next_words(question="Coffee?", partial_answer=""),
+            service.apredict_next_words(question="coffee?  ", partial_answer=" "),
+            service.apredict_next_words(question="Coffee?", partial_answer=""),
+        )
+
+    results = asyncio.run(scenario())
+
+    assert chain.calls == 1
+    assert all(result["suggestions"][0].word == "sure" for result in results)
+    assert service.stats()["singleflight"]["saved_upstream_calls"] == 2
+
+
+def test_errors_fan_out_and_leader_cancellation_is_isolated() -> None:
+    flight = SingleFlight()
+
+    async def failing() -> None:
+        await asyncio.sleep(0.01)
+        raise ValueError("upstream broke")
+
+    async def scenario() -> list:
+        return await asyncio.gather(flight.do("k", failing), flight.do("k", failing), return_exceptions=True)
+
+    results = asyncio.run(scenario())
+    assert all(isinstance(result, ValueError) for result in results)
+
+    async def cancelled_leader() -> str:
+        async def work() -> str:
+            await asyncio.sleep(0.02)
+            return "done"
+
+        leader = asyncio.ensure_future(flight.do("j", work))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(flight.do("j", work))
+        await asyncio.sleep(0)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await follower
+
+    assert asyncio.run(cancelled_leader()) == "done"
+
+
+class PriorityChain(SlowChain):
+    def __init__(self) -> None:
+        super().__init__()
+        self.low_priority: list[bool] = []
+
+    async def ainvoke(self, inputs: dict) -> SuggestionPayload:
+        self.low_priority.append(LOW_PRIORITY.get())
+        return await super().ainvoke(inputs)
+
+
+async def _in_background(coro):
+    LOW_PRIORITY.set(True)
+    return await coro
+
+
+def test_user_joining_a_background_flight_keeps_normal_priority() -> None:
+    chain = PriorityChain()
+    admission = AdmissionController(rpm=60)
+    service = AutocompleteService(
+        settings=DummySettings(), chain=chain, singleflight=SingleFlight(), admission=admission
+    )
+
+    async def scenario() -> list:
+        admission.cooldown(0.05)  # no spare capacity: the prefetch must not lead
+        return await asyncio.gather(
+            _in_background(service.apredict_next_words(question="Tea?", partial_answer="")),
+            service.apredict_next_words(question="Tea?", partial_answer=""),
+            return_exceptions=True,
+        )
+
+    prefetch, user = asyncio.run(scenario())
+
+    assert isinstance(prefetch, RateLimitExceeded)
+    assert user["suggestions"][0].word == "sure"
+    assert chain.low_priority == [False]
+
+
+def test_flight_led_by_a_prefetch_runs_at_user_priority() -> None:
+    chain = PriorityChain()
+    service = AutocompleteService(
+        settings=DummySettings(),
+        chain=chain,
+        singleflight=SingleFlight(),
+        admission=AdmissionController(rpm=60),
+    )
+
+    async def scenario() -> list:
+        return await asyncio.gather(
+            _in_background(service.apredict_next_words(question="Tea?", partial_answer="")),
+            service.apredict_next_words(question="Tea?", partial_answer=""),
+        )
+
+    results = asyncio.run(scenario())
+
+    assert all(result["suggestions"][0].word == "sure" for result in results)
+    assert chain.calls == 1 and chain.low_priority == [False]
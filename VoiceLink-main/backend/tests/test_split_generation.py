@@ -0,0 +1,90 @@
+"""Tests for concurrent word/sentence generation."""
+
+import asyncio
+import json
+from dataclasses import dataclass
+
+from langchain_core.exceptions import OutputParserException
+
+from app.prompts import SentenceSuggestion, SentencesPayload, SplitChains, SuggestionBranch, WordTreePayload
+from app.service import AutocompleteService
+
+
+class HalfChain:
+    def __init__(self, payload, *, failures: int = 0, delay: float = 0.01) -> None:
+        self._payload = payload
+        self._failures = failures
+        self._delay = delay
+        self.calls = 0
+        self.running = 0
+        self.peers: list["HalfChain"] = []
+        self.overlapped = False
+
+    async def ainvoke(self, _: dict):
+        self.calls += 1
+        self.running += 1
+        self.overlapped |= any(peer.running for peer in self.peers)
+        try:
+            await asyncio.sleep(self._delay)
+            if self._failures:
+                self._failures -= 1
+                raise OutputParserException("bad json")
+            return self._payload
+        finally:
+            self.running -= 1
+
+    async def astream_text(self, _: dict):
+        yield json.dumps(self._payload.model_dump())
+
+
+@dataclass
+class DummySettings:
+    google_api_key: str = "test-key"
+    gemini_model: str = "gemini-2.5-flash"
+    suggestions_count: int = 5
+
+
+def _halves(word_failures: int = 0, sentence_failures: int = 0) -> tuple[HalfChain, HalfChain]:
+    words = HalfChain(WordTreePayload(suggestions=[SuggestionBranch(word="hello")]), failures=word_failures)
+    sentences = HalfChain(
+        SentencesPayload(sentences=[SentenceSuggestion(style="funny", text="Hi there!")]),
+        failures=sentence_failures,
+    )
+    words.peers, sentences.peers = [sentences], [words]
+    return words, sentences
+
+
+def test_split_runs_halves_concurrently_and_retries_only_failed_half() -> None:
+    words, sentences = _halves(sentence_failures=1)
+    service = AutocompleteService(settings=DummySettings(), split_chains=SplitChains(words, sentences))
+
+    result = asyncio.run(service.apredict_next_words(question="Hi?", partial_answer=""))
+
+    assert [b.word for b in result["suggestions"]] == ["hello"]
+    assert [s.text for s in result["sentences"]] == ["Hi there!"]
+    assert words.overlapped or sentences.overlapped
+    assert (words.calls, sentences.calls) == (1, 2)
+
+
+def test_split_degrades_to_words_when_sentences_keep_failing() -> None:
+    words, sentences = _halves(sentence_failures=5)
+    service = AutocompleteService(
+        settings=DummySettings(),
+        split_chains=SplitChains(words, sentences),
+        split_retries=1,
+    )
+
+    result = asyncio.run(service.apredict_next_words(question="Hi?", partial_answer=""))
+
+    assert result["sentences"] == []
+    assert service.stats()["split"]["sentence_failures"] == 1
+
+
+def test_split_stream_emits_words_before_sentences() -> None:
+    words, sentences = _halves()
+    service = AutocompleteService(settings=DummySettings(), split_chains=SplitChains(words, sentences))
+
+    async def collect() -> list[str]:
+        return [name async for name, _ in service.astream_next_words(question="Hi?", partial_answer="")]
+
+    assert asyncio.run(collect()) == ["root", "branch", "sentences", "done"]
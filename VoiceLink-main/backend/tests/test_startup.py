@@ -0,0 +1,99 @@
+"""Tests for the startup warm-up and readiness reporting."""
+
+import asyncio
+from dataclasses import dataclass
+
+from fastapi.testclient import TestClient
+from langchain_core.runnables import RunnableLambda
+
+from app import startup
+from app.discovery import ModelDiscovery
+from app.main import create_app
+from app.prompts import PROMPT_TEMPLATE, SUGGESTION_PARSER, warm_chain
+from app.registry import ServiceRegistry
+from app.startup import StartupState, warm_up
+
+
+@dataclass
+class DummySettings:
+    google_api_key: str = "test-key"
+    gemini_model: str = "gemini-2.5-flash"
+    gemini_temperature: float = 0.3
+    suggestions_count: int = 5
+
+
+def _offline_chain(**_) -> object:
+    return PROMPT_TEMPLATE | RunnableLambda(lambda _: "{}") | SUGGESTION_PARSER
+
+
+def test_warm_up_builds_the_service_and_reports_ready(monkeypatch) -> None:
+    monkeypatch.setattr(startup, "import_gemini_sdks", lambda: None)
+    monkeypatch.setattr(startup, "MODEL_DISCOVERY", ModelDiscovery(lambda _: ["gemini-2.5-flash"]))
+    registry = ServiceRegistry(chain_factory=_offline_chain)
+    state = StartupState(import_seconds=0.5)
+
+    asyncio.run(warm_up(registry, DummySettings(), state))
+
+    snapshot = state.snapshot()
+    assert snapshot["ready"] and snapshot["phase"] == "ready"
+    assert set(snapshot["phase_seconds"]) == {"importing", "discovering", "building", "warming"}
+    assert registry.stats()["services"] == 1
+
+
+def test_failed_warm_up_is_not_ready_until_a_suggestion_is_served(monkeypatch) -> None:
+    monkeypatch.setattr(startup, "import_gemini_sdks", lambda: None)
+    monkeypatch.setattr(startup, "MODEL_DISCOVERY", ModelDiscovery(lambda _: ["gemini-2.5-flash"]))
+
+    def broken_factory(**_):
+        raise RuntimeError("No Gemini models")
+
+    state = StartupState()
+    asyncio.run(warm_up(ServiceRegistry(chain_factory=broken_factory), DummySettings(), state, max_attempts=1))
+
+    assert not state.ready
+    assert state.phase == "failed" and "No Gemini models" in state.error
+    state.record_first_suggestion()
+    assert state.ready and state.first_suggestion_seconds is not None
+
+
+def test_failed_warm_up_is_retried_with_backoff(monkeypatch) -> None:
+    monkeypatch.setattr(startup, "import_gemini_sdks", lambda: None)
+    monkeypatch.setattr(startup, "MODEL_DISCOVERY", ModelDiscovery(lambda _: ["gemini-2.5-flash"]))
+    failures = iter([RuntimeError("transient"), RuntimeError("transient")])
+
+    def flaky_factory(**kwargs):
+        error = next(failures, None)
+        if error is not None:
+            raise error
+        return _offline_chain(**kwargs)
+
+    state = StartupState()
+    asyncio.run(warm_up(ServiceRegistry(chain_factory=flaky_factory), DummySettings(), state, retry_seconds=0.001))
+
+    assert state.ready and state.phase == "ready" and state.error is None
+    assert state.attempts == 3
+
+
+def test_skipped_warm_up_is_ready() -> None:
+    state = StartupState()
+    state.phase = "skipped"
+
+    assert state.ready
+
+
+def test_warm_chain_renders_the_prompt_and_runs_the_parser() -> None:
+    assert warm_chain(_offline_chain()) == 1
+    assert warm_chain(object()) == 0
+
+
+def test_ready_endpoint_reflects_the_startup_state() -> None:
+    app = create_app()
+    app.state.startup = StartupState()
+    client = TestClient(app)
+
+    waiting = client.get("/ready")
+    app.state.startup.warmed = True
+    ready = client.get("/ready")
+
+    assert waiting.status_code == 503 and waiting.json()["ready"] is False
+    assert ready.status_code == 200 and ready.json()["ready"] is True
@@ -0,0 +1,73 @@
+"""Tests for streamed suggestion parsing."""
+
+import asyncio
+import json
+from dataclasses import dataclass
+
+from app.service import AutocompleteService
+from app.streaming import SuggestionStreamParser, format_sse
+
+PAYLOAD = {
+    "suggestions": [
+        {"word": " Yes ", "next": [{"word": "please", "next": []}, {"word": "please", "next": []}]},
+        {"word": "yes", "next": []},
+        {"word": "no {really}", "next": []},
+    ],
+    "sentences": [{"style": "Casual", "text": "Sure, why not."}],
+}
+
+
+class StreamingChain:
+    def __init__(self, text: str, chunk_size: int = 7) -> None:
+        self._text = text
+        self._chunk_size = chunk_size
+
+    async def astream_text(self, _: dict):
+        for start in range(0, len(self._text), self._chunk_size):
+            await asyncio.sleep(0)
+            yield self._text[start : start + self._chunk_size]
+
+
+@dataclass
+class DummySettings:
+    google_api_key: str = "test-key"
+    gemini_model: str = "gemini-2.5-flash"
+    suggestions_count: int = 5
+
+
+def test_parser_reports_pieces_in_stream_order() -> None:
+    text = "```json\n" + json.dumps(PAYLOAD) + "\n```"
+    parser = SuggestionStreamParser()
+    pieces = [piece for i in range(0, len(text), 5) for piece in parser.feed(text[i : i + 5])]
+
+    assert [(p.kind, p.index) for p in pieces] == [
+        ("root_word", 0),
+        ("root_branch", 0),
+        ("root_word", 1),
+        ("root_branch", 1),
+        ("root_word", 2),
+        ("root_branch", 2),
+        ("sentences", None),
+    ]
+    assert pieces[4].value == "no {really}"
+
+
+def test_service_streams_sanitized_events() -> None:
+    service = AutocompleteService(
+        settings=DummySettings(),
+        chain=StreamingChain(json.dumps(PAYLOAD)),
+    )
+
+    async def collect() -> list[tuple[str, object]]:
+        return [event async for event in service.astream_next_words(question="Tea?", partial_answer="")]
+
+    events = asyncio.run(collect())
+
+    assert [name for name, _ in events] == ["root", "branch", "root", "branch", "sentences", "done"]
+    assert events[0][1] == {"index": 0, "word": "Yes"}
+    assert [child.word for child in events[1][1]["branch"].next] == ["please"]
+    assert events[2][1] == {"index": 1, "word": "no {really}"}
+    done = events[-1][1]
+    assert [branch.word for branch in done["suggestions"]] == ["Yes", "no {really}"]
+    assert done["sentences"][0].style == "casual"
+    assert format_sse("root", events[0][1]) == 'event: root\ndata: {"index":0,"word":"Yes"}\n\n'
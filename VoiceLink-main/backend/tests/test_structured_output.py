@@ -0,0 +1,58 @@
+"""Tests for the native structured-output chain mode."""
+
+import json
+
+import pytest
+from langchain_core.exceptions import OutputParserException
+from langchain_core.language_models import FakeListChatModel
+
+from app.prompts import (
+    PROMPT_TEMPLATE,
+    STRUCTURED_PROMPT_TEMPLATE,
+    SUGGESTION_SCHEMA,
+    StructuredPayloadParser,
+    SuggestionPayload,
+    _compose,
+    chain_clients,
+)
+
+INPUTS = {"conversation": "", "question": "Tea?", "partial_answer": "", "suggestions_count": 3}
+PAYLOAD = {
+    "suggestions": [{"word": "yes", "next": [{"word": "please"}]}],
+    "sentences": [{"style": "smart", "text": "Yes, please."}],
+}
+
+
+def _system_prompt(template) -> str:
+    return template.format_messages(**INPUTS)[0].content
+
+
+def test_structured_prompt_drops_the_format_instructions() -> None:
+    assert "Respond only with JSON matching this schema" in _system_prompt(PROMPT_TEMPLATE)
+    assert "Respond only with JSON matching this schema" not in _system_prompt(STRUCTURED_PROMPT_TEMPLATE)
+    assert len(_system_prompt(STRUCTURED_PROMPT_TEMPLATE)) < len(_system_prompt(PROMPT_TEMPLATE)) / 2
+
+
+def test_compact_schema_has_no_recursive_refs() -> None:
+    text = json.dumps(SUGGESTION_SCHEMA)
+
+    assert "$ref" not in text and "$defs" not in text
+    assert text.count('"next"') == 3
+
+
+def test_structured_chain_parses_bare_json_and_exposes_its_client() -> None:
+    model = FakeListChatModel(responses=[json.dumps(PAYLOAD)])
+    parser = StructuredPayloadParser(pydantic_object=SuggestionPayload)
+    chain = _compose([model], STRUCTURED_PROMPT_TEMPLATE, parser, schema=SUGGESTION_SCHEMA)
+
+    payload = chain.invoke(INPUTS)
+
+    assert payload.suggestions[0].next[0].word == "please"
+    assert chain_clients(chain) == [model]
+
+
+def test_invalid_structured_output_raises_parser_exception() -> None:
+    parser = StructuredPayloadParser(pydantic_object=SuggestionPayload)
+
+    with pytest.raises(OutputParserException):
+        parser.parse('{"suggestions": []}')
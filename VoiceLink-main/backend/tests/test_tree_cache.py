@@ -0,0 +1,120 @@
+"""Tests for the session suggestion-tree walk cache."""
+
+import asyncio
+from dataclasses import dataclass
+
+from app.prompts import SentenceSuggestion, SuggestionBranch, SuggestionPayload
+from app.response_cache import ResponseCache
+from app.service import AutocompleteService
+from app.tree_cache import SuggestionTreeCache
+
+
+def _tree() -> list[SuggestionBranch]:
+    return [
+        SuggestionBranch(
+            word="yes",
+            next=[
+                SuggestionBranch(word="please", next=[SuggestionBranch(word="thanks")]),
+                SuggestionBranch(word="thanks"),
+            ],
+        ),
+        SuggestionBranch(word="no", next=[SuggestionBranch(word="thanks")]),
+    ]
+
+
+class CountingChain:
+    def __init__(self) -> None:
+        self.calls: list[dict] = []
+        self._payload = SuggestionPayload(
+            suggestions=_tree(),
+            sentences=[SentenceSuggestion(style="casual", text="Yes please.")],
+        )
+
+    async def ainvoke(self, inputs: dict) -> SuggestionPayload:
+        self.calls.append(inputs)
+        await asyncio.sleep(0)
+        return self._payload
+
+
+@dataclass
+class DummySettings:
+    google_api_key: str = "test-key"
+    gemini_model: str = "gemini-2.5-flash"
+    suggestions_count: int = 5
+
+
+def test_walk_returns_subtree_for_picked_words() -> None:
+    cache = SuggestionTreeCache()
+    key = cache.session_key("s1", "Water?")
+    cache.remember(key, question="Water?", partial_answer="", suggestions=_tree(), sentences=[])
+
+    hit = cache.lookup(key, question="water? ", partial_answer="Yes please", limit=5)
+    assert [b.word for b in hit["suggestions"]] == ["thanks"]
+
+    assert cache.lookup(key, question="Water?", partial_answer="maybe", limit=5) is None
+    assert cache.lookup(key, question="Tea?", partial_answer="yes", limit=5) is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 2
+
+
+def test_service_answers_word_pick_without_upstream_call() -> None:
+    chain = CountingChain()
+    service = AutocompleteService(
+        settings=DummySettings(),
+        chain=chain,
+        tree_cache=SuggestionTreeCache(),
+    )
+
+    async def scenario() -> dict:
+        await service.apredict_next_words(question="Water?", partial_answer="", session_id="s1")
+        result = await service.apredict_next_words(
+            question="Water?", partial_answer="yes", session_id="s1"
+        )
+        assert len(chain.calls) == 1
+        await asyncio.gather(*service._background)
+        return result
+
+    result = asyncio.run(scenario())
+
+    assert [b.word for b in result["suggestions"]] == ["please", "thanks"]
+    assert len(chain.calls) == 2  # background refresh for the walked path
+    stats = service.stats()["tree_cache"]
+    assert stats["hits"] == 1
+    assert stats["saved_upstream_calls"] == 0  # the refresh went upstream
+    assert stats["refreshes"] == 1
+
+
+def test_hit_counts_as_saved_when_its_refresh_is_cached() -> None:
+    chain = CountingChain()
+    service = AutocompleteService(
+        settings=DummySettings(),
+        chain=chain,
+        tree_cache=SuggestionTreeCache(),
+        response_cache=ResponseCache(),
+    )
+
+    async def scenario() -> None:
+        await service.apredict_next_words(question="Water?", partial_answer="", session_id="s1")
+        await service.apredict_next_words(question="Water?", partial_answer="yes", session_id="s2")
+        await service.apredict_next_words(question="Water?", partial_answer="yes", session_id="s1")
+        await asyncio.gather(*service._background)
+
+    asyncio.run(scenario())
+
+    assert len(chain.calls) == 2
+    assert service.stats()["tree_cache"]["saved_upstream_calls"] == 1
+
+
+def test_different_conversations_do_not_share_a_tree() -> None:
+    chain = CountingChain()
+    service = AutocompleteService(settings=DummySettings(), chain=chain, tree_cache=SuggestionTreeCache())
+
+    async def scenario() -> None:
+        await service.apredict_next_words(question="Who?", partial_answer="", conversation="user: I'm alice")
+        await service.apredict_next_words(question="Who?", partial_answer="yes", conversation="user: I'm bob")
+        await asyncio.gather(*service._background)
+
+    asyncio.run(scenario())
+
+    assert len(chain.calls) == 2
+    assert service.stats()["tree_cache"]["hits"] == 0
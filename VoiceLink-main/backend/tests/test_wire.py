@@ -0,0 +1,57 @@
+"""Tests for the compact suggestion wire format."""
+
+import gzip
+import json
+
+import pytest
+
+from app.prompts import SentenceSuggestion, SuggestionBranch
+from app.wire import COMPACT_JSON, COMPACT_MSGPACK, compact_response, flatten_tree, negotiate, unflatten_tree
+
+
+def _tree(width: int = 2, depth: int = 3, prefix: str = "w") -> list[SuggestionBranch]:
+    if depth == 0:
+        return []
+    return [
+        SuggestionBranch(word=f"{prefix}{i}", next=_tree(width, depth - 1, f"{prefix}{i}."))
+        for i in range(width)
+    ]
+
+
+def test_flat_arrays_round_trip_in_pre_order() -> None:
+    tree = _tree()
+
+    words, parents = flatten_tree(tree)
+
+    assert words[:3] == ["w0", "w0.0", "w0.0.0"]
+    assert parents[:3] == [-1, 0, 1]
+    assert unflatten_tree(words, parents) == tree
+
+
+def test_negotiation_keeps_plain_json_by_default() -> None:
+    assert negotiate(None) is None
+    assert negotiate("application/json") is None
+    assert negotiate(f"{COMPACT_JSON}, application/json;q=0.9") == COMPACT_JSON
+
+
+def test_large_bodies_are_compressed_and_smaller_than_nested_json() -> None:
+    result = {"suggestions": _tree(5, 4), "sentences": [SentenceSuggestion(style="smart", text="Sure.")]}
+    nested = json.dumps(
+        {"suggestions": [b.model_dump() for b in result["suggestions"]], "sentences": [{"style": "smart", "text": "Sure."}]}
+    ).encode()
+
+    plain = compact_response(result, COMPACT_JSON)
+    compressed = compact_response(result, COMPACT_JSON, "gzip, deflate")
+
+    assert len(plain.body) < len(nested) * 0.6
+    assert compressed.headers["content-encoding"] == "gzip"
+    assert gzip.decompress(compressed.body) == plain.body
+
+
+def test_msgpack_body_decodes_to_the_same_payload() -> None:
+    msgpack = pytest.importorskip("msgpack")
+    result = {"suggestions": _tree(), "sentences": []}
+
+    body = compact_response(result, COMPACT_MSGPACK).body
+
+    assert msgpack.unpackb(body) == json.loads(compact_response(result, COMPACT_JSON).body)
@@ -3,8 +3,15 @@ DuckDuckGo Search Agent for Agentverse
 ASI1-Compatible Agent using Agent Chat Protocol
 """
 
+import time
+
+PROCESS_STARTED = time.perf_counter()
+
+import asyncio
 import json
-import requests
+import logging
+from collections import OrderedDict
+import aiohttp
 from uagents import Agent, Context, Protocol
 from uagents.setup import fund_agent_if_low
 import os
@@ -13,6 +20,8 @@ from dotenv import load_dotenv
 # Load environment variables
 load_dotenv()
 
+logger = logging.getLogger("duckduckgo-search-agent")
+
 # Agent configuration
 agent = Agent(
     name="duckduckgo-search-agent",
@@ -21,8 +30,123 @@ agent = Agent(
     endpoint=["http://localhost:8001/submit"],
 )
 
-# Fund agent if balance is low
-fund_agent_if_low(agent.wallet.address())
+# Startup mode: "background" (default) funds the agent and probes DuckDuckGo in
+# background tasks after the agent is ready, "blocking" waits for both before
+# reporting ready, and "offline" skips both
+AGENT_STARTUP_MODE = os.getenv("AGENT_STARTUP_MODE", "background").lower()
+STARTUP_PROBE_TIMEOUT_SECONDS = float(os.getenv("STARTUP_PROBE_TIMEOUT_SECONDS", "15"))
+STATUS_STORAGE_KEY = "startup_status"
+
+startup_status = {
+    "mode": AGENT_STARTUP_MODE,
+    "ready_seconds": None,
+    "funding": "pending",
+    "probe": "pending",
+    "probe_seconds": None,
+}
+_startup_tasks = []
+
+# Shared HTTP client: keep-alive connections are pooled across searches, and at
+# most DDG_MAX_CONNECTIONS requests are in flight at once (extra ones wait for a slot)
+DDG_URL = "https://api.duckduckgo.com/"
+DDG_MAX_CONNECTIONS = int(os.getenv("DDG_MAX_CONNECTIONS", "10"))
+DDG_TIMEOUT = aiohttp.ClientTimeout(
+    total=float(os.getenv("DDG_TIMEOUT_SECONDS", "10")),
+    connect=float(os.getenv("DDG_CONNECT_TIMEOUT_SECONDS", "5")),
+)
+_http_session = None
+
+def get_http_session() -> aiohttp.ClientSession:
+    """Return the shared client session, creating it on first use (inside the event loop)"""
+    global _http_session
+    if _http_session is None or _http_session.closed:
+        connector = aiohttp.TCPConnector(
+            limit=DDG_MAX_CONNECTIONS,
+            ttl_dns_cache=300,
+            keepalive_timeout=30,
+        )
+        _http_session = aiohttp.ClientSession(connector=connector, timeout=DDG_TIMEOUT)
+    return _http_session
+
+async def close_http_session():
+    """Close the shared client session and its pooled connections"""
+    global _http_session
+    if _http_session is not None and not _http_session.closed:
+        await _http_session.close()
+    _http_session = None
+
+# Result cache: answers are reused per normalized query; empty answers expire sooner
+DDG_CACHE_SIZE = int(os.getenv("DDG_CACHE_SIZE", "512"))
+DDG_CACHE_TTL_SECONDS = float(os.getenv("DDG_CACHE_TTL_SECONDS", "3600"))
+DDG_CACHE_EMPTY_TTL_SECONDS = float(os.getenv("DDG_CACHE_EMPTY_TTL_SECONDS", "300"))
+DDG_CACHE_PERSIST = os.getenv("DDG_CACHE_PERSIST", "").lower() in ("1", "true", "yes")
+CACHE_STORAGE_KEY = "search_cache"
+CACHE_REPORT_SECONDS = 300.0
+
+def normalize_query(query: str) -> str:
+    """Cache key for a query: case-folded and single-spaced. Never sent upstream"""
+    return " ".join(query.split()).casefold()
+
+def is_empty_answer(data: dict) -> bool:
+    return not any(data.get(field) for field in ("Abstract", "Answer", "Definition", "RelatedTopics"))
+
+class SearchCache:
+    """Bounded LRU of raw DuckDuckGo answers keyed by normalized query"""
+    def __init__(self, max_entries: int, ttl_seconds: float, empty_ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.empty_ttl_seconds = empty_ttl_seconds
+        self._entries = OrderedDict()  # key -> (expires_at, data)
+        self.hits = 0
+        self.empty_hits = 0
+        self.misses = 0
+
+    def get(self, query: str):
+        key = normalize_query(query)
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= time.time():
+            self._entries.pop(key, None)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        if is_empty_answer(entry[1]):
+            self.empty_hits += 1
+        return entry[1]
+
+    def put(self, query: str, data: dict):
+        ttl = self.empty_ttl_seconds if is_empty_answer(data) else self.ttl_seconds
+        if ttl <= 0:
+            return
+        key = normalize_query(query)
+        self._entries[key] = (time.time() + ttl, data)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def dump(self) -> dict:
+        now = time.time()
+        return {key: [expires, data] for key, (expires, data) in self._entries.items() if expires > now}
+
+    def load(self, dumped: dict):
+        now = time.time()
+        for key, (expires, data) in (dumped or {}).items():
+            if expires > now:
+                self._entries[key] = (expires, data)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "empty_hits": self.empty_hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
+
+search_cache = SearchCache(DDG_CACHE_SIZE, DDG_CACHE_TTL_SECONDS, DDG_CACHE_EMPTY_TTL_SECONDS)
 
 # Agent Chat Protocol for ASI1 compatibility
 chat_protocol = Protocol("AgentChatProtocol")
@@ -56,20 +180,24 @@ async def search_duckduckgo(query: str) -> dict:
     Returns formatted search results
     """
     try:
-        # DuckDuckGo Instant Answer API
-        url = "https://api.duckduckgo.com/"
-        params = {
-            "q": query,
-            "format": "json",
-            "no_redirect": "1",
-            "no_html": "1",
-            "skip_disambig": "1"
-        }
-        
-        response = requests.get(url, params=params, timeout=10)
-        response.raise_for_status()
-        
-        data = response.json()
+        data = search_cache.get(query)
+        cached = data is not None
+        if not cached:
+            # DuckDuckGo Instant Answer API
+            params = {
+                "q": query,
+                "format": "json",
+                "no_redirect": "1",
+                "no_html": "1",
+                "skip_disambig": "1"
+            }
+            
+            async with get_http_session().get(DDG_URL, params=params) as response:
+                response.raise_for_status()
+                # DuckDuckGo labels its JSON as application/x-javascript
+                data = await response.json(content_type=None)
+            # Only answers are cached; network errors are retried on the next message
+            search_cache.put(query, data)
         
         # Extract relevant information
         results = {
@@ -128,13 +256,14 @@ async def search_duckduckgo(query: str) -> dict:
             "success": True,
             "query": query,
             "results": formatted_results,
-            "raw_data": results
+            "raw_data": results,
+            "cached": cached
         }
         
-    except requests.RequestException as e:
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
         return {
             "success": False,
-            "error": f"Network error: {str(e)}",
+            "error": f"Network error: {str(e) or type(e).__name__}",
             "query": query
         }
     except Exception as e:
@@ -178,6 +307,88 @@ def format_search_summary(search_result: dict) -> str:
     
     return summary.strip()
 
+# Worker pool: handlers enqueue searches and return at once; a fixed number of
+# workers run them, and the reply is sent when the search finishes
+DDG_WORKERS = int(os.getenv("DDG_WORKERS", "8"))
+DDG_QUEUE_SIZE = int(os.getenv("DDG_QUEUE_SIZE", "64"))
+
+class SearchPool:
+    """Bounded async worker pool; identical queued or running queries share one search"""
+    def __init__(self, workers: int, queue_size: int):
+        self.workers = workers
+        self.queue_size = queue_size
+        self._queue = None
+        self._tasks = []
+        self._pending = {}  # normalized query -> callbacks waiting for its result
+        self.submitted = 0
+        self.coalesced = 0
+        self.rejected = 0
+
+    def _ensure_started(self):
+        if not self._tasks:
+            self._queue = asyncio.Queue(maxsize=self.queue_size)
+            self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    def submit(self, query: str, on_result) -> bool:
+        """Queue a search; `on_result(search_result)` is awaited when it finishes.
+
+        Returns False without queueing when the queue is full.
+        """
+        self._ensure_started()
+        key = normalize_query(query)
+        waiting = self._pending.get(key)
+        if waiting is not None:
+            waiting.append(on_result)
+            self.coalesced += 1
+            return True
+        if self._queue.full():
+            self.rejected += 1
+            return False
+        self._pending[key] = [on_result]
+        self._queue.put_nowait((key, query))
+        self.submitted += 1
+        return True
+
+    async def _worker(self):
+        while True:
+            key, query = await self._queue.get()
+            try:
+                search_result = await search_duckduckgo(query)
+                callbacks = self._pending.pop(key, [])
+                outcomes = await asyncio.gather(*(callback(search_result) for callback in callbacks), return_exceptions=True)
+                for outcome in outcomes:
+                    if isinstance(outcome, Exception):
+                        logger.error(f"Error sending search result for '{query}': {outcome}")
+            except Exception as e:
+                self._pending.pop(key, None)
+                logger.error(f"Search worker error for '{query}': {e}")
+            finally:
+                self._queue.task_done()
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def stats(self) -> dict:
+        return {
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "submitted": self.submitted,
+            "coalesced": self.coalesced,
+            "rejected": self.rejected,
+        }
+
+search_pool = SearchPool(DDG_WORKERS, DDG_QUEUE_SIZE)
+
+def busy_response(user_id: str) -> dict:
+    return {
+        "type": "chat_message",
+        "content": "I'm handling a lot of searches right now. Please try again in a few seconds.",
+        "role": "assistant",
+        "user_id": user_id
+    }
+
 @chat_protocol.on_message(model=dict)
 async def handle_chat_message(ctx: Context, sender: str, msg: dict):
     """Handle incoming chat messages following ASI1 protocol"""
@@ -189,6 +400,16 @@ async def handle_chat_message(ctx: Context, sender: str, msg: dict):
         message_type = msg.get("type", "chat_message")
         user_id = msg.get("user_id", sender)
         
+        if content.strip().lower() == "status":
+            await ctx.send(sender, {
+                "type": "chat_message",
+                "content": f"Agent status: {json.dumps(startup_status)}",
+                "role": "assistant",
+                "user_id": user_id,
+                "status": startup_status
+            })
+            return
+        
         if message_type == "search_request" or content.lower().startswith("search"):
             # Extract search query
             if message_type == "search_request":
@@ -199,35 +420,42 @@ async def handle_chat_message(ctx: Context, sender: str, msg: dict):
             
             ctx.logger.info(f"Processing search request for: {query}")
             
-            # Perform DuckDuckGo search
-            search_result = await search_duckduckgo(query)
-            summary = format_search_summary(search_result)
-            
-            # Send response following ASI1 protocol
-            response = {
-                "type": "chat_message",
-                "content": summary,
-                "role": "assistant",
-                "user_id": user_id,
-                "search_data": search_result if search_result.get("success") else None
-            }
+            async def send_search_result(search_result: dict):
+                # Send response following ASI1 protocol
+                response = {
+                    "type": "chat_message",
+                    "content": format_search_summary(search_result),
+                    "role": "assistant",
+                    "user_id": user_id,
+                    "search_data": search_result if search_result.get("success") else None
+                }
+                await ctx.send(sender, response)
             
-            await ctx.send(sender, response)
+            # Perform DuckDuckGo search in the worker pool
+            if not search_pool.submit(query, send_search_result):
+                ctx.logger.warning(f"Search queue full, rejecting: {query}")
+                await ctx.send(sender, busy_response(user_id))
             
         else:
             # Handle general chat messages
             if "artificial intelligence" in content.lower() or "ai" in content.lower():
-                # Automatically search for AI information
-                search_result = await search_duckduckgo("artificial intelligence")
-                summary = format_search_summary(search_result)
+                async def send_ai_result(search_result: dict):
+                    response = {
+                        "type": "chat_message",
+                        "content": f"I noticed you mentioned AI! {format_search_summary(search_result)}",
+                        "role": "assistant",
+                        "user_id": user_id
+                    }
+                    await ctx.send(sender, response)
                 
-                response_content = f"I noticed you mentioned AI! {summary}"
-            else:
-                response_content = f"Hello! I'm a DuckDuckGo search agent. You can ask me to search for information by saying 'search [your query]' or just mention topics you're interested in. I'm particularly good with AI-related topics!"
+                # Automatically search for AI information
+                if not search_pool.submit("artificial intelligence", send_ai_result):
+                    await ctx.send(sender, busy_response(user_id))
+                return
             
             response = {
                 "type": "chat_message",
-                "content": response_content,
+                "content": f"Hello! I'm a DuckDuckGo search agent. You can ask me to search for information by saying 'search [your query]' or just mention topics you're interested in. I'm particularly good with AI-related topics!",
                 "role": "assistant",
                 "user_id": user_id
             }
@@ -246,20 +474,83 @@ async def handle_chat_message(ctx: Context, sender: str, msg: dict):
         
         await ctx.send(sender, error_response)
 
+async def fund_agent(ctx: Context):
+    """Fund agent if balance is low (a blocking network call, run off the event loop)"""
+    try:
+        await asyncio.to_thread(fund_agent_if_low, agent.wallet.address())
+        startup_status["funding"] = "ok"
+    except Exception as e:
+        startup_status["funding"] = f"failed: {e}"
+        ctx.logger.warning(f"Funding check failed: {e}")
+
+async def probe_search(ctx: Context):
+    """Test the search functionality and record the outcome in startup_status"""
+    started = time.perf_counter()
+    try:
+        test_result = await asyncio.wait_for(
+            search_duckduckgo("artificial intelligence"), STARTUP_PROBE_TIMEOUT_SECONDS
+        )
+        ok = test_result.get("success")
+    except asyncio.TimeoutError:
+        ok = False
+    startup_status["probe"] = "ok" if ok else "failed"
+    startup_status["probe_seconds"] = round(time.perf_counter() - started, 3)
+    ctx.storage.set(STATUS_STORAGE_KEY, startup_status)
+    if ok:
+        ctx.logger.info(f"✅ DuckDuckGo search functionality verified in {startup_status['probe_seconds']}s")
+    else:
+        ctx.logger.error("❌ DuckDuckGo search test failed")
+
 @agent.on_event("startup")
 async def startup_event(ctx: Context):
     """Agent startup event"""
     ctx.logger.info("DuckDuckGo Search Agent starting up...")
     
-    # Test the search functionality
-    test_result = await search_duckduckgo("artificial intelligence")
-    if test_result.get("success"):
-        ctx.logger.info("✅ DuckDuckGo search functionality verified")
+    if DDG_CACHE_PERSIST:
+        search_cache.load(ctx.storage.get(CACHE_STORAGE_KEY))
+        ctx.logger.info(f"Loaded {search_cache.stats()['entries']} cached searches from storage")
+    
+    if AGENT_STARTUP_MODE == "offline":
+        startup_status["funding"] = startup_status["probe"] = "skipped"
+    elif AGENT_STARTUP_MODE == "blocking":
+        await fund_agent(ctx)
+        await probe_search(ctx)
     else:
-        ctx.logger.error("❌ DuckDuckGo search test failed")
+        # Keep references so the tasks are not garbage-collected while running
+        _startup_tasks.extend([
+            asyncio.create_task(fund_agent(ctx)),
+            asyncio.create_task(probe_search(ctx)),
+        ])
     
+    startup_status["ready_seconds"] = round(time.perf_counter() - PROCESS_STARTED, 3)
+    ctx.storage.set(STATUS_STORAGE_KEY, startup_status)
     ctx.logger.info(f"Agent address: {agent.address}")
-    ctx.logger.info("Agent is ready to receive search requests!")
+    ctx.logger.info(
+        f"Agent is ready to receive search requests! "
+        f"(startup {startup_status['ready_seconds']}s, mode {AGENT_STARTUP_MODE})"
+    )
+
+def save_search_cache(ctx: Context):
+    """Persist the search cache in the agent's storage when DDG_CACHE_PERSIST is set"""
+    if DDG_CACHE_PERSIST:
+        ctx.storage.set(CACHE_STORAGE_KEY, search_cache.dump())
+
+@agent.on_interval(period=CACHE_REPORT_SECONDS)
+async def report_search_cache(ctx: Context):
+    """Log cache hit rates and checkpoint the cache"""
+    ctx.logger.info(f"Search cache: {search_cache.stats()}")
+    ctx.logger.info(f"Search pool: {search_pool.stats()}")
+    save_search_cache(ctx)
+
+@agent.on_event("shutdown")
+async def shutdown_event(ctx: Context):
+    """Agent shutdown event"""
+    ctx.logger.info(f"Search cache: {search_cache.stats()}")
+    save_search_cache(ctx)
+    for task in _startup_tasks:
+        task.cancel()
+    await search_pool.stop()
+    await close_http_session()
 
 @agent.on_message(model=dict)
 async def handle_message(ctx: Context, sender: str, msg: dict):
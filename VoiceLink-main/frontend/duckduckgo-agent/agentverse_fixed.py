@@ -1,6 +1,10 @@
 from uagents import Agent, Context, Model
-import requests
+import aiohttp
+import asyncio
 import json
+import logging
+import time
+from collections import OrderedDict
 
 # Create the agent
 agent = Agent(
@@ -8,6 +12,8 @@ agent = Agent(
     seed="duckduckgo-search-unique-seed-v2",
 )
 
+logger = logging.getLogger("duckduckgo-search-agent")
+
 class SearchMessage(Model):
     query: str
     user_id: str = "anonymous"
@@ -17,20 +23,112 @@ class ResponseMessage(Model):
     search_data: dict = {}
     user_id: str = "anonymous"
 
-def search_duckduckgo(query: str) -> dict:
+# Shared HTTP client with pooled keep-alive connections and a bounded connection count
+DDG_URL = "https://api.duckduckgo.com/"
+DDG_MAX_CONNECTIONS = 10
+DDG_TIMEOUT = aiohttp.ClientTimeout(total=10, connect=5)
+_http_session = None
+
+def get_http_session() -> aiohttp.ClientSession:
+    """Return the shared client session, creating it on first use (inside the event loop)"""
+    global _http_session
+    if _http_session is None or _http_session.closed:
+        connector = aiohttp.TCPConnector(limit=DDG_MAX_CONNECTIONS, ttl_dns_cache=300, keepalive_timeout=30)
+        _http_session = aiohttp.ClientSession(connector=connector, timeout=DDG_TIMEOUT)
+    return _http_session
+
+# Result cache: answers are reused per normalized query; empty answers expire sooner
+CACHE_SIZE = 512
+CACHE_TTL_SECONDS = 3600.0
+CACHE_EMPTY_TTL_SECONDS = 300.0
+CACHE_PERSIST = False  # keep the cache in the agent's storage across restarts
+CACHE_STORAGE_KEY = "search_cache"
+CACHE_REPORT_SECONDS = 300.0
+
+def normalize_query(query: str) -> str:
+    """Cache key for a query: case-folded and single-spaced. Never sent upstream"""
+    return " ".join(query.split()).casefold()
+
+def is_empty_answer(data: dict) -> bool:
+    return not any(data.get(field) for field in ("Abstract", "Answer", "Definition", "RelatedTopics"))
+
+class SearchCache:
+    """Bounded LRU of raw DuckDuckGo answers keyed by normalized query"""
+    def __init__(self, max_entries: int, ttl_seconds: float, empty_ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.empty_ttl_seconds = empty_ttl_seconds
+        self._entries = OrderedDict()  # key -> (expires_at, data)
+        self.hits = 0
+        self.empty_hits = 0
+        self.misses = 0
+
+    def get(self, query: str):
+        key = normalize_query(query)
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= time.time():
+            self._entries.pop(key, None)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        if is_empty_answer(entry[1]):
+            self.empty_hits += 1
+        return entry[1]
+
+    def put(self, query: str, data: dict):
+        ttl = self.empty_ttl_seconds if is_empty_answer(data) else self.ttl_seconds
+        if ttl <= 0:
+            return
+        key = normalize_query(query)
+        self._entries[key] = (time.time() + ttl, data)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def dump(self) -> dict:
+        now = time.time()
+        return {key: [expires, data] for key, (expires, data) in self._entries.items() if expires > now}
+
+    def load(self, dumped: dict):
+        now = time.time()
+        for key, (expires, data) in (dumped or {}).items():
+            if expires > now:
+                self._entries[key] = (expires, data)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "empty_hits": self.empty_hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
+
+search_cache = SearchCache(CACHE_SIZE, CACHE_TTL_SECONDS, CACHE_EMPTY_TTL_SECONDS)
+
+async def search_duckduckgo(query: str) -> dict:
     """Search DuckDuckGo API and return formatted results"""
     try:
-        url = "https://api.duckduckgo.com/"
-        params = {
-            "q": query,
-            "format": "json",
-            "no_redirect": "1",
-            "no_html": "1",
-            "skip_disambig": "1"
-        }
-        
-        response = requests.get(url, params=params, timeout=10)
-        data = response.json()
+        data = search_cache.get(query)
+        if data is None:
+            params = {
+                "q": query,
+                "format": "json",
+                "no_redirect": "1",
+                "no_html": "1",
+                "skip_disambig": "1"
+            }
+            
+            async with get_http_session().get(DDG_URL, params=params) as response:
+                response.raise_for_status()
+                # DuckDuckGo labels its JSON as application/x-javascript
+                data = await response.json(content_type=None)
+            # Only answers are cached; network errors are retried on the next message
+            search_cache.put(query, data)
         
         # Format results
         summary = f"Here's what I found about '{query}':\n\n"
@@ -65,24 +163,102 @@ def search_duckduckgo(query: str) -> dict:
     except Exception as e:
         return {
             "success": False,
-            "summary": f"Sorry, I couldn't search for '{query}'. Error: {str(e)}",
+            "summary": f"Sorry, I couldn't search for '{query}'. Error: {str(e) or type(e).__name__}",
             "raw_data": {}
         }
 
+# Worker pool: handlers enqueue searches and return at once; replies are sent when they finish
+WORKERS = 8
+QUEUE_SIZE = 64
+BUSY_MESSAGE = "I'm handling a lot of searches right now. Please try again in a few seconds."
+
+class SearchPool:
+    """Bounded async worker pool; identical queued or running queries share one search"""
+    def __init__(self, workers: int, queue_size: int):
+        self.workers = workers
+        self.queue_size = queue_size
+        self._queue = None
+        self._tasks = []
+        self._pending = {}  # normalized query -> callbacks waiting for its result
+        self.submitted = 0
+        self.coalesced = 0
+        self.rejected = 0
+
+    def _ensure_started(self):
+        if not self._tasks:
+            self._queue = asyncio.Queue(maxsize=self.queue_size)
+            self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    def submit(self, query: str, on_result) -> bool:
+        """Queue a search; `on_result(search_result)` is awaited when it finishes.
+
+        Returns False without queueing when the queue is full.
+        """
+        self._ensure_started()
+        key = normalize_query(query)
+        waiting = self._pending.get(key)
+        if waiting is not None:
+            waiting.append(on_result)
+            self.coalesced += 1
+            return True
+        if self._queue.full():
+            self.rejected += 1
+            return False
+        self._pending[key] = [on_result]
+        self._queue.put_nowait((key, query))
+        self.submitted += 1
+        return True
+
+    async def _worker(self):
+        while True:
+            key, query = await self._queue.get()
+            try:
+                search_result = await search_duckduckgo(query)
+                callbacks = self._pending.pop(key, [])
+                outcomes = await asyncio.gather(*(callback(search_result) for callback in callbacks), return_exceptions=True)
+                for outcome in outcomes:
+                    if isinstance(outcome, Exception):
+                        logger.error(f"Error sending search result for '{query}': {outcome}")
+            except Exception as e:
+                self._pending.pop(key, None)
+                logger.error(f"Search worker error for '{query}': {e}")
+            finally:
+                self._queue.task_done()
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def stats(self) -> dict:
+        return {
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "submitted": self.submitted,
+            "coalesced": self.coalesced,
+            "rejected": self.rejected,
+        }
+
+search_pool = SearchPool(WORKERS, QUEUE_SIZE)
+
+def reply_with(ctx: Context, sender: str, user_id: str):
+    """Callback that sends a finished search back to `sender`"""
+    async def send(result: dict):
+        response = ResponseMessage(
+            content=result["summary"],
+            search_data=result["raw_data"] if result["success"] else {},
+            user_id=user_id
+        )
+        await ctx.send(sender, response)
+    return send
+
 @agent.on_message(model=SearchMessage)
 async def handle_search(ctx: Context, sender: str, msg: SearchMessage):
     """Handle search requests"""
     ctx.logger.info(f"Processing search for: {msg.query}")
     
-    result = search_duckduckgo(msg.query)
-    
-    response = ResponseMessage(
-        content=result["summary"],
-        search_data=result["raw_data"] if result["success"] else {},
-        user_id=msg.user_id
-    )
-    
-    await ctx.send(sender, response)
+    if not search_pool.submit(msg.query, reply_with(ctx, sender, msg.user_id)):
+        await ctx.send(sender, ResponseMessage(content=BUSY_MESSAGE, user_id=msg.user_id))
 
 @agent.on_message(model=str)
 async def handle_text_message(ctx: Context, sender: str, msg: str):
@@ -99,21 +275,32 @@ async def handle_text_message(ctx: Context, sender: str, msg: str):
     
     ctx.logger.info(f"Processing text query: {query}")
     
-    result = search_duckduckgo(query)
-    
-    response = ResponseMessage(
-        content=result["summary"],
-        search_data=result["raw_data"] if result["success"] else {},
-        user_id="text_user"
-    )
-    
-    await ctx.send(sender, response)
+    if not search_pool.submit(query, reply_with(ctx, sender, "text_user")):
+        await ctx.send(sender, ResponseMessage(content=BUSY_MESSAGE, user_id="text_user"))
 
 @agent.on_event("startup")
 async def startup(ctx: Context):
     ctx.logger.info("🔍 DuckDuckGo Search Agent starting up...")
+    if CACHE_PERSIST:
+        search_cache.load(ctx.storage.get(CACHE_STORAGE_KEY))
     ctx.logger.info(f"Agent address: {agent.address}")
     ctx.logger.info("ASI1-Compatible Agent Chat Protocol Enabled")
 
+@agent.on_interval(period=CACHE_REPORT_SECONDS)
+async def report_search_cache(ctx: Context):
+    ctx.logger.info(f"Search cache: {search_cache.stats()}")
+    ctx.logger.info(f"Search pool: {search_pool.stats()}")
+    if CACHE_PERSIST:
+        ctx.storage.set(CACHE_STORAGE_KEY, search_cache.dump())
+
+@agent.on_event("shutdown")
+async def shutdown(ctx: Context):
+    ctx.logger.info(f"Search cache: {search_cache.stats()}")
+    if CACHE_PERSIST:
+        ctx.storage.set(CACHE_STORAGE_KEY, search_cache.dump())
+    await search_pool.stop()
+    if _http_session is not None and not _http_session.closed:
+        await _http_session.close()
+
 if __name__ == "__main__":
     agent.run()
\ No newline at end of file
@@ -727,6 +727,8 @@ export default function FaceLandmarkerApp() {
           method: "POST",
           headers: {
             "Content-Type": "application/json",
+            // Flat words + parent indexes; older servers ignore this and send nested JSON.
+            Accept: "application/vnd.voicelink.compact+json, application/json;q=0.9",
           },
           body: JSON.stringify(payload),
         });
@@ -741,8 +743,38 @@ export default function FaceLandmarkerApp() {
           return false;
         }
 
+        const isCompact = Array.isArray(data?.words) && Array.isArray(data?.parents);
         const rawSuggestions = Array.isArray(data?.suggestions) ? data.suggestions : [];
-        const rawSentences = Array.isArray(data?.sentences) ? data.sentences : [];
+        const rawSentences = !Array.isArray(data?.sentences)
+          ? []
+          : isCompact
+            ? data.sentences.map((entry: any) =>
+                Array.isArray(entry) ? { style: entry[0], text: entry[1] } : entry
+              )
+            : data.sentences;
+
+        // Compact trees list words in pre-order with each word's parent index (-1 for roots).
+        const fromCompact = (words: unknown[], parents: unknown[]): SuggestionNode[] => {
+          const nodes: (SuggestionNode | null)[] = [];
+          const roots: SuggestionNode[] = [];
+          words.forEach((rawWord, index) => {
+            const word = typeof rawWord === "string" ? rawWord.trim() : "";
+            const parentIndex = typeof parents[index] === "number" ? (parents[index] as number) : -1;
+            const parent = parentIndex >= 0 && parentIndex < index ? nodes[parentIndex] : undefined;
+            if (!word || parent === null) {
+              nodes.push(null);
+              return;
+            }
+            const node: SuggestionNode = { word, next: [] };
+            nodes.push(node);
+            if (parent) {
+              (parent.next ??= []).push(node);
+            } else {
+              roots.push(node);
+            }
+          });
+          return roots;
+        };
 
         const normalizeNode = (node: any): SuggestionNode | null => {
           if (!node || typeof node.word !== "string") return null;
@@ -755,9 +787,11 @@ export default function FaceLandmarkerApp() {
           return { word, next };
         };
 
-        const normalized = rawSuggestions
-          .map((node: any) => normalizeNode(node))
-          .filter(Boolean) as SuggestionNode[];
+        const normalized = isCompact
+          ? fromCompact(data.words, data.parents)
+          : (rawSuggestions
+              .map((node: any) => normalizeNode(node))
+              .filter(Boolean) as SuggestionNode[]);
 
         const normalizedSentences = rawSentences
           .map((entry: any) => {